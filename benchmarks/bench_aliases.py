@@ -0,0 +1,68 @@
+"""
+Benchmark - Alias only DATA messages
+
+Measures the DATA payload size, the serialization rate and the decoding rate on a mirror entity ( parse and alias
+resolution, SpbEntity.deserialize_payload_data ) of metrics with long hierarchical names, sent with their names
+and with their alias only ( SpbEntity.use_aliases, aliases assigned on BIRTH ).
+
+Usage:
+    python benchmarks/bench_aliases.py [num_payloads] [num_metrics]
+"""
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+
+
+def build_entity(num_metrics, use_aliases):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    entity.use_aliases = use_aliases
+    for i in range(num_metrics):
+        entity.data.set_value("Line%d/Press%02d/Hydraulic/Pressure%d" % (i % 4, i % 10, i), i * 0.5)
+    return entity
+
+
+def build_mirror(entity):
+    mirror = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    mirror.deserialize_payload_birth(entity.serialize_payload_birth())
+    return mirror
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    rates = {}
+    for use_aliases in (False, True):
+        entity = build_entity(num_metrics, use_aliases)
+        mirror = build_mirror(entity)
+        payload_bytes = entity.serialize_payload_data(send_all=True)
+        mirror.deserialize_payload_data(payload_bytes)
+        assert mirror.data.count() == num_metrics
+        assert mirror.data.get_value("Line1/Press05/Hydraulic/Pressure5") == 2.5
+
+        name = "Aliases" if use_aliases else "Names"
+        print("%s, DATA payload of %d metrics: %d bytes" % (name, num_metrics, len(payload_bytes)))
+        rates[use_aliases] = (
+            run("  Serialize", lambda: entity.serialize_payload_data(send_all=True), num_payloads),
+            run("  Decode", lambda: mirror.deserialize_payload_data(payload_bytes), num_payloads),
+        )
+
+    print("Speed-up: x%.2f serialize, x%.2f decode" % (rates[True][0] / rates[False][0],
+                                                       rates[True][1] / rates[False][1]))
+
+
+if __name__ == "__main__":
+    main()
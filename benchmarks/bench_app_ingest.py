@@ -0,0 +1,65 @@
+"""
+Benchmark - MqttSpbEntityApp message ingestion throughput
+
+Measures MqttSpbEntityApp._mqtt_on_message() processing DDATA messages ( payload decoded once and shared
+by the entity update, callbacks and base class handler ) against the previous ingestion path, emulated
+here: payload decoded by the application, again by the entity and again by the base class handler, plus
+one payload dictionary copy per callback.
+
+Usage:
+    python benchmarks/bench_app_ingest.py [num_payloads] [num_metrics]
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+from corpus import build_corpus
+
+from mqtt_spb_wrapper import MqttSpbEntityApp, SpbPayloadParser
+
+
+def create_app(**kwargs):
+    app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1", **kwargs)
+    app._spb_initialized = True
+    app.on_message = None
+    app.callback_data = lambda topic, payload: None
+    app.get_edge_device("EoN1", "Device1").callback_data = lambda payload: None
+    return app
+
+
+def ingest_previous(app, msg):
+    """ Emulation of the previous ingestion path ( three decodes and a copy per callback ) """
+    entity = app.get_edge_device("EoN1", "Device1")
+    payload = SpbPayloadParser(msg.payload)
+    entity.deserialize_payload_data(msg.payload)
+    entity.callback_data(payload.as_dict())
+    app.callback_data(None, payload.as_dict())
+    SpbPayloadParser().parse_payload(msg.payload)
+
+
+def run(name, func, messages):
+    t0 = time.perf_counter()
+    for msg in messages:
+        func(msg)
+    elapsed = time.perf_counter() - t0
+    rate = len(messages) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(messages)))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    messages = [SimpleNamespace(topic="spBv1.0/Group1/DDATA/EoN1/Device1", payload=data)
+                for data in build_corpus(num_payloads, num_metrics)]
+
+    print("Ingesting %d DDATA messages of ~%d metrics" % (num_payloads, num_metrics))
+    app = create_app()
+    before = run("Previous path (3 decodes)", lambda msg: ingest_previous(app, msg), messages)
+    after = run("_mqtt_on_message", lambda msg: app._mqtt_on_message(None, None, msg), messages)
+    print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark - Retained BIRTH replay with the BIRTH payload cache
+
+Emulates an application reconnection with retain_birth: the retained DBIRTH messages of all the devices
+are received again, byte-identical to the ones already processed. Measures MqttSpbEntityApp._mqtt_on_message()
+on the replayed messages without cache and with a PayloadCache ( birth_cache option ).
+
+Usage:
+    python benchmarks/bench_birth_cache.py [num_devices] [num_metrics]
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+from corpus import build_payload
+
+from mqtt_spb_wrapper import MqttSpbEntityApp, PayloadCache
+
+
+def create_app(**kwargs):
+    app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1", **kwargs)
+    app._spb_initialized = True
+    app.on_message = None
+    app.callback_birth = lambda topic, payload: None
+    return app
+
+
+def run(name, func, messages):
+    t0 = time.perf_counter()
+    for msg in messages:
+        func(msg)
+    elapsed = time.perf_counter() - t0
+    rate = len(messages) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(messages)))
+    return rate
+
+
+def main():
+    num_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    messages = [SimpleNamespace(topic="spBv1.0/Group1/DBIRTH/EoN1/Device%d" % i,
+                                payload=build_payload(num_metrics=num_metrics - (i % 10), with_dataset=False))
+                for i in range(num_devices)]
+
+    print("Replaying %d retained DBIRTH messages of ~%d metrics" % (num_devices, num_metrics))
+
+    app = create_app()
+    for msg in messages:    # First connection
+        app._mqtt_on_message(None, None, msg)
+    before = run("No cache", lambda msg: app._mqtt_on_message(None, None, msg), messages)
+
+    app = create_app(birth_cache=PayloadCache(max_entries=2 * num_devices))
+    for msg in messages:    # First connection, BIRTH payloads cached
+        app._mqtt_on_message(None, None, msg)
+    after = run("PayloadCache", lambda msg: app._mqtt_on_message(None, None, msg), messages)
+    print("Speed-up: x%.2f" % (after / before))
+    print("Cache: %s" % app.birth_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark - BIRTH payloads encoding on rebirth
+
+Emulates a gateway rebirthing all its devices at once ( e.g. on a SCADA STATE change ). Measures
+SpbEntity.serialize_payload_birth() for all the devices, with all the metrics encoded ( first BIRTH ), with the
+encoded metrics cached, and with a part of the data metrics changed since the previous BIRTH.
+
+Usage:
+    python benchmarks/bench_birth_encode.py [num_devices] [num_metrics] [changed_percent]
+"""
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+
+
+def build_devices(num_devices, num_metrics):
+    devices = []
+    for d in range(num_devices):
+        device = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device%d" % d)
+        device.attributes.set_value("serial", "SN-%05d" % d)
+        device.attributes.set_value("model", "PUMP-3000")
+        for i in range(num_metrics):
+            if i % 4 == 0:
+                device.data.set_value("Metric%d" % i, "state %d" % i)
+            elif i % 4 == 1:
+                device.data.set_value("Metric%d" % i, i)
+            else:
+                device.data.set_value("Metric%d" % i, i * 1.5)
+        device.commands.set_value("reboot", False)
+        devices.append(device)
+    return devices
+
+
+def run(name, func, devices):
+    t0 = time.perf_counter()
+    for device in devices:
+        func(device)
+    elapsed = time.perf_counter() - t0
+    rate = len(devices) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(devices)))
+    return rate
+
+
+def main():
+    num_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    changed_percent = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    devices = build_devices(num_devices, num_metrics)
+    changed = max(1, num_metrics * changed_percent // 100)
+
+    print("Rebirth of %d devices of %d metrics" % (num_devices, num_metrics))
+    before = run("First BIRTH", lambda device: device.serialize_payload_birth(), devices)
+    after = run("Cached metrics", lambda device: device.serialize_payload_birth(), devices)
+    print("Speed-up: x%.2f" % (after / before))
+
+    for device in devices:
+        for i in range(changed):
+            device.data.set_value("Metric%d" % (i * 4 + 2), i * 2.5)
+    after = run("%d%% metrics changed" % changed_percent, lambda device: device.serialize_payload_birth(), devices)
+    print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
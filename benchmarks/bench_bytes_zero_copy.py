@@ -0,0 +1,80 @@
+"""
+Benchmark - Bytes / File metric decoding, copy vs zero-copy
+
+Decodes payloads carrying multi-MB File metrics ( e.g. firmware blobs, camera snapshots ) with the
+default SpbPayloadParser ( bytes copy plus base64 'bytesValue' ) and with zero_copy=True ( memoryview
+slices of the MQTT payload buffer ). Memory allocated by each decoder is measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_bytes_zero_copy.py [file_size_mb] [num_files] [num_payloads]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import corpus  # noqa: F401 - Sets the package path
+
+from mqtt_spb_wrapper.spb_base import SpbPayloadParser
+from mqtt_spb_wrapper.spb_protobuf import Payload, addMetric, MetricDataType
+
+
+def build_file_payload(file_size, num_files):
+    """ Payload with num_files File metrics of file_size bytes, and a few scalar metrics """
+    payload = Payload()
+    addMetric(payload, "status", None, MetricDataType.String, "OK")
+    for i in range(num_files):
+        addMetric(payload, "snapshot_%d" % i, None, MetricDataType.File, os.urandom(file_size))
+    addMetric(payload, "temperature", None, MetricDataType.Double, 21.5)
+    return payload.SerializeToString()
+
+
+def run(name, func, corpus):
+    t0 = time.perf_counter()
+    for data in corpus:
+        func(data)
+    elapsed = time.perf_counter() - t0
+    rate = len(corpus) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(corpus)))
+    return rate
+
+
+def allocated_memory(func, data):
+    """ Memory allocated by the decoder and still held by its result, and peak memory """
+    tracemalloc.start()
+    result = func(data)  # noqa: F841 - Keep the result alive while measuring
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main():
+    file_size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 else 4 * 1024 * 1024
+    num_files = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    num_payloads = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    data = build_file_payload(file_size, num_files)
+    corpus = [data] * num_payloads
+
+    def decode_copy(payload_data):
+        return SpbPayloadParser(payload_data).payload
+
+    def decode_zero_copy(payload_data):
+        return SpbPayloadParser(payload_data, zero_copy=True).payload
+
+    # Both decoders must produce the same values
+    for copy_metric, view_metric in zip(decode_copy(data)["metrics"], decode_zero_copy(data)["metrics"]):
+        assert copy_metric["value"] == view_metric["value"]
+
+    print("Decoding %d payloads of %.1f MiB ( %d File metrics )" % (num_payloads, len(data) / 1048576.0, num_files))
+    before = run("Copy + base64 (default)", decode_copy, corpus)
+    after = run("Zero-copy", decode_zero_copy, corpus)
+    print("Speed-up: x%.2f" % (after / before))
+
+    for name, func in (("Copy + base64 (default)", decode_copy), ("Zero-copy", decode_zero_copy)):
+        current, peak = allocated_memory(func, data)
+        print("%-28s held %10.1f KiB  peak %10.1f KiB" % (name, current / 1024.0, peak / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
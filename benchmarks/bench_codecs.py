@@ -0,0 +1,67 @@
+"""
+Benchmark - Payload codecs
+
+Runs every registered payload codec ( see mqtt_spb_wrapper.spb_codec ) over the same corpus: entity DATA
+payloads encoding ( SpbEntity.serialize_payload_data ) and payloads decoding ( SpbPayloadParser ). The
+decoded payloads of every codec are checked against the default codec before measuring.
+
+Usage:
+    python benchmarks/bench_codecs.py [num_payloads] [num_metrics]
+"""
+import sys
+import time
+
+from corpus import build_corpus
+
+from mqtt_spb_wrapper import SpbEntity, SpbPayloadParser
+from mqtt_spb_wrapper.spb_codec import get_codec, get_codecs
+
+
+def build_entity(num_metrics):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    for i in range(num_metrics):
+        kind = i % 4
+        if kind == 0:
+            entity.data.set_value("Metric%d" % i, i * 1.5)
+        elif kind == 1:
+            entity.data.set_value("Metric%d" % i, i)
+        elif kind == 2:
+            entity.data.set_value("Metric%d" % i, bool(i % 2))
+        else:
+            entity.data.set_value("Metric%d" % i, "value %d" % i)
+    return entity
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for i in range(count):
+        func(i)
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    corpus = build_corpus(num_payloads, num_metrics)
+    entity = build_entity(num_metrics)
+    default = get_codec()
+
+    # Every codec must decode the corpus as the default codec
+    for name, codec in get_codecs().items():
+        for data in corpus[:10]:
+            assert repr(SpbPayloadParser(data, codec=codec).payload) == repr(SpbPayloadParser(data, codec=default).payload), name
+
+    print("Corpus: %d payloads of ~%d metrics, default codec '%s'" % (num_payloads, num_metrics, default.name))
+    for name, codec in sorted(get_codecs().items()):
+        entity.codec = codec
+        run("%s encode" % name, lambda i: entity.serialize_payload_data(send_all=True), num_payloads)
+        run("%s decode" % name, lambda i: SpbPayloadParser(corpus[i], codec=codec), num_payloads)
+        run("%s decode lazy" % name, lambda i: SpbPayloadParser(corpus[i], lazy=True, codec=codec), num_payloads)
+
+
+if __name__ == "__main__":
+    main()
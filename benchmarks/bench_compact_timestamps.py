@@ -0,0 +1,64 @@
+"""
+Benchmark - Compact timestamps of list values
+
+Measures the DATA payload size, the serialization rate and the decoding rate on a mirror entity
+( SpbEntity.deserialize_payload_data ) of list values sampled at 1 kHz, with the timestamps sent as a DataSet
+column and as compact timestamps ( SpbEntity.compact_timestamps ): base timestamp and sampling period for a
+regular sampling, delta of delta varints for a jittered one.
+
+Usage:
+    python benchmarks/bench_compact_timestamps.py [num_payloads] [num_samples]
+"""
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+
+
+def build_entity(num_samples, compact_timestamps):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    entity.compact_timestamps = compact_timestamps
+    values = [(i % 100) * 0.25 for i in range(num_samples)]
+    entity.data.set_value("Vibration", values, timestamp=[1729453899000 + i for i in range(num_samples)])
+    entity.data.set_value("Current", values, timestamp=[1729453899000 + i + (i % 7 == 0) for i in range(num_samples)])
+    return entity
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_samples = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    rates = {}
+    for compact_timestamps in (False, True):
+        entity = build_entity(num_samples, compact_timestamps)
+        mirror = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        payload_bytes = entity.serialize_payload_data(send_all=True)
+        mirror.deserialize_payload_data(payload_bytes)
+        for name in ("Vibration", "Current"):
+            assert mirror.data[name].timestamp == entity.data[name].timestamp, name
+
+        name = "Compact timestamps" if compact_timestamps else "Timestamps column"
+        print("%s, DATA payload of 2 x %d samples: %d bytes" % (name, num_samples, len(payload_bytes)))
+        rates[compact_timestamps] = (
+            run("  Serialize", lambda: entity.serialize_payload_data(send_all=True), num_payloads),
+            run("  Decode", lambda: mirror.deserialize_payload_data(payload_bytes), num_payloads),
+        )
+
+    print("Speed-up: x%.2f serialize, x%.2f decode" % (rates[True][0] / rates[False][0],
+                                                       rates[True][1] / rates[False][1]))
+
+
+if __name__ == "__main__":
+    main()
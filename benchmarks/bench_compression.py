@@ -0,0 +1,67 @@
+"""
+Benchmark - Compressed payloads
+
+Measures the size and the serialization / parsing rate of a large BIRTH payload ( scalar metrics and a DataSet )
+and of DataSet DATA payloads, uncompressed and compressed with DEFLATE and GZIP ( SpbEntity.compression ).
+The compressed payloads are checked to decode into the same metrics before measuring.
+
+Usage:
+    python benchmarks/bench_compression.py [num_payloads] [num_metrics] [num_rows]
+"""
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity, SpbPayloadParser
+
+
+def build_entity(num_metrics, num_rows):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    for i in range(num_metrics):
+        entity.attributes.set_value("Description%d" % i, "Sensor %d - line %d" % (i, i % 4))
+        entity.data.set_value("Temperature%d" % i, 20.0 + (i % 10) * 0.5)
+        entity.data.set_value("Status%d" % i, "RUN" if i % 3 else "IDLE")
+    entity.data.set_value("Log", {
+        "timestamp": [1729453899000 + 1000 * i for i in range(num_rows)],
+        "value": [float(i % 50) for i in range(num_rows)],
+        "state": ["RUN" if i % 7 else "IDLE" for i in range(num_rows)],
+    })
+    return entity
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    num_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    entity = build_entity(num_metrics, num_rows)
+    expected = SpbPayloadParser(entity.serialize_payload_birth()).payload["metrics"]
+
+    print("BIRTH payload of %d metrics, DataSet of %d rows" % (len(expected), num_rows))
+    for algorithm in (None, "DEFLATE", "GZIP"):
+        entity.compression = algorithm
+        payload_bytes = entity.serialize_payload_birth()
+        metrics = SpbPayloadParser(payload_bytes).payload["metrics"]
+        assert [(m["name"], str(m["value"])) for m in metrics] == [(m["name"], str(m["value"])) for m in expected]
+
+        name = algorithm or "Uncompressed"
+        print("%-28s %10d bytes" % (name, len(payload_bytes)))
+        run("  Serialize BIRTH", entity.serialize_payload_birth, num_payloads)
+        run("  Parse BIRTH", lambda: SpbPayloadParser(payload_bytes), num_payloads)
+        payload_bytes = entity.serialize_payload_data(send_all=True)
+        print("%-28s %10d bytes" % ("  DATA, all metrics", len(payload_bytes)))
+
+
+if __name__ == "__main__":
+    main()
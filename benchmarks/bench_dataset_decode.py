@@ -0,0 +1,105 @@
+"""
+Benchmark - DataSet metric decoding
+
+Compares the columnar DataSet decoder used by SpbPayloadParser against the previous element by element
+decoding of the MessageToDict representation ( kept here as reference ), checking that both produce the
+same column values. Peak memory of each decoder is measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_dataset_decode.py [num_rows] [num_payloads]
+"""
+import sys
+import time
+import tracemalloc
+
+import corpus  # noqa: F401 - Sets the package path
+
+from google.protobuf.json_format import MessageToDict
+from mqtt_spb_wrapper.spb_base import SpbPayloadParser
+from mqtt_spb_wrapper.spb_protobuf import Payload, MetricDataType
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import addMetricDataset_from_dict
+
+
+def build_dataset_payload(num_rows):
+    """ Payload with a single DataSet metric of num_rows rows and 4 columns """
+    payload = Payload()
+    addMetricDataset_from_dict(payload, "dataset", None, {
+        "timestamps": [1729453899362 + i for i in range(num_rows)],
+        "values": [i * 0.5 for i in range(num_rows)],
+        "counter": [i for i in range(num_rows)],
+        "state": ["RUN" if i % 2 else "IDLE" for i in range(num_rows)],
+    })
+    return payload.SerializeToString()
+
+
+def decode_dataset_messagetodict(data):
+    """ Reference implementation - previous DataSet decoding ( SpbEntity._deserialize_payload_metric ) """
+    pb_payload = Payload()
+    pb_payload.ParseFromString(data)
+    metric_value = MessageToDict(pb_payload)['metrics'][0]
+
+    columns_data = {column: [] for column in metric_value['datasetValue']['columns']}
+    for row in metric_value['datasetValue']['rows']:
+        for idx, element in enumerate(row['elements']):
+            column_name = metric_value['datasetValue']['columns'][idx]
+            value = next(iter(element.values()))
+            values_data_type = metric_value['datasetValue']['types'][
+                metric_value['datasetValue']['columns'].index(column_name)]
+
+            if values_data_type == MetricDataType.Double or values_data_type == MetricDataType.Float:
+                value = float(value)
+            elif values_data_type >= MetricDataType.Int8 and values_data_type <= MetricDataType.UInt64:
+                value = int(value)
+            elif values_data_type == MetricDataType.Boolean:
+                value = bool(value)
+
+            columns_data[column_name].append(value)
+    return columns_data
+
+
+def decode_dataset_columns(data):
+    return SpbPayloadParser(data).payload['metrics'][0]['value']
+
+
+def run(name, func, corpus):
+    t0 = time.perf_counter()
+    for data in corpus:
+        func(data)
+    elapsed = time.perf_counter() - t0
+    rate = len(corpus) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(corpus)))
+    return rate
+
+
+def peak_memory(func, data):
+    tracemalloc.start()
+    result = func(data)  # noqa: F841 - Keep the result alive while measuring
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    num_payloads = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    corpus = [build_dataset_payload(num_rows)] * num_payloads
+
+    # Both decoders must produce the same values
+    reference = decode_dataset_messagetodict(corpus[0])
+    columns = decode_dataset_columns(corpus[0])
+    for name, values in reference.items():
+        assert list(columns[name]) == values, name
+
+    print("Decoding %d DataSet payloads of %d rows" % (num_payloads, num_rows))
+    before = run("MessageToDict (previous)", decode_dataset_messagetodict, corpus)
+    after = run("Typed columns", decode_dataset_columns, corpus)
+    print("Speed-up: x%.2f" % (after / before))
+    print("Peak memory: previous %.1f KiB, typed columns %.1f KiB" % (
+        peak_memory(decode_dataset_messagetodict, corpus[0]) / 1024.0,
+        peak_memory(decode_dataset_columns, corpus[0]) / 1024.0,
+    ))
+
+
+if __name__ == "__main__":
+    main()
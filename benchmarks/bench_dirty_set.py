@@ -0,0 +1,98 @@
+"""
+Benchmark - Updated metrics tracking
+
+Measures the publish cycle of a device of 2000 metrics with a few changes per cycle ( set the values, check
+MetricGroup.is_updated() and serialize the DATA payload ), with the updated metrics tracked by the metric group
+and with the previous scan of all the metrics ( kept here as reference ), on is_updated() and on serialization.
+
+Usage:
+    python benchmarks/bench_dirty_set.py [num_cycles] [num_metrics] [num_changes]
+"""
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity, SpbPayloadParser
+from mqtt_spb_wrapper.spb_codec import get_codec
+
+
+class ReferenceEntity(SpbEntity):
+    """ Reference implementation - all the metrics scanned for the updated ones """
+
+    def is_data_updated(self):
+        for item in self.data.values():
+            if item.is_updated:
+                return True
+        return False
+
+    def serialize_payload_data(self, send_all=False):
+        codec = get_codec(self.codec)
+        payload = codec.new_payload("DDATA")
+        items = [item for item in self.data.values() if send_all or item.is_updated]
+        for item in items:
+            self._serialize_payload_metric(payload=payload, name=item.name, metric_value=item, codec=codec)
+        payload_bytes = codec.encode(payload)
+        for item in items:
+            item.is_updated = False
+        return payload_bytes
+
+
+class Entity(SpbEntity):
+
+    def is_data_updated(self):
+        return self.data.is_updated()
+
+
+def build_entity(cls, num_metrics):
+    entity = cls(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    for i in range(num_metrics):
+        entity.data.set_value("Metric%d" % i, i * 0.5)
+    entity.serialize_payload_birth()
+    return entity
+
+
+def publish_cycles(entity, num_metrics, num_changes):
+    names = ["Metric%d" % i for i in range(num_metrics)]
+    step = num_metrics // num_changes
+
+    def func(count):
+        for cycle in range(count):
+            for i in range(num_changes):
+                entity.data.set_value(names[(cycle + i * step) % num_metrics], cycle * 0.25)
+            if entity.is_data_updated():
+                entity.serialize_payload_data()
+    return func
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    num_changes = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    reference = build_entity(ReferenceEntity, num_metrics)
+    entity = build_entity(Entity, num_metrics)
+    for device in (reference, entity):
+        device.data.set_value("Metric7", 1.0)
+        device.data.set_value("Metric3", 2.0)
+        metrics = SpbPayloadParser(device.serialize_payload_data()).payload["metrics"]
+        assert sorted(m["name"] for m in metrics) == ["Metric3", "Metric7"]
+        assert not device.is_data_updated()
+
+    print("Publishing %d DATA payloads, %d metrics, %d changes" % (num_cycles, num_metrics, num_changes))
+    before = run("Scan ( reference )", publish_cycles(reference, num_metrics, num_changes), num_cycles)
+    after = run("Updated metrics tracked", publish_cycles(entity, num_metrics, num_changes), num_cycles)
+    print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
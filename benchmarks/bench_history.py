@@ -0,0 +1,93 @@
+"""
+Benchmark - Metric history ring buffers
+
+Measures the memory and the append / last N samples access rates of the per metric history of numeric values,
+with the MetricHistory ring buffers ( array.array, memoryview slices of the last samples ) and with the history a
+dashboard keeps on its own ( kept here as reference ): a bounded deque of ( timestamp, value ) tuples per metric,
+copied into lists on access.
+
+Usage:
+    python benchmarks/bench_history.py [num_metrics] [capacity] [num_samples]
+"""
+import sys
+import time
+import tracemalloc
+from collections import deque
+from itertools import islice
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import MetricHistory
+from mqtt_spb_wrapper.spb_base import MetricDataType
+
+
+class ReferenceHistory:
+    """ Reference implementation - bounded deque of ( timestamp, value ) per metric """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffers = {}
+
+    def append(self, entity, name, value, timestamp, spb_data_type=None):
+        buffer = self._buffers.get((entity, name))
+        if buffer is None:
+            buffer = self._buffers[(entity, name)] = deque(maxlen=self.capacity)
+        buffer.append((timestamp, value))
+
+    def last(self, entity, name, n):
+        buffer = self._buffers[(entity, name)]
+        samples = list(islice(buffer, len(buffer) - n, None))
+        return [s[0] for s in samples], [s[1] for s in samples]
+
+
+def last(history, entity, name, n):
+    if isinstance(history, ReferenceHistory):
+        return history.last(entity, name, n)
+    return history.get(entity, name).last(n)
+
+
+def fill(history, num_metrics, num_samples):
+    names = ["Metric%d" % i for i in range(num_metrics)]
+    for i in range(num_samples):
+        history.append("Device1", names[i % num_metrics], i * 0.5, 1729453899000 + i, MetricDataType.Double)
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f op/s  %8.3f us/op" % (name, rate, 1e6 * elapsed / count))
+    return rate
+
+
+def main():
+    num_metrics = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    num_samples = int(sys.argv[3]) if len(sys.argv) > 3 else 2000000
+
+    rates = {}
+    for cls in (ReferenceHistory, MetricHistory):
+        tracemalloc.start()
+        history = cls(capacity)
+        fill(history, num_metrics, num_samples)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        timestamps, values = last(history, "Device1", "Metric3", 2)
+        assert list(values) == [(num_samples - 2 * num_metrics + 3) * 0.5, (num_samples - num_metrics + 3) * 0.5]
+
+        name = "Deque ( reference )" if cls is ReferenceHistory else "Ring buffers"
+        print("%s, %d metrics x %d samples: %.1f MiB" % (name, num_metrics, capacity, size / 1024 / 1024))
+        rates[cls] = (
+            run("  Append", lambda count: fill(history, num_metrics, count), num_samples // 4),
+            run("  Last %d samples" % (capacity // 2),
+                lambda count: [last(history, "Device1", "Metric%d" % (i % num_metrics), capacity // 2)
+                               for i in range(count)], 10000),
+        )
+
+    print("Speed-up: x%.2f append, x%.2f last samples" % (rates[MetricHistory][0] / rates[ReferenceHistory][0],
+                                                          rates[MetricHistory][1] / rates[ReferenceHistory][1]))
+
+
+if __name__ == "__main__":
+    main()
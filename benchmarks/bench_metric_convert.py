@@ -0,0 +1,81 @@
+"""
+Benchmark - Metric value conversions
+
+Measures the serialization of DATA payloads of DateTime, UUID, Bytes and File metrics, with the values converted
+once when they are set ( MetricValue.encoded_value ) and with the previous conversion on every serialization
+( kept here as reference ), which replaced the metric values by the converted ones.
+
+Usage:
+    python benchmarks/bench_metric_convert.py [num_payloads] [num_metrics]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+from mqtt_spb_wrapper.spb_base import MetricDataType, _METRIC_VALUE_CONVERTERS
+
+
+class ReferenceEntity(SpbEntity):
+    """ Reference implementation - values converted on every serialization """
+
+    def _serialize_payload_metric(self, payload, name, metric_value, codec=None, is_birth=False):
+        converter = _METRIC_VALUE_CONVERTERS.get(metric_value.spb_data_type)
+        if converter is not None:
+            metric_value.value = converter(metric_value.value)     # Value replaced, callback and updated flag
+        super()._serialize_payload_metric(payload, name, metric_value, codec, is_birth)
+
+
+def build_entity(cls, num_metrics, file_obj):
+    entity = cls(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    for i in range(num_metrics):
+        if i % 4 == 0:
+            entity.data.set_value("DateTime%d" % i, datetime(2024, 10, 20, 12, 0, i % 60))
+        elif i % 4 == 1:
+            entity.data.set_value("UUID%d" % i, uuid.UUID(int=i))
+        elif i % 4 == 2:
+            entity.data.set_value("Bytes%d" % i, bytearray(b"\x01" * 64), spb_data_type=MetricDataType.Bytes)
+        else:
+            entity.data.set_value("File%d" % i, file_obj, spb_data_type=MetricDataType.File)
+    return entity
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as path:
+        file_path = os.path.join(path, "config.bin")
+        with open(file_path, "wb") as f:
+            f.write(os.urandom(4096))
+
+        with open(file_path, "rb") as file_obj:
+            reference = build_entity(ReferenceEntity, num_metrics, file_obj)
+            entity = build_entity(SpbEntity, num_metrics, file_obj)
+            assert len(reference.serialize_payload_data(send_all=True)) == \
+                len(entity.serialize_payload_data(send_all=True))
+
+            print("Serializing %d DATA payloads of %d metrics" % (num_payloads, num_metrics))
+            before = run("Converted on serialization", lambda: reference.serialize_payload_data(send_all=True),
+                         num_payloads)
+            after = run("Converted when set", lambda: entity.serialize_payload_data(send_all=True), num_payloads)
+            print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
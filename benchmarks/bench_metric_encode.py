@@ -0,0 +1,80 @@
+"""
+Benchmark - Metric encoding
+
+Measures the payload encoding of 1k-metric payloads, with the Tahu helpers ( addMetric ) over all the scalar
+datatypes and with SpbEntity.serialize_payload_data().
+
+Usage:
+    python benchmarks/bench_metric_encode.py [num_payloads] [num_metrics]
+"""
+import sys
+import time
+from datetime import datetime
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+from mqtt_spb_wrapper.spb_protobuf import addMetric, getDdataPayload, MetricDataType
+
+SCALAR_VALUES = [
+    (MetricDataType.Int8, -8),
+    (MetricDataType.Int16, -1600),
+    (MetricDataType.Int32, -320000),
+    (MetricDataType.Int64, -2 ** 40),
+    (MetricDataType.UInt8, 8),
+    (MetricDataType.UInt16, 1600),
+    (MetricDataType.UInt32, 320000),
+    (MetricDataType.UInt64, 2 ** 40),
+    (MetricDataType.Float, 1.5),
+    (MetricDataType.Double, 123.456),
+    (MetricDataType.Boolean, True),
+    (MetricDataType.String, "value"),
+    (MetricDataType.DateTime, 1729453899000),
+    (MetricDataType.Text, "text value"),
+    (MetricDataType.UUID, "4d1c1f8e-9d9a-4c8e-b7b5-0d6f9c3b8a21"),
+    (MetricDataType.Bytes, b"\x00\x01\x02"),
+]
+
+
+def build_entity(num_metrics):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    for i in range(num_metrics):
+        datatype, value = SCALAR_VALUES[i % len(SCALAR_VALUES)]
+        if datatype == MetricDataType.DateTime:
+            value = datetime.fromtimestamp(value / 1000)
+        entity.data.set_value("Metric%d" % i, value, spb_data_type=datatype)
+    return entity
+
+
+def encode_payload(metrics):
+    payload = getDdataPayload()
+    timestamp = int(time.time() * 1000)
+    for name, datatype, value in metrics:
+        addMetric(payload, name, None, datatype, value, timestamp)
+    return payload.SerializeToString()
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    metrics = [("Metric%d" % i,) + SCALAR_VALUES[i % len(SCALAR_VALUES)] for i in range(num_metrics)]
+    entity = build_entity(num_metrics)
+
+    print("Encoding %d payloads of %d metrics" % (num_payloads, num_metrics))
+    run("addMetric", lambda: encode_payload(metrics), num_payloads)
+    run("serialize_payload_data", lambda: entity.serialize_payload_data(send_all=True), num_payloads)
+
+
+if __name__ == "__main__":
+    main()
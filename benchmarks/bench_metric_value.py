@@ -0,0 +1,131 @@
+"""
+Benchmark - MetricValue memory and get / set latency
+
+Measures the memory per metric of a mirror of scalar metrics, and the latency of reading and setting the metric
+values and timestamps, with the MetricValue slots and scalar storage, and with the previous storage ( kept here
+as reference ): instance dictionary, values and timestamps wrapped in one element lists, and the list values
+mode checked on every read.
+
+Usage:
+    python benchmarks/bench_metric_value.py [num_metrics] [num_ops]
+"""
+import sys
+import time
+import tracemalloc
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper.spb_base import MetricValue, _convert_metric_value
+
+
+class ReferenceMetricValue(MetricValue):
+    """ Reference implementation - instance dictionary and one element lists """
+
+    def __init__(self, name, value, timestamp=None, **kwargs):
+        super().__init__(name, value, timestamp, **kwargs)
+        self._value = [self._value]
+        self._timestamp = [self._timestamp]
+
+    def is_list_values(self):
+        return not ((len(self._value) == 1) or (len(self._timestamp) != len(self._value)))
+
+    @property
+    def value(self):
+        self.is_updated = False
+        if not self.is_list_values():
+            return self._value[0]
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if isinstance(value, list):
+            encoded_value = _convert_metric_value(self._spb_data_type, value[0]) if len(value) == 1 else None
+            self._value = value
+        else:
+            encoded_value = _convert_metric_value(self._spb_data_type, value)
+            self._value = [value]
+        self._encoded_value = encoded_value
+        self._birth_fragment = None
+        if self._callback is not None:
+            self._callback(self.value)
+        self.is_updated = True
+
+    @property
+    def timestamp(self):
+        if self.is_list_values():
+            return self._timestamp
+        return self._timestamp[0]
+
+    @timestamp.setter
+    def timestamp(self, timestamp):
+        if timestamp is None:
+            self.timestamp_update()
+        else:
+            if isinstance(timestamp, list):
+                self._timestamp = timestamp
+            else:
+                self._timestamp = [int(timestamp)]
+            self._birth_fragment = None
+
+
+def build_metrics(cls, num_metrics):
+    return [cls("Line%d/Sensor%d/Value" % (i % 4, i), i * 0.5, 1729453899000 + i) for i in range(num_metrics)]
+
+
+def memory_per_metric(cls, num_metrics):
+    """ Memory allocated per metric value, names excluded """
+    names = ["Line%d/Sensor%d/Value" % (i % 4, i) for i in range(num_metrics)]
+    tracemalloc.start()
+    metrics = [cls(names[i], i * 0.5, 1729453899000 + i) for i in range(num_metrics)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(metrics) == num_metrics
+    return size / num_metrics
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f op/s  %8.3f us/op" % (name, rate, 1e6 * elapsed / count))
+    return rate
+
+
+def get_values(metrics):
+    def func(count):
+        n = len(metrics)
+        for i in range(count):
+            metric = metrics[i % n]
+            metric.value, metric.timestamp
+    return func
+
+
+def set_values(metrics):
+    def func(count):
+        n = len(metrics)
+        for i in range(count):
+            metrics[i % n].set(i * 0.25, 1729453899000 + i)
+    return func
+
+
+def main():
+    num_metrics = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    num_ops = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    rates = {}
+    for cls in (ReferenceMetricValue, MetricValue):
+        metrics = build_metrics(cls, num_metrics)
+        assert (metrics[5].value, metrics[5].timestamp, metrics[5].is_list_values()) == (2.5, 1729453899005, False)
+
+        name = "Reference" if cls is ReferenceMetricValue else "Slots, scalar storage"
+        print("%s, %d metrics: %d bytes per metric" % (name, num_metrics, memory_per_metric(cls, num_metrics)))
+        rates[cls] = (run("  Get value and timestamp", get_values(metrics), num_ops),
+                      run("  Set value and timestamp", set_values(metrics), num_ops))
+
+    print("Speed-up: x%.2f get, x%.2f set" % (rates[MetricValue][0] / rates[ReferenceMetricValue][0],
+                                              rates[MetricValue][1] / rates[ReferenceMetricValue][1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark - SpbPayloadParser.parse_many scaling across worker processes
+
+Decodes a large corpus of payloads ( historian backfill like workload ) with parse_many() for an increasing
+number of worker processes, up to the number of CPUs, checking that the results match the sequential decoding.
+
+Usage:
+    python benchmarks/bench_parse_many.py [num_payloads] [num_metrics] [chunk_size] [max_workers]
+"""
+import os
+import sys
+import time
+
+from corpus import build_corpus
+
+from mqtt_spb_wrapper.spb_base import SpbPayloadParser
+
+
+def run(name, func, corpus):
+    t0 = time.perf_counter()
+    func(corpus)
+    elapsed = time.perf_counter() - t0
+    rate = len(corpus) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(corpus)))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+
+    corpus = build_corpus(num_payloads, num_metrics)
+    cpus = int(sys.argv[4]) if len(sys.argv) > 4 else (os.cpu_count() or 1)
+
+    # Results must match the sequential decoding, in the same order ( repr, DataSet columns may be NumPy arrays )
+    expected = [SpbPayloadParser().parse_payload(data) for data in corpus[:2 * chunk_size]]
+    results = list(SpbPayloadParser.parse_many(corpus[:2 * chunk_size], workers=2, chunk_size=chunk_size))
+    assert repr(results) == repr(expected)
+
+    for data in corpus:     # Warm up
+        SpbPayloadParser().parse_payload(data)
+
+    print("Decoding %d payloads of ~%d metrics, chunks of %d, up to %d workers" % (num_payloads, num_metrics, chunk_size, cpus))
+    base = run("Sequential", lambda c: [SpbPayloadParser().parse_payload(data) for data in c], corpus)
+
+    workers = 1
+    while True:
+        rate = run("parse_many workers=%d" % workers,
+                   lambda c: list(SpbPayloadParser.parse_many(c, workers=workers, chunk_size=chunk_size)), corpus)
+        print("%-28s x%.2f" % ("", rate / base))
+        if workers >= cpus:
+            break
+        workers = min(workers * 2, cpus)
+
+
+if __name__ == "__main__":
+    main()
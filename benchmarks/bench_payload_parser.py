@@ -0,0 +1,103 @@
+"""
+Benchmark - SpbPayloadParser decoding throughput
+
+Compares the direct protobuf to python decoder used by SpbPayloadParser against the previous
+MessageToDict based implementation ( kept here as reference ), checking that both produce the same output.
+The lazy parser is measured accessing only 3 metrics of each payload.
+
+Usage:
+    python benchmarks/bench_payload_parser.py [num_payloads] [num_metrics]
+"""
+import base64
+import sys
+import time
+from datetime import datetime
+
+from corpus import build_corpus
+
+from google.protobuf.json_format import MessageToDict
+from mqtt_spb_wrapper.spb_base import SpbPayloadParser
+from mqtt_spb_wrapper.spb_protobuf import Payload, MetricDataType
+
+
+def parse_payload_messagetodict(payload_data):
+    """ Reference implementation - previous SpbPayloadParser.parse_payload() """
+    pb_payload = Payload()
+    pb_payload.ParseFromString(payload_data)
+    payload = MessageToDict(pb_payload)
+
+    if "metrics" in payload.keys():
+        for i in range(len(payload['metrics'])):
+
+            for k in payload['metrics'][i].keys():
+                if "Value" in k:
+                    payload['metrics'][i]['value'] = payload['metrics'][i][k]
+                    break
+
+            if payload['metrics'][i]['datatype'] == MetricDataType.Double or payload['metrics'][i]['datatype'] == MetricDataType.Float:
+                payload['metrics'][i]['value'] = float(payload['metrics'][i]['value'])
+            elif payload['metrics'][i]['datatype'] >= MetricDataType.Int8 and payload['metrics'][i]['datatype'] <= MetricDataType.UInt64:
+                payload['metrics'][i]['value'] = int(payload['metrics'][i]['value'])
+            elif payload['metrics'][i]['datatype'] == MetricDataType.Boolean:
+                payload['metrics'][i]['value'] = bool(payload['metrics'][i]['value'])
+            elif payload['metrics'][i]['datatype'] == MetricDataType.DateTime:
+                try:
+                    payload['metrics'][i]['value'] = datetime.fromtimestamp(int(payload['metrics'][i]['value']) / 1000)
+                except:
+                    pass
+            elif payload['metrics'][i]['datatype'] == MetricDataType.Bytes or payload['metrics'][i]['datatype'] == MetricDataType.File:
+                try:
+                    payload['metrics'][i]['value'] = base64.b64decode(payload['metrics'][i]['value'])
+                except:
+                    pass
+
+            try:
+                payload['metrics'][i]['alias'] = int(payload['metrics'][i]['alias'])
+            except:
+                pass
+
+    return payload
+
+
+def without_datasets(payload):
+    """ DataSet values are decoded into columns by SpbPayloadParser, they are compared in bench_dataset_decode.py """
+    payload["metrics"] = [m for m in payload.get("metrics", []) if m.get("datatype") != MetricDataType.DataSet]
+    return payload
+
+
+def parse_lazy_three_metrics(data):
+    """ Typical callback, only a few metrics of the payload are accessed """
+    metrics = SpbPayloadParser(data, lazy=True).payload['metrics']
+    return metrics[0]['value'], metrics[10]['value'], metrics[20]['value']
+
+
+def run(name, func, corpus):
+    t0 = time.perf_counter()
+    for data in corpus:
+        func(data)
+    elapsed = time.perf_counter() - t0
+    rate = len(corpus) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(corpus)))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    corpus = build_corpus(num_payloads, num_metrics)
+
+    # Both decoders must produce the same output
+    for data in corpus:
+        assert without_datasets(SpbPayloadParser().parse_payload(data)) == \
+            without_datasets(parse_payload_messagetodict(data))
+
+    print("Decoding %d payloads of ~%d metrics" % (num_payloads, num_metrics))
+    before = run("MessageToDict (previous)", parse_payload_messagetodict, corpus)
+    after = run("SpbPayloadParser", lambda data: SpbPayloadParser().parse_payload(data), corpus)
+    print("Speed-up: x%.2f" % (after / before))
+    run("SpbPayloadParser lazy (3)", parse_lazy_three_metrics, corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark - Sustained DATA publishing, payload allocations
+
+Emulates devices publishing their DATA at a fixed rate: every round the metric values of all the devices are
+updated and their DATA payloads serialized ( SpbEntity.serialize_payload_data ). Measures the serialization rate,
+the python allocations of each message ( tracemalloc ), the garbage collections and the process memory
+growth, with a protobuf Payload message per message ( ProtobufCodec(wire_encoder=False), kept here as reference ) and with the DATA
+payloads written straight into the wire format ( PayloadWriter, the default ).
+
+The PayloadWriter allocates no message object per payload, only its buffer and the encoded bytes ( about twice
+the payload size, see the traced peak ), none of them tracked by the garbage collector, so no payload object pool
+is needed. The protobuf message allocations are made in the protobuf C arenas, not traced by tracemalloc.
+
+Usage:
+    python benchmarks/bench_payload_reuse.py [num_devices] [num_rounds] [num_metrics]
+"""
+import gc
+import resource
+import sys
+import time
+import tracemalloc
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+from mqtt_spb_wrapper.spb_codec import ProtobufCodec
+
+
+def build_devices(num_devices, codec):
+    devices = []
+    for d in range(num_devices):
+        device = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device%d" % d)
+        device.codec = codec
+        devices.append(device)
+    return devices
+
+
+def update_round(devices, num_metrics, r):
+    for device in devices:
+        for i in range(num_metrics):
+            if i % 10 == 0:
+                device.data.set_value("Metric%d" % i, "state %d" % (r % 7))
+            else:
+                device.data.set_value("Metric%d" % i, r * 0.5 + i)
+
+
+def run(name, codec, num_devices, num_rounds, num_metrics):
+    devices = build_devices(num_devices, codec)
+    update_round(devices, num_metrics, 0)  # Warm up, metrics created
+    for device in devices:
+        device.serialize_payload_data()
+
+    gc.collect()
+    collections = sum(stat["collections"] for stat in gc.get_stats())
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    elapsed = 0.0
+    size = 0
+    for r in range(1, num_rounds + 1):
+        update_round(devices, num_metrics, r)     # Not measured, only the serialization
+        t0 = time.perf_counter()
+        for device in devices:
+            size += len(device.serialize_payload_data())
+        elapsed += time.perf_counter() - t0
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+
+    # Python allocations of each message, traced on a separate round ( tracemalloc slows the allocations down,
+    # and does not trace the protobuf C arenas, see the RSS growth )
+    message_peak = 0
+    update_round(devices, num_metrics, num_rounds + 1)
+    tracemalloc.start()
+    for device in devices:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        device.serialize_payload_data()
+        message_peak = max(message_peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    count = num_devices * num_rounds
+    print("%-20s %10.1f msg/s  %8.3f ms/msg  %6d bytes/msg" % (name, count / elapsed, 1000.0 * elapsed / count,
+                                                                size // count))
+    print("%-20s traced peak per message %6.1f KiB  gc %5d  max RSS +%d KiB" % (
+        "", message_peak / 1024, collections, rss))
+    return count / elapsed
+
+
+def main():
+    num_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    num_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    num_metrics = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    print("%d devices publishing %d rounds of %d metrics" % (num_devices, num_rounds, num_metrics))
+    before = run("Protobuf message", ProtobufCodec(wire_encoder=False), num_devices, num_rounds, num_metrics)
+    after = run("PayloadWriter", ProtobufCodec(), num_devices, num_rounds, num_metrics)
+    print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark - Report by exception and deadbands
+
+Emulates a fast sensor loop: every cycle all the metrics are set ( MetricGroup.set_value ) and the DATA payload
+serialized ( SpbEntity.serialize_payload_data ). Most of the samples repeat the last value or are small noise
+around it. Measures the loop rate and the published metrics, with every update reported and with report by
+exception and an absolute deadband.
+
+Usage:
+    python benchmarks/bench_report_by_exception.py [num_cycles] [num_metrics]
+"""
+import random
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity
+
+
+def build_samples(num_cycles, num_metrics):
+    """ Sensor samples, per cycle, half of the metrics are constant, the other half noise with some steps """
+    rnd = random.Random(1)
+    samples = []
+    for c in range(num_cycles):
+        cycle = []
+        for i in range(num_metrics):
+            if i % 2 == 0:
+                cycle.append(float(i))
+            else:
+                cycle.append(i + (c // 100) + rnd.uniform(-0.05, 0.05))
+        samples.append(cycle)
+    return samples
+
+
+def run(name, samples, num_metrics, **settings):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+    names = ["Metric%d" % i for i in range(num_metrics)]
+    for metric_name in names:
+        entity.data.set_value(metric_name, 0.0, **settings)
+
+    published = 0
+    t0 = time.perf_counter()
+    for cycle in samples:
+        for metric_name, value in zip(names, cycle):
+            entity.data.set_value(metric_name, value)
+        if entity.data.is_updated():
+            published += len(entity.serialize_payload_data())
+    elapsed = time.perf_counter() - t0
+
+    count = len(samples)
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, count / elapsed, 1000.0 * elapsed / count))
+    print("%-28s published %8.1f KiB  suppressed %d" % ("", published / 1024, entity.data.suppressed_count))
+    return count / elapsed
+
+
+def main():
+    num_cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    samples = build_samples(num_cycles, num_metrics)
+    print("%d cycles of %d metrics" % (num_cycles, num_metrics))
+    before = run("All updates", samples, num_metrics)
+    after = run("Deadband 0.1", samples, num_metrics, deadband=0.1)
+    print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
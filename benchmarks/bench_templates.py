@@ -0,0 +1,73 @@
+"""
+Benchmark - Template ( UDT ) instances against flat metrics
+
+Models a plant of identical pumps, sent as flat metrics ( "pumpN/member" ) or as instances of a "Pump" template
+definition sent once in the NBIRTH. Measures the BIRTH and DATA payload sizes, and the DATA decoding time with
+SpbEntity.deserialize_payload_data().
+
+Usage:
+    python benchmarks/bench_templates.py [num_pumps] [iterations]
+"""
+import sys
+import time
+
+import corpus  # noqa: F401 - sys.path setup
+
+from mqtt_spb_wrapper import SpbEntity, SpbTemplate, MetricDataType
+
+PUMP = SpbTemplate("Pump", {
+    "rpm": (MetricDataType.Int32, 0),
+    "flow": (MetricDataType.Double, 0.0),
+    "pressure": (MetricDataType.Double, 0.0),
+    "running": (MetricDataType.Boolean, False),
+    "mode": (MetricDataType.String, "auto"),
+})
+
+
+def build_entity(num_pumps, templates):
+    entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="Plant1")
+    for i in range(num_pumps):
+        values = {"rpm": 1000 + i, "flow": 1.5 * i, "pressure": 2.5, "running": True, "mode": "auto"}
+        if templates:
+            entity.data.set_value("pump%d" % i, PUMP.instance(values))
+        else:
+            for member, value in values.items():
+                entity.data.set_value("pump%d/%s" % (i, member), value,
+                                      spb_data_type=PUMP.members[member])
+    if templates:
+        entity.templates["Pump"] = PUMP
+    return entity
+
+
+def run(name, func, payloads):
+    t0 = time.perf_counter()
+    for payload in payloads:
+        func(payload)
+    elapsed = time.perf_counter() - t0
+    rate = len(payloads) / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / len(payloads)))
+    return rate
+
+
+def main():
+    num_pumps = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("Plant of %d pumps" % num_pumps)
+
+    rates = []
+    for name, templates in (("Flat metrics", False), ("Template instances", True)):
+        entity = build_entity(num_pumps, templates)
+        birth = entity.serialize_payload_birth()
+        data = entity.serialize_payload_data(send_all=True)
+        print("%-28s BIRTH %9d bytes  DATA %9d bytes" % (name, len(birth), len(data)))
+
+        receiver = SpbEntity(spb_domain_name="Group1", spb_eon_name="Plant1")
+        receiver.deserialize_payload_birth(birth)
+        rates.append(run(name + " decode", receiver.deserialize_payload_data, [data] * iterations))
+
+    print("Speed-up: x%.2f" % (rates[1] / rates[0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark - DATA payloads wire encoder
+
+Measures the encoding of scalar DATA payloads with the protobuf message objects and with the wire format
+writer ( ProtobufCodec wire_encoder option ), at the codec level and with SpbEntity.serialize_payload_data().
+The payloads of both encoders are checked to be the same before measuring.
+
+Usage:
+    python benchmarks/bench_wire_encoder.py [num_payloads] [num_metrics]
+"""
+import sys
+import time
+
+from bench_metric_encode import SCALAR_VALUES, build_entity
+
+from mqtt_spb_wrapper.spb_codec import ProtobufCodec
+from mqtt_spb_wrapper.spb_protobuf import Payload, MetricDataType
+
+# Typical telemetry values, the multi-byte varints ( negative integers, DateTime ) are the slowest to write
+TELEMETRY_VALUES = [
+    (MetricDataType.Double, 21.5),
+    (MetricDataType.Float, 0.75),
+    (MetricDataType.Boolean, True),
+    (MetricDataType.UInt16, 1200),
+    (MetricDataType.String, "running"),
+]
+
+
+def encode_payload(codec, metrics, timestamp):
+    payload = codec.new_payload("DDATA")
+    for name, datatype, value in metrics:
+        codec.add_metric(payload, name, None, datatype, value, timestamp)
+    return codec.encode(payload)
+
+
+def run(name, func, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - t0
+    rate = count / elapsed
+    print("%-28s %10.1f msg/s  %8.3f ms/msg" % (name, rate, 1000.0 * elapsed / count))
+    return rate
+
+
+def main():
+    num_payloads = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    protobuf, wire = ProtobufCodec(wire_encoder=False), ProtobufCodec(wire_encoder=True)
+
+    for corpus_name, values in (("scalar", SCALAR_VALUES), ("telemetry", TELEMETRY_VALUES)):
+        metrics = [("Metric%d" % i,) + values[i % len(values)] for i in range(num_metrics)]
+
+        # Same payloads, except the header
+        expected, data = [Payload.FromString(encode_payload(codec, metrics, 1729453899000))
+                          for codec in (protobuf, wire)]
+        expected.seq, expected.timestamp = data.seq, data.timestamp
+        assert expected.SerializeToString() == data.SerializeToString()
+
+        print("Encoding %d DATA payloads of %d %s metrics" % (num_payloads, num_metrics, corpus_name))
+        before = run("Protobuf objects", lambda: encode_payload(protobuf, metrics, 1729453899000), num_payloads)
+        after = run("Wire encoder", lambda: encode_payload(wire, metrics, 1729453899000), num_payloads)
+        print("Speed-up: x%.2f" % (after / before))
+
+    entity = build_entity(num_metrics)
+    entity.codec = protobuf
+    before = run("Entity, protobuf objects", lambda: entity.serialize_payload_data(send_all=True), num_payloads)
+    entity.codec = wire
+    after = run("Entity, wire encoder", lambda: entity.serialize_payload_data(send_all=True), num_payloads)
+    print("Speed-up: x%.2f" % (after / before))
+
+
+if __name__ == "__main__":
+    main()
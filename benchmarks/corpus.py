@@ -0,0 +1,65 @@
+"""
+Payload corpus shared by the benchmark scripts.
+
+The payloads are generated with the wrapper helpers, so they look like the ones published by the
+wrapper entities ( mix of numeric, boolean, string, datetime, bytes and dataset metrics ).
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from mqtt_spb_wrapper.spb_protobuf import Payload, addMetric, MetricDataType  # noqa: E402
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import addMetricDataset_from_dict  # noqa: E402
+
+
+def build_payload(num_metrics: int = 300, with_dataset: bool = True) -> bytes:
+    """
+    Build a DDATA like payload with a mix of metric types
+
+    Args:
+        num_metrics: Number of metrics in the payload
+        with_dataset: Add a small DataSet metric at the end of the payload
+
+    Returns: serialized payload bytes
+    """
+    payload = Payload()
+    payload.timestamp = int(time.time() * 1000)
+    payload.seq = 0
+    ts = int(time.time() * 1000)
+
+    for i in range(num_metrics):
+        kind = i % 8
+        name = "Line%d/Machine%d/Metric%d" % (i % 3, i % 7, i)
+        if kind == 0:
+            addMetric(payload, name, None, MetricDataType.Double, i * 1.5, ts)
+        elif kind == 1:
+            addMetric(payload, name, None, MetricDataType.Float, i * 0.1, ts)
+        elif kind == 2:
+            addMetric(payload, name, None, MetricDataType.Int64, i * 1000, ts)
+        elif kind == 3:
+            addMetric(payload, name, None, MetricDataType.UInt16, i % 65535, ts)
+        elif kind == 4:
+            addMetric(payload, name, None, MetricDataType.Boolean, bool(i % 2), ts)
+        elif kind == 5:
+            addMetric(payload, name, None, MetricDataType.String, "value %d" % i, ts)
+        elif kind == 6:
+            addMetric(payload, name, None, MetricDataType.DateTime, int(datetime.now().timestamp() * 1000), ts)
+        else:
+            addMetric(payload, name, None, MetricDataType.UUID, str(uuid.uuid4()), ts)
+
+    if with_dataset:
+        addMetricDataset_from_dict(payload, "dataset", None, {
+            "timestamps": [ts + i for i in range(20)],
+            "values": [float(i) for i in range(20)],
+        })
+
+    return payload.SerializeToString()
+
+
+def build_corpus(count: int = 200, num_metrics: int = 300) -> list:
+    """ List of payloads bytes, with some variability on the number of metrics """
+    return [build_payload(num_metrics=num_metrics - (i % 10)) for i in range(count)]
@@ -1,5 +1,8 @@
 
-from .spb_base import SpbTopic, SpbPayloadParser, SpbEntity, MetricDataType
+from .spb_base import SpbTopic, SpbPayloadParser, SpbEntity, MetricDataType, MetricFilter, PayloadCache, \
+    MetricHistory
+from .spb_base import SpbTemplate, TemplateInstance
+from .spb_codec import PayloadCodec, register_codec, set_default_codec, get_codec
 from .mqtt_spb_entity import MqttSpbEntity
 from .mqtt_spb_entity_device import MqttSpbEntityDevice
 from .mqtt_spb_entity_edgenode import MqttSpbEntityEdgeNode
@@ -11,6 +14,15 @@ __all__ = [
     "SpbTopic",
     "SpbPayloadParser",
     "SpbEntity",
+    "MetricFilter",
+    "PayloadCache",
+    "MetricHistory",
+    "PayloadCodec",
+    "register_codec",
+    "set_default_codec",
+    "get_codec",
+    "SpbTemplate",
+    "TemplateInstance",
     "MqttSpbEntity",
     "MqttSpbEntityDevice",
     "MqttSpbEntityEdgeNode",
@@ -124,7 +124,19 @@ class MqttSpbEntity(SpbEntity):
         if self.on_disconnect is not None:
             self.on_disconnect(rc)
 
-    def _mqtt_on_message(self, client, userdata, msg):
+    def _mqtt_on_message(self, client, userdata, msg, topic: SpbTopic = None, payload=None, decoded=False):
+        """
+            Process a received MQTT message
+
+        Args:
+            client:     MQTT client
+            userdata:   MQTT userdata
+            msg:        MQTT message
+            topic:      Parsed message topic. If None, it is parsed from the message.
+            payload:    Decoded message payload ( SpbPayloadParser.payload ), with its 'timestamp_rx' key, or None if
+                        it could not be decoded. Only used if decoded is True.
+            decoded:    True if the message was already decoded by a subclass ( payload ), so it is decoded only once.
+        """
 
         # Check if loopback message
         if self._loopback_topic == msg.topic:
@@ -134,7 +146,8 @@ class MqttSpbEntity(SpbEntity):
 
         # self._logger.info("%s - Message received  %s" % (self._entity_domain, msg.topic))
         # Parse the topic namespace ------------------------------------------------
-        topic = SpbTopic(msg.topic)  # Parse and get the topic object
+        if topic is None:
+            topic = SpbTopic(msg.topic)  # Parse and get the topic object
 
         # Check that the namespace and group are correct
         # NOTE: Should not be because we are subscribed to a specific topic, but good to check.
@@ -151,10 +164,17 @@ class MqttSpbEntity(SpbEntity):
             return
 
         # Parse the received ProtoBUF data ------------------------------------------------
-        payload = SpbPayloadParser().parse_payload(msg.payload)
+        if not decoded:
+            payload = SpbPayloadParser(codec=self.codec).parse_payload(msg.payload)
+
+            # Add the timestamp when the message was received
+            if payload is not None:
+                payload['timestamp_rx'] = msg_ts_rx
 
-        # Add the timestamp when the message was received
-        payload['timestamp_rx'] = msg_ts_rx
+        if payload is None:
+            self._logger.warning("%s - Could not decode the MQTT payload of %s, message ignored"
+                                 % (self._entity_domain, msg.topic))
+            return
 
         # Execute the callback function if it is not None
         if self.on_message is not None:
@@ -119,7 +119,12 @@ class MqttSpbEntityApp(MqttSpbEntity):
                  callback_birth=None, callback_data=None, callback_death=None,  # callbacks for different spb messages
                  callback_new_eon=None, callback_new_eond=None,
                  retain_birth=False,
-                 debug_enabled=False):
+                 debug_enabled=False,
+                 lazy_payload=False,
+                 metric_filter=None,
+                 zero_copy=False,
+                 birth_cache=None,
+                 history=None):
         """
 
         Initiate the spb application entity
@@ -128,6 +133,17 @@ class MqttSpbEntityApp(MqttSpbEntity):
             spb_domain_name:  Sparkplug B domain name
             spb_app_name:     Application entity ID ( will be part of the MQTT topic )
             debug_enabled:       Enable / Disable debug information.
+            lazy_payload:        If True, the payloads are decoded into LazyPayload objects ( metrics converted on
+                                 access ) instead of dictionaries.
+            metric_filter:       MetricFilter, if set only the matching metrics of the received payloads are decoded
+                                 and stored. It is the default filter of the discovered entities, which can be
+                                 changed per entity ( entity.metric_filter ).
+            zero_copy:           If True, Bytes / File metric values are memoryview slices of the received MQTT
+                                 payload instead of bytes copies ( see SpbPayloadParser ).
+            birth_cache:         PayloadCache, if set the received BIRTH payloads are looked up in the cache before
+                                 decoding them ( retained BIRTH messages replayed on reconnection ).
+            history:             MetricHistory, if set the received data metric values are kept in ring buffers per
+                                 metric, shared by the discovered entities ( see SpbEntity.get_history ).
         """
 
         # Initialized the object ( parent class ) with Device_id as None - Configuring it as edge node
@@ -157,6 +173,11 @@ class MqttSpbEntityApp(MqttSpbEntity):
         self._spb_initialized_timeout = 0  # Counter to keep initialization timeout event
 
         self._debug_enabled = debug_enabled
+        self._lazy_payload = lazy_payload
+        self.metric_filter = metric_filter
+        self._zero_copy = zero_copy
+        self.birth_cache = birth_cache
+        self.history = history
 
         self._logger.info("New spb APP object")
 
@@ -244,6 +265,8 @@ class MqttSpbEntityApp(MqttSpbEntity):
 
     def _mqtt_on_message(self, client, userdata, msg):
 
+        msg_ts_rx = int(time.time() * 1000)  # Save the current timestamp
+
         # self._logger.info("%s - Message received  %s" % (self._entity_domain, msg.topic))
 
         # Check if it is initialized
@@ -272,37 +295,57 @@ class MqttSpbEntityApp(MqttSpbEntity):
         else:
             entity = self.entities_eon[eon_name].entities_eond[eond_name]
 
-        # PARSE PAYLOAD - De-serialize payload and update device data
+        # PARSE PAYLOAD - Decode the payload only once, the result is shared by the entity update,
+        # the callbacks and the base class message handler ( it must not be modified by them, the 'timestamp_rx'
+        # key is added before ).
+        # Only the metrics matching the entity filter are decoded.
+        # BIRTH payloads are looked up in the entity cache first, retained BIRTHs are replayed on reconnection.
+        if topic.message_type.endswith("BIRTH") and entity.birth_cache is not None:
+            payload = entity.birth_cache.parse_payload(msg.payload,
+                                                       lazy=self._lazy_payload,
+                                                       metric_filter=entity.metric_filter,
+                                                       zero_copy=self._zero_copy,
+                                                       codec=entity.codec)
+        else:
+            payload = SpbPayloadParser(msg.payload,
+                                       lazy=self._lazy_payload,
+                                       metric_filter=entity.metric_filter,
+                                       zero_copy=self._zero_copy,
+                                       codec=entity.codec).payload
 
-        payload = SpbPayloadParser(msg.payload)
+        # Add the timestamp when the message was received
+        if payload is not None:
+            payload['timestamp_rx'] = msg_ts_rx
 
         # Parse the message from its type
         if topic.message_type.endswith("BIRTH"):
             if self._spb_initialized:
                 entity._is_alive = True  # Update status
-            entity.deserialize_payload_birth(msg.payload)  # Send the payload to the entity to deserialize it.
+            if payload is not None:
+                entity._update_payload_birth(payload)  # Update the entity with the payload data.
             if entity.callback_birth is not None:
-                entity.callback_birth(payload.as_dict())
+                entity.callback_birth(payload)
             if self.callback_birth is not None:
-                self.callback_birth(topic, payload.as_dict())
+                self.callback_birth(topic, payload)
 
         elif topic.message_type.endswith("DATA"):
             if self._spb_initialized:
                 entity._is_alive = True  # Update status
-            entity.deserialize_payload_data(msg.payload)  # Send the payload to the entity to deserialize it.
+            if payload is not None:
+                entity._update_payload_data(payload)  # Update the entity with the payload data.
             if entity.callback_data is not None:
-                entity.callback_data(payload.as_dict())
+                entity.callback_data(payload)
             if self.callback_data is not None:
-                self.callback_data(topic, payload.as_dict())
+                self.callback_data(topic, payload)
 
         elif topic.message_type.endswith("DEATH"):
             if self._spb_initialized:
                 entity._is_alive = False  # Update status
                 # entity.deserialize_payload_death(msg.payload)  # Send the payload to the entity to deserialize it.
             if entity.callback_death is not None:
-                entity.callback_death(payload.as_dict())
+                entity.callback_death(payload)
             if self.callback_death is not None:
-                self.callback_death(topic, payload.as_dict())
+                self.callback_death(topic, payload)
 
         elif topic.message_type.endswith("CMD"):
             pass  # do not parse entity commands
@@ -315,7 +358,7 @@ class MqttSpbEntityApp(MqttSpbEntity):
                                  (self._entity_domain, topic.message_type))
 
         # Send message to Entity
-        super()._mqtt_on_message(client, userdata, msg)
+        super()._mqtt_on_message(client, userdata, msg, topic=topic, payload=payload, decoded=True)
 
 
     def _register_edge_node(self, eon_name) -> EdgeEntity:
@@ -337,6 +380,11 @@ class MqttSpbEntityApp(MqttSpbEntity):
                 debug_enabled=self._debug_enabled
             )
 
+            self.entities_eon[eon_name].metric_filter = self.metric_filter
+            self.entities_eon[eon_name].birth_cache = self.birth_cache
+            self.entities_eon[eon_name].history = self.history
+            self.entities_eon[eon_name].codec = self.codec
+
             # If callback is configured
             if self.callback_new_eon is not None:
                 self.callback_new_eon(eon_name)
@@ -367,6 +415,12 @@ class MqttSpbEntityApp(MqttSpbEntity):
                 debug_enabled=self._debug_enabled
             )
 
+            self.entities_eon[eon_name].entities_eond[eond_name].metric_filter = self.metric_filter
+            self.entities_eon[eon_name].entities_eond[eond_name].birth_cache = self.birth_cache
+            self.entities_eon[eon_name].entities_eond[eond_name].history = self.history
+            self.entities_eon[eon_name].entities_eond[eond_name].codec = self.codec
+            self.entities_eon[eon_name].entities_eond[eond_name].templates = self.entities_eon[eon_name].templates
+
             # If callback is configured
             if self.callback_new_eond is not None:
                 self.callback_new_eond(eon_name, eond_name)
@@ -1,5 +1,5 @@
 from .mqtt_spb_entity import MqttSpbEntity
-from .spb_protobuf import getNodeDeathPayload
+from .spb_codec import get_codec
 from .spb_base import SpbEntity, SpbTopic, SpbPayloadParser
 
 
@@ -53,7 +53,7 @@ class MqttSpbEntityDevice(MqttSpbEntity):
       
     def on_message(self, topic, payload ):
 
-        parsed_payload = SpbPayloadParser().parse_payload(payload)
+        parsed_payload = SpbPayloadParser(codec=self.codec).parse_payload(payload)
 
         if topic in self.listeners:
             for callback in self.listeners[topic]:
@@ -94,7 +94,8 @@ class MqttSpbEntityDevice(MqttSpbEntity):
         # Send payload if there is new data, or we need to send all
         if send_all or self.data.is_updated():
 
-            payload_bytes = self.serialize_payload_data(send_all)  # Get the data payload
+            # Get the data payloads, split if larger than max_payload_bytes
+            payloads = self.serialize_payload_data_chunks(send_all)
             
             topic = "%s/%s/DDATA/%s/%s" % (self._spb_namespace,
                                            self._spb_domain_name,
@@ -102,7 +103,8 @@ class MqttSpbEntityDevice(MqttSpbEntity):
                                            self._spb_eon_device_name)
           
             self._loopback_topic = topic
-            self._mqtt_payload_publish(topic, payload_bytes, qos)
+            for payload_bytes in payloads:
+                self._mqtt_payload_publish(topic, payload_bytes, qos)
 
             self._logger.debug("%s - Published DDATA message %s" % (self._entity_domain, topic))
 
@@ -126,8 +128,8 @@ class MqttSpbEntityDevice(MqttSpbEntity):
 
     def publish_death(self):
     
-        payload = getNodeDeathPayload()
-        payload_bytes = bytearray(payload.SerializeToString())
+        codec = get_codec(self.codec)
+        payload_bytes = codec.encode(codec.new_payload("DDEATH"))
         topic = "%s/%s/DDEATH/%s/%s" % (self._spb_namespace,
                                         self._spb_domain_name,
                                         self._spb_eon_name,
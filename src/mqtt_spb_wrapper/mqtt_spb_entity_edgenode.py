@@ -1,8 +1,9 @@
 import asyncio
+import logging
 from .mqtt_spb_entity import MqttSpbEntity
 
-from .spb_protobuf import getDdataPayload, getValueDataType, getNodeDeathPayload
-from .spb_protobuf import addMetric
+from .spb_protobuf import getValueDataType
+from .spb_codec import get_codec
 from .spb_base import SpbPayloadParser
 
 class MqttSpbEntityEdgeNode(MqttSpbEntity):
@@ -35,6 +36,12 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
         
         self.topics = [self.command_topic]
         self.listeners = {}
+
+        # Devices attached to the edge node ( attach_device ), each one with its own range of alias_range metric
+        # aliases following the edge node range.
+        self.alias_range = 1000
+        self._devices = []
+
         if self._mqtt.is_connected():
             self.on_connect(self._mqtt, None, None, 0)
 
@@ -49,8 +56,28 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
                 self.listeners[topic] = []
             self.listeners[topic].append(callback)
             
+    def attach_device(self, device):
+        """
+            Attach a device to the edge node, assigning separate metric alias ranges to the edge node and its devices
+
+            The edge node aliases go from alias_base to alias_base + alias_range - 1, and the ranges of the attached
+            devices follow it, in attach order. The aliases are checked against the ranges on BIRTH.
+
+        :param device: MqttSpbEntityDevice of the edge node
+        """
+        if device._spb_eon_device_name is None or device._spb_domain_name != self._spb_domain_name \
+                or device._spb_eon_name != self._spb_eon_name:
+            raise ValueError("%s - Not a device of the edge node: %s" % (self._entity_domain, device._entity_domain))
+        if device not in self._devices:
+            self._devices.append(device)
+
+        self.alias_count = self.alias_range
+        for i, item in enumerate(self._devices):
+            item.alias_base = self.alias_base + (i + 1) * self.alias_range
+            item.alias_count = self.alias_range
+
     def on_message(self, topic, payload):
-        parsed_payload = SpbPayloadParser().parse_payload(payload)
+        parsed_payload = SpbPayloadParser(codec=self.codec).parse_payload(payload)
         if topic in self.listeners:
             for callback in self.listeners[topic]:
                 callback(topic, parsed_payload)
@@ -78,7 +105,8 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
 
         # Publish BIRTH message
         payload_bytes = self.serialize_payload_birth()
-        self._logger.info(SpbPayloadParser().parse_payload(payload_bytes))
+        if self._logger.isEnabledFor(logging.INFO):     # Decoded only to be logged
+            self._logger.info(SpbPayloadParser(codec=self.codec).parse_payload(payload_bytes))
         topic = "%s/%s/NBIRTH/%s" % (self._spb_namespace,
                                         self._spb_domain_name,
                                         self._spb_eon_name)
@@ -106,11 +134,12 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
             return False
 
         # Get a new payload object, to add metrics
-        payload = getDdataPayload()
+        codec = get_codec(self.codec)
+        payload = codec.new_payload("DCMD")
 
         # Add the list of commands to the payload metrics
         for k in commands:
-            addMetric(payload, k, None, getValueDataType(commands[k]), commands[k])
+            codec.add_metric(payload, k, None, getValueDataType(commands[k]), commands[k])
 
         # Send payload if there is new data
         topic = "%s/%s/DCMD/%s/%s" % (self._spb_namespace,
@@ -119,8 +148,8 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
                                       spb_eon_device_name)
 
 
-        if payload.metrics:
-            payload_bytes = bytearray(payload.SerializeToString())
+        if codec.metrics_count(payload):
+            payload_bytes = codec.encode(payload)
             self._loopback_topic = topic
             self._mqtt_payload_publish(topic, payload_bytes)
             
@@ -153,7 +182,8 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
             return False
         # Send payload if there is new data, or we need to send all
         if send_all or self.data.is_updated():
-            payload_bytes = self.serialize_payload_data(send_all)  # Get the data payload
+            # Get the data payloads, split if larger than max_payload_bytes
+            payloads = self.serialize_payload_data_chunks(send_all)
 
 
             topic = "%s/%s/NDATA/%s" % (self._spb_namespace,
@@ -161,7 +191,8 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
                                         self._spb_eon_name)
 
             self._loopback_topic = topic
-            self._mqtt_payload_publish(topic, payload_bytes, qos)
+            for payload_bytes in payloads:
+                self._mqtt_payload_publish(topic, payload_bytes, qos)
 
             self._logger.debug("%s - Published DATA message %s" % (self._entity_domain, topic))
             return True
@@ -179,8 +210,8 @@ class MqttSpbEntityEdgeNode(MqttSpbEntity):
             # Send the DEATH message -
             # If you do a graceful disconnect, the last will is not published automatically by the MQTT Broker.
             if not skip_death_publish:
-                payload = getNodeDeathPayload()
-                payload_bytes = bytearray(payload.SerializeToString())
+                codec = get_codec(self.codec)
+                payload_bytes = codec.encode(codec.new_payload("NDEATH"))
                 topic = "%s/%s/NDEATH/%s" % (self._spb_namespace,
                                              self._spb_domain_name,
                                              self._spb_eon_name)
@@ -1,9 +1,8 @@
 import time
 from typing import Dict, Any
 
-from .spb_protobuf import getDdataPayload
-from .spb_protobuf import addMetric
 from .spb_protobuf import getValueDataType
+from .spb_codec import get_codec
 
 from .spb_base import SpbTopic, SpbPayloadParser
 from .mqtt_spb_entity import SpbEntity
@@ -163,7 +162,12 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
                  callback_birth=None, callback_data=None, callback_death=None,  # callbacks for different messages
                  callback_new_eon=None, callback_new_eond=None,
                  retain_birth=False,
-                 debug_enabled=False):
+                 debug_enabled=False,
+                 lazy_payload=False,
+                 metric_filter=None,
+                 zero_copy=False,
+                 birth_cache=None,
+                 history=None):
         """
 
         Initiate the SCADA application class
@@ -172,6 +176,17 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
             spb_domain_name:    Sparkplug B domain name
             spb_scada_name:     Scada Application ID ( will be part of the MQTT topic )
             debug_info:         Enable / Disable debug information.
+            lazy_payload:       If True, the payloads are decoded into LazyPayload objects ( metrics converted on
+                                access ) instead of dictionaries.
+            metric_filter:      MetricFilter, if set only the matching metrics of the received payloads are decoded
+                                and stored. It is the default filter of the discovered entities, which can be
+                                changed per entity ( entity.metric_filter ).
+            zero_copy:          If True, Bytes / File metric values are memoryview slices of the received MQTT
+                                payload instead of bytes copies ( see SpbPayloadParser ).
+            birth_cache:        PayloadCache, if set the received BIRTH payloads are looked up in the cache before
+                                decoding them ( retained BIRTH messages replayed on reconnection ).
+            history:            MetricHistory, if set the received data metric values are kept in ring buffers per
+                                metric, shared by the discovered entities ( see SpbEntity.get_history ).
         """
 
         # Initialized base class
@@ -202,6 +217,12 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
         self._spb_initialized = False  # Flag to mark the initialization of spb persistent messages(BIRTH, DEATH)
         self._spb_initialized_timeout = 0  # Counter to keep initialization timeout event
 
+        self._lazy_payload = lazy_payload
+        self.metric_filter = metric_filter
+        self._zero_copy = zero_copy
+        self.birth_cache = birth_cache
+        self.history = history
+
         self._logger.info("New SCADA Application object")
 
     def send_command(self, cmd_name: str, cmd_value, eon_name: str, eond_name: str = None) -> bool:
@@ -246,11 +267,12 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
             return False
 
         # PAYLOAD
-        payload = getDdataPayload()
+        codec = get_codec(self.codec)
+        payload = codec.new_payload("NCMD" if eond_name is None else "DCMD")
 
         # Add the list of commands to the payload metrics
         for k in commands:
-            addMetric(payload, k, None, getValueDataType(commands[k]), commands[k])
+            codec.add_metric(payload, k, None, getValueDataType(commands[k]), commands[k])
 
         # Send payload if there is new data
         if eond_name is not None:
@@ -263,8 +285,8 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
                                        self._spb_domain_name,
                                        eon_name)
 
-        if payload.metrics:
-            payload_bytes = bytearray(payload.SerializeToString())
+        if codec.metrics_count(payload):
+            payload_bytes = codec.encode(payload)
             self._mqtt_payload_publish(topic, payload_bytes)
             self._logger.debug("%s - Published COMMAND message to %s" % (self._entity_domain, topic))
             return True
@@ -294,6 +316,11 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
                 debug_enabled=self._debug_enabled
             )
 
+            self.entities_eon[eon_name].metric_filter = self.metric_filter
+            self.entities_eon[eon_name].birth_cache = self.birth_cache
+            self.entities_eon[eon_name].history = self.history
+            self.entities_eon[eon_name].codec = self.codec
+
             # If callback is configured
             if self.callback_new_eon is not None:
                 self.callback_new_eon(eon_name)
@@ -325,6 +352,12 @@ class MqttSpbEntityScada(MqttSpbEntityApp):
                 debug_enabled=self._debug_enabled
             )
 
+            self.entities_eon[eon_name].entities_eond[eond_name].metric_filter = self.metric_filter
+            self.entities_eon[eon_name].entities_eond[eond_name].birth_cache = self.birth_cache
+            self.entities_eon[eon_name].entities_eond[eond_name].history = self.history
+            self.entities_eon[eon_name].entities_eond[eond_name].codec = self.codec
+            self.entities_eon[eon_name].entities_eond[eond_name].templates = self.entities_eon[eon_name].templates
+
             # If callback is configured
             if self.callback_new_eond is not None:
                 self.callback_new_eond(eon_name, eond_name)
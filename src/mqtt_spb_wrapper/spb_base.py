@@ -1,15 +1,22 @@
+import base64
+import hashlib
 import logging
+import os
 import time
-from io import TextIOWrapper, BufferedReader
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from io import IOBase
 from typing import Callable, Any
 from datetime import datetime
 import uuid
-import base64
+from array import array
 
-from google.protobuf.json_format import MessageToDict
-from .spb_protobuf import getDdataPayload, getNodeBirthPayload, getDeviceBirthPayload, Payload, getValueDataType
-from .spb_protobuf import addMetric, MetricDataType, addNullMetric
-from .spb_protobuf.sparkplug_b import addMetricDataset_from_dict
+from .spb_protobuf import Payload, getValueDataType
+from .spb_protobuf import LazyPayload, getDatasetColumnList
+from .spb_protobuf import MetricDataType
+from .spb_codec import PayloadCodec, get_codec
+from .spb_protobuf.sparkplug_b_wire import encodeTimestampDeltas, decodeTimestampDeltas
 
 
 class MetricValue:
@@ -23,11 +30,22 @@ class MetricValue:
         value: Metric values
         timestamp: Metric timestamp in milliseconds
         callback_on_change: callback reference for on value change events.
+        report_by_exception: Only update the value if it has changed, see is_reportable()
+        deadband: Absolute deadband, numeric value changes lower or equal to it are not reported
+        deadband_percent: Percent deadband, relative to the current value
 
     Returns:
         object: Initialized class object.
     """
 
+    # No instance dictionary, mirrors hold millions of metric values. Single values and timestamps are stored as
+    # they are, lists are only kept for list values ( or values set as lists ).
+    __slots__ = (
+        "name", "_is_updated", "_updates", "spb_alias_num", "_callback", "deadband", "deadband_percent",
+        "report_by_exception", "suppressed_count", "_birth_fragment", "_value", "_timestamp", "_is_list_values",
+        "_spb_data_type", "_encoded_value",
+    )
+
     def __init__(
             self,
             name: str,
@@ -36,12 +54,27 @@ class MetricValue:
             callback_on_change: Callable[[Any], None] = None,
             spb_data_type: MetricDataType = None,
             spb_alias_num: int = None,
+            report_by_exception: bool = None,
+            deadband: float = None,
+            deadband_percent: float = None,
     ):
         self.name = name
-        self.is_updated = True
+        self._is_updated = True
+        self._updates = None    # Updated metrics of the metric group ( name -> MetricValue ), see MetricGroup
         self.spb_alias_num = spb_alias_num
         self._callback = callback_on_change
 
+        # Report by exception, a deadband enables it
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        if report_by_exception is None:
+            report_by_exception = deadband is not None or deadband_percent is not None
+        self.report_by_exception = report_by_exception
+        self.suppressed_count = 0   # Value updates not reported
+
+        # Encoded BIRTH metric ( codec, name, alias, fragment bytes ), cleared when the metric changes
+        self._birth_fragment = None
+
         # If data provided as list of values ( values + timestamps )
         if isinstance(value, list) and isinstance(timestamp, list) and len(value) == len(timestamp):
             self._value = value
@@ -52,18 +85,17 @@ class MetricValue:
 
         # Data is single point
         else:
-            if isinstance(value, list):
-                self._value = value
-            else:
-                self._value = [value]
+            self._value = value
 
             if isinstance(timestamp, list):
                 self._timestamp = timestamp
             else:
                 if timestamp is None:
-                    self._timestamp = [int(time.time() * 1000)]
+                    self._timestamp = int(time.time() * 1000)
                 else:
-                    self._timestamp = [int(timestamp)]
+                    self._timestamp = int(timestamp)
+
+        self._update_list_values()
 
         # Data type detection
         if spb_data_type is not None:
@@ -75,10 +107,18 @@ class MetricValue:
             if self._spb_data_type is MetricDataType.Unknown:
                 raise ValueError(f"Unsupported value type for metric '{name}': {type(value)}")
 
+        self._update_encoded_value()
+
     def is_list_values(self):
-        """ Returns True if there is only one value and timestamp """
-        result = (len(self._value) == 1) or (len(self._timestamp) != len(self._value))
-        return not result
+        """ Returns True if there is a list of values and timestamps, False if there is only one value and timestamp """
+        return self._is_list_values
+
+    def _update_list_values(self):
+        """ Update the list values flag, lists of more than one value with as many timestamps """
+        value = self._value
+        timestamp = self._timestamp
+        self._is_list_values = isinstance(value, list) and isinstance(timestamp, list) \
+            and len(value) == len(timestamp) and len(value) != 1
 
     def as_dict(self) -> dict:
         """
@@ -104,6 +144,68 @@ class MetricValue:
         self.value = value
         self.timestamp = timestamp
 
+    @property
+    def is_updated(self) -> bool:
+        """
+        True if the value has been set since it was last read or sent
+
+        The updated metrics of a metric group are tracked by the group, see MetricGroup.get_updated_values()
+        """
+        return self._is_updated
+
+    @is_updated.setter
+    def is_updated(self, is_updated: bool):
+        self._is_updated = is_updated
+        if self._updates is not None:
+            if is_updated:
+                self._updates[self.name] = self
+            else:
+                self._updates.pop(self.name, None)
+
+    def is_reportable(self, value) -> bool:
+        """
+        Check if a new value is to be reported, according to the report by exception settings.
+
+        Values equal to the current one are not reported. Numeric changes within the absolute deadband, or within
+        the percent deadband of the current value, are not reported either. Without report by exception, all the
+        values are reported.
+
+        Args:
+            value: New metric value
+
+        Returns: True if the value is to be reported
+        """
+        if not self.report_by_exception:
+            return True
+
+        current = self._value
+        if isinstance(value, list):
+            return value != (current if isinstance(current, list) else [current])
+        if isinstance(current, list):
+            if len(current) != 1:
+                return True
+            current = current[0]
+        if value.__class__ is not current.__class__:
+            # Numeric values, int and float, are compared through the deadbands
+            if value.__class__ not in (int, float) or current.__class__ not in (int, float):
+                return True
+        elif value == current:
+            return False
+
+        if (self.deadband is None and self.deadband_percent is None) or value.__class__ not in (int, float):
+            return True
+        try:
+            change = abs(value - current)
+        except OverflowError:
+            return True
+        if change != change:    # NaN
+            return True
+        if self.deadband is not None and not change > self.deadband:
+            return False
+        if self.deadband_percent is not None and not change > abs(current) * self.deadband_percent / 100.0:
+            return False
+        return True
+
     @property
     def value(self):
         """
@@ -112,20 +214,28 @@ class MetricValue:
         Returns:
 
         """
-        self.is_updated = False
+        if self._is_updated:
+            self.is_updated = False
 
-        if not self.is_list_values():
-            return self._value[0]
-        else:
-            return self._value
+        value = self._value
+        if self._is_list_values or not isinstance(value, list):
+            return value
+        return value[0]
 
     @value.setter
     def value(self, value):
 
+        # Converted first, the metric is unchanged if the value can not be converted to its datatype
         if isinstance(value, list):
+            encoded_value = _convert_metric_value(self._spb_data_type, value[0]) if len(value) == 1 else None
             self._value = value
+            self._update_list_values()
         else:
-            self._value = [value]
+            encoded_value = _convert_metric_value(self._spb_data_type, value)
+            self._value = value
+            self._is_list_values = False
+        self._encoded_value = encoded_value
+        self._birth_fragment = None
 
         # If a callback is configured, execute it and pass the value
         if self._callback is not None:
@@ -134,6 +244,32 @@ class MetricValue:
         # Set updated flag
         self.is_updated = True
 
+    @property
+    def encoded_value(self):
+        """
+        Metric value converted to its encoded python type ( DateTime milliseconds, UUID string, Bytes and File
+        contents as bytes ).
+
+        The value is converted once, when the value or the datatype is set. Unlike value, reading it does not
+        clear is_updated.
+
+        Returns: encoded value, or list of values
+        """
+        value = self._value
+        if self._is_list_values:
+            return value
+        if isinstance(value, list) and len(value) != 1:
+            return _convert_metric_value(self._spb_data_type, value[0])
+        return self._encoded_value
+
+    def _update_encoded_value(self):
+        """ Convert the single value to its encoded python type, see encoded_value """
+        value = self._value
+        if not isinstance(value, list):
+            self._encoded_value = _convert_metric_value(self._spb_data_type, value)
+        else:
+            self._encoded_value = _convert_metric_value(self._spb_data_type, value[0]) if len(value) == 1 else None
+
     @property
     def timestamp(self):
         """
@@ -142,10 +278,10 @@ class MetricValue:
         Returns:
 
         """
-        if self.is_list_values():
-            return self._timestamp
-        else:
-            return self._timestamp[0]
+        timestamp = self._timestamp
+        if self._is_list_values or not isinstance(timestamp, list):
+            return timestamp
+        return timestamp[0]
 
     @timestamp.setter
     def timestamp(self, timestamp):
@@ -155,8 +291,11 @@ class MetricValue:
         else:
             if isinstance(timestamp, list):
                 self._timestamp = timestamp
+                self._update_list_values()
             else:
-                self._timestamp = [int(timestamp)]
+                self._timestamp = int(timestamp)
+                self._is_list_values = False
+            self._birth_fragment = None
 
     def timestamp_update(self):
         """
@@ -212,14 +351,225 @@ class MetricValue:
 
         """
         self._spb_data_type = data_type
+        self._birth_fragment = None
+        self._update_encoded_value()
+
+
+    def __str__(self):
+        return str(self.as_dict())
+
+    def __repr__(self):
+        return str(self.as_dict())
+
+class TemplateInstance(dict):
+    """
+    Template instance, dictionary of member values ( member name -> value ) of a template definition
+
+    Instances are created from their definition ( SpbTemplate.instance ), and set as metric values.
+
+    Args:
+        template_ref: name of the template definition
+        values: member values
+    """
+
+    def __init__(self, template_ref: str, values=None):
+        super().__init__(values or {})
+        self.template_ref = template_ref
+
+    def __repr__(self):
+        return "%s%s" % (self.template_ref, dict.__repr__(self))
 
 
+class SpbTemplate:
+    """
+    Sparkplug B Template ( UDT ) definition
+
+    The template definitions of an edge node are sent once, in its NBIRTH message ( "_types_/<name>" metrics ),
+    and cached by the receiving applications. Template instances are encoded with their member values only,
+    the member data types are taken from the definition.
+
+    Args:
+        name: template name, referenced by the instances
+        members: dictionary of member name -> MetricDataType, or member name -> ( MetricDataType, default value )
+        version: template version ( optional )
+    """
+
+    DEFINITION_PREFIX = "_types_/"  # Name prefix of the definition metrics in the NBIRTH message
+
+    def __init__(self, name: str, members: dict, version: str = None):
+
+        self.name = name
+        self.version = version
+
+        self.members = {}   # member name -> MetricDataType
+        self.defaults = {}  # member name -> default value
+        for member, spec in members.items():
+            if isinstance(spec, tuple):
+                self.members[member], self.defaults[member] = spec
+            else:
+                self.members[member], self.defaults[member] = spec, None
+
     def __str__(self):
         return str(self.as_dict())
 
     def __repr__(self):
         return str(self.as_dict())
 
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "members": dict(self.members),
+        }
+
+    def instance(self, values: dict = None, **kwargs) -> TemplateInstance:
+        """
+        Create an instance of the template, members not provided are set to their default value
+
+        Args:
+            values: dictionary of member values
+            **kwargs: member values
+
+        Returns: TemplateInstance
+        """
+        result = TemplateInstance(self.name, self.defaults)
+        if values:
+            result.update(values)
+        result.update(kwargs)
+
+        unknown = [member for member in result if member not in self.members]
+        if unknown:
+            raise ValueError("Unknown members for template '%s': %s" % (self.name, unknown))
+        return result
+
+    def get_members(self, value: dict) -> list:
+        """
+        Get the members of an instance ( or the definition defaults ), ready to be encoded
+
+        Args:
+            value: instance member values
+
+        Returns: list of ( member name, MetricDataType, value ) tuples
+        """
+        members = []
+        for member, member_value in value.items():
+            datatype = self.members.get(member)
+            if datatype is None:
+                datatype = getValueDataType(member_value)
+            members.append((member, datatype, _get_template_member_value(datatype, member_value)))
+        return members
+
+    def update_instance(self, value: TemplateInstance):
+        """ Convert the received member values of an instance into the definition types ( e.g. DateTime ) """
+        for member, member_value in value.items():
+            if self.members.get(member) == MetricDataType.DateTime and isinstance(member_value, int):
+                value[member] = datetime.fromtimestamp(member_value / 1000)
+
+    @classmethod
+    def from_dict(cls, name: str, template: dict):
+        """
+        Create a template definition from a received definition metric
+
+        Args:
+            name: template name
+            template: decoded template ( 'templateValue' of the payload metric )
+
+        Returns: SpbTemplate
+        """
+        members = {member.get("name"): (member.get("datatype"), member.get("value"))
+                   for member in template.get("metrics", [])}
+        return cls(name, members, template.get("version"))
+
+
+def _get_template_member_value(datatype, value):
+    """ Convert a template member value to the encoding type """
+    if value is None:
+        return None
+    if datatype == MetricDataType.DateTime and isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    elif datatype == MetricDataType.UUID:
+        return str(value)
+    return value
+
+def _get_file_bytes(value) -> bytes:
+    """ File metric value to bytes, from file objects ( read from the start ) or bytes-like values """
+    if isinstance(value, IOBase):
+        if value.seekable():
+            value.seek(0)
+        data = value.read()
+        return data.encode('utf-8') if isinstance(data, str) else bytes(data)
+    return bytes(value)
+
+
+# Metric value conversions to the encoded python type, by metric datatype
+_METRIC_VALUE_CONVERTERS = {
+    MetricDataType.DateTime: lambda value: int(value.timestamp() * 1000) if isinstance(value, datetime) else int(value),
+    MetricDataType.UUID: str,
+    MetricDataType.Bytes: bytes,
+    MetricDataType.File: _get_file_bytes,
+}
+
+
+def _convert_metric_value(datatype, value):
+    """ Convert a metric value to the encoded python type of its datatype """
+    converter = _METRIC_VALUE_CONVERTERS.get(datatype)
+    if converter is None or value is None:
+        return value
+    return converter(value)
+
+# Metric properties of the compact timestamps of list values ( DataSet without timestamps column ): the base
+# timestamp, and the sampling period or the delta of delta varints ( base64 ) of the timestamps
+_TIMESTAMPS_BASE_PROPERTY = "timestamps_base"
+_TIMESTAMPS_PERIOD_PROPERTY = "timestamps_period"
+_TIMESTAMPS_DELTAS_PROPERTY = "timestamps_deltas"
+
+
+def _get_compact_timestamps(timestamps: list):
+    """ Compact timestamps metric properties of list values, None if the timestamps are not all integers """
+    if not all(timestamp.__class__ is int for timestamp in timestamps):
+        return None
+    base = timestamps[0]
+    properties = {_TIMESTAMPS_BASE_PROPERTY: (MetricDataType.DateTime, base)}
+    period = timestamps[1] - base
+    if period > 0 and timestamps == list(range(base, base + period * len(timestamps), period)):
+        properties[_TIMESTAMPS_PERIOD_PROPERTY] = (MetricDataType.UInt64, period)
+    else:
+        deltas = base64.b64encode(encodeTimestampDeltas(timestamps)).decode("ascii")
+        properties[_TIMESTAMPS_DELTAS_PROPERTY] = (MetricDataType.String, deltas)
+    return properties
+
+
+def _get_timestamps_from_properties(properties: dict, count: int):
+    """ Timestamps of list values from the compact timestamps metric properties, None if not set or invalid """
+    values = dict(zip(properties.get("keys", []), properties.get("values", [])))
+    if _TIMESTAMPS_BASE_PROPERTY not in values:
+        return None
+    base = int(values[_TIMESTAMPS_BASE_PROPERTY].get("longValue", 0))
+    if _TIMESTAMPS_PERIOD_PROPERTY in values:
+        period = int(values[_TIMESTAMPS_PERIOD_PROPERTY].get("longValue", 0))
+        return list(range(base, base + period * count, period)) if period > 0 else None
+    if _TIMESTAMPS_DELTAS_PROPERTY in values:
+        try:
+            timestamps = decodeTimestampDeltas(
+                base, base64.b64decode(values[_TIMESTAMPS_DELTAS_PROPERTY].get("stringValue", "")))
+        except ValueError:
+            return None
+        return timestamps if len(timestamps) == count else None
+    return None
+
+
+# Upper bound of the DATA payload header ( timestamp and seq fields ), around the metric fragments
+_DATA_HEADER_MAX_BYTES = 16
+
+# Datatypes of the list values sent as the DataSet values column type. Int64 and Double, the datatypes detected
+# for any python int / float, are inferred from all the values.
+_DATASET_VALUES_TYPES = {
+    MetricDataType.Int8, MetricDataType.Int16, MetricDataType.Int32,
+    MetricDataType.UInt8, MetricDataType.UInt16, MetricDataType.UInt32, MetricDataType.UInt64,
+    MetricDataType.Float, MetricDataType.Boolean, MetricDataType.String, MetricDataType.DateTime,
+    MetricDataType.Text,
+}
+
 class MetricGroup:
     """
     Metric Group class
@@ -227,13 +577,18 @@ class MetricGroup:
     This class is used to group a set of MetricValues, representing multiple metric fields in the group.
 
     This is used to group the metrics into DATA, ATTRIBUTES or COMMANDS.
+
+    The updated metrics are tracked as their values are set, in the order of their updates, so finding them does
+    not scan the group ( see get_updated_values ).
     """
 
     def __init__(self, birth_prefix=""):
 
         self._items = {}
+        self._updates = {}  # Updated metrics ( name -> MetricValue ), maintained by the metric values
         self.seq_number = None
         self.birth_prefix = birth_prefix
+        self.suppressed_count = 0   # Value updates not reported, see set_value() report_by_exception
 
     def __str__(self):
         return str(self.get_dictionary())
@@ -262,6 +617,27 @@ class MetricGroup:
     def get_values(self):
         return self._items.values()
 
+    def get_updated_values(self) -> list:
+        """
+        Get the updated metric values, in the order of their updates
+
+        The metrics are no longer updated once they are read or sent, the returned list is not modified then.
+
+        Returns: list of MetricValue
+        """
+        return list(self._updates.values())
+
+    def clear_updated(self, items: list = None):
+        """
+        Clear the updated flag of metric values, once they are sent
+
+        Args:
+            items: MetricValues to clear ( e.g. the ones of get_updated_values() ), if None all the updated ones
+        """
+        for item in (list(self._updates.values()) if items is None else items):
+            if item._is_updated:
+                item.is_updated = False
+
     def keys(self):
         return self.get_names()
 
@@ -306,10 +682,7 @@ class MetricGroup:
         Returns:
 
         """
-        for item in self._items.values():
-            if item.is_updated:
-                return True
-        return False
+        return len(self._updates) > 0
 
     def clear(self):
         """
@@ -318,7 +691,28 @@ class MetricGroup:
         Returns:
 
         """
+        for item in self._items.values():
+            item._updates = None
         self._items = {}
+        self._updates = {}
+        self.suppressed_count = 0
+
+    def _add_item(self, name, item: MetricValue):
+        """ Add a metric value to the group, the updates of the value are tracked by the group """
+        if name in self._items:
+            self._remove_item(name)
+        self._items[name] = item
+        item._updates = self._updates
+        if item._is_updated:
+            self._updates[item.name] = item
+
+    def _remove_item(self, name) -> MetricValue:
+        """ Remove a metric value from the group """
+        item = self._items.pop(name)
+        if self._updates.get(item.name) is item:
+            del self._updates[item.name]
+        item._updates = None
+        return item
 
     def count(self) -> int:
         """
@@ -347,10 +741,17 @@ class MetricGroup:
                   spb_alias_num=None,
                   spb_data_type=None,
                   skip_callback:bool = False,
+                  report_by_exception: bool = None,
+                  deadband: float = None,
+                  deadband_percent: float = None,
                   ):
         """
         Initialize/set a metric value
 
+        With report by exception, the value is only updated if it is reported ( see MetricValue.is_reportable ),
+        otherwise the metric keeps its last value and timestamp, it is not flagged as updated and the update is
+        counted as suppressed. The report by exception settings are kept by the metric.
+
         Args:
             name: Metric name
             value: Metric value
@@ -358,6 +759,9 @@ class MetricGroup:
             callback_on_change: function reference for on change events.
             spb_data_type: MetricDataType - If None, the type will be automatically assigned.
             skip_callback: If true, the execution of callback will be skipped ( typically used on Birth messages )
+            report_by_exception: If True, only update the value if it has changed. If None, the setting is unchanged.
+            deadband: Absolute deadband, enables report by exception. If None, the setting is unchanged.
+            deadband_percent: Percent deadband, enables report by exception. If None, the setting is unchanged.
 
         Returns: boolean - operation successful
 
@@ -370,7 +774,24 @@ class MetricGroup:
 #            return False
 
         # If exist update the value, otherwise add the element.
-        if name in self._items.keys():
+        item = self._items.get(name)
+        if item is not None:
+            if deadband is not None or deadband_percent is not None:
+                if deadband is not None:
+                    item.deadband = deadband
+                if deadband_percent is not None:
+                    item.deadband_percent = deadband_percent
+                if report_by_exception is None:
+                    report_by_exception = True
+            if report_by_exception is not None:
+                item.report_by_exception = report_by_exception
+
+            # Report by exception, the update is skipped if not reported
+            if item.report_by_exception and not item.is_reportable(value):
+                item.suppressed_count += 1
+                self.suppressed_count += 1
+                return True
+
             self._items[name].timestamp = timestamp
 
             # Setting the MetricValue.value will trigger the callback ( if callback is set ).
@@ -396,9 +817,12 @@ class MetricGroup:
             callback_on_change=callback_on_change,
             spb_data_type=spb_data_type,
             spb_alias_num=spb_alias_num,
+            report_by_exception=report_by_exception,
+            deadband=deadband,
+            deadband_percent=deadband_percent,
         )
-        self._items[name] = new_item
-        
+        self._add_item(name, new_item)
+
         return True
 
     def remove_value(self, name: str) -> bool:
@@ -412,7 +836,7 @@ class MetricGroup:
 
         """
         if name in self._items.keys():
-            self._items.pop(name)
+            self._remove_item(name)
             return True
         else:
             return False
@@ -441,11 +865,11 @@ class MetricGroup:
 
     # Set an item like a dictionary
     def __setitem__(self, name, value: MetricValue):
-        self._items[name] = value
+        self._add_item(name, value)
 
     # Delete an item like a dictionary
     def __delitem__(self, name):
-        del self._items[name]
+        self._remove_item(name)
 
     # Optionally, allow iteration (e.g., for looping through keys)
     def __iter__(self):
@@ -456,6 +880,359 @@ class MetricGroup:
         return len(self._items)
 
 
+class MetricFilter:
+    """
+    Metric name filter
+
+    Used to decode and store only the metrics of interest of the received payloads. The metric names and
+    prefixes are precompiled into sets ( prefixes grouped by length ), and the result for each metric name
+    is cached, so matching a metric name is a constant time operation.
+
+    Note that BIRTH attributes names include the attributes prefix ( e.g. "ATTR/serial_number" ). Metrics without
+    name ( sent with their alias only ) always match, they are filtered by the entities once their alias is resolved
+    to the name received in the BIRTH message.
+
+    Args:
+        names: list of metric names to match
+        prefixes: list of metric name prefixes to match ( e.g. "Line3/Press07/" )
+    """
+
+    _CACHE_SIZE_MAX = 100000    # Maximum number of cached metric names results
+
+    def __init__(self, names=None, prefixes=None):
+
+        self._names = frozenset(names or [])
+
+        # Prefixes grouped by length ( length -> set of prefixes ), checked by slicing the metric name.
+        self._prefixes = {}
+        for prefix in (prefixes or []):
+            self._prefixes.setdefault(len(prefix), set()).add(prefix)
+        self._prefixes = tuple((length, frozenset(values)) for length, values in sorted(self._prefixes.items()))
+
+        self._cache = {"": True}   # Metrics without name
+
+    def __str__(self):
+        return str(self.as_dict())
+
+    def __repr__(self):
+        return str(self.as_dict())
+
+    def as_dict(self) -> dict:
+        return {
+            "names": sorted(self._names),
+            "prefixes": sorted(prefix for _, values in self._prefixes for prefix in values),
+        }
+
+    def __call__(self, name: str) -> bool:
+        return self.match(name)
+
+    def match(self, name: str) -> bool:
+        """
+        Check if a metric name matches the filter
+
+        Args:
+            name: metric name
+
+        Returns: True if the metric name is in the list of names or starts with one of the prefixes
+        """
+        result = self._cache.get(name)
+        if result is None:
+            result = name in self._names
+            if not result:
+                for length, values in self._prefixes:
+                    if name[:length] in values:
+                        result = True
+                        break
+            if len(self._cache) < self._CACHE_SIZE_MAX:
+                self._cache[name] = result
+        return result
+
+
+class PayloadCache:
+    """
+    Bounded LRU cache of decoded payloads, keyed on the payload digest
+
+    Used to skip the decoding of payloads that were already received, typically the retained BIRTH messages
+    replayed on every reconnection ( retain_birth ). The cached payloads are shared, a shallow copy of the
+    payload is returned on every lookup so extra keys ( e.g. 'timestamp_rx' ) can be added to it, but the
+    metrics must not be modified.
+
+    Args:
+        max_entries: maximum number of cached payloads
+        max_bytes: maximum total size of the cached payloads ( serialized size ), None for no limit
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None):
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0   # Counters
+        self.misses = 0
+        self.evictions = 0
+
+        self._cache = OrderedDict()     # key -> ( payload, payload size )
+        self._size = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __str__(self):
+        return str(self.stats())
+
+    def __repr__(self):
+        return str(self.stats())
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._cache),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        """ Remove all the cached payloads, counters are not reset """
+        self._cache.clear()
+        self._size = 0
+
+    def parse_payload(self, payload_data, lazy=False, metric_filter: MetricFilter = None, zero_copy=False,
+                      codec=None):
+        """
+        Get the decoded payload from the cache, or decode it and cache it ( see SpbPayloadParser )
+
+        Args:
+            payload_data: payload bytes
+            lazy: decode the payload into a LazyPayload
+            metric_filter: MetricFilter, if set only the metrics matching the filter are decoded.
+            zero_copy: Bytes / File values as memoryview slices of the payload data
+            codec: payload codec name or PayloadCodec, None for the default codec
+
+        Returns: Dictionary ( LazyPayload if lazy ) or None if fails
+        """
+        size = len(payload_data)
+        key = (hashlib.blake2b(payload_data, digest_size=16).digest(), size, lazy, metric_filter, zero_copy, codec)
+
+        item = self._cache.get(key)
+        if item is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._copy(item[0])
+
+        self.misses += 1
+        payload = SpbPayloadParser(payload_data, lazy=lazy, metric_filter=metric_filter, zero_copy=zero_copy,
+                                   codec=codec).payload
+        if not isinstance(payload, (dict, LazyPayload)):
+            return payload     # Invalid or STATE payload, not cached
+
+        # Payloads bigger than the cache are not cached
+        if self.max_bytes is not None and size > self.max_bytes:
+            return payload
+
+        self._cache[key] = (payload, size)
+        self._size += size
+        while len(self._cache) > self.max_entries or (self.max_bytes is not None and self._size > self.max_bytes):
+            _, (_, evicted_size) = self._cache.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+        return self._copy(payload)
+
+    @staticmethod
+    def _copy(payload):
+        if isinstance(payload, LazyPayload):
+            return payload.copy()
+        return dict(payload)
+
+
+# Array typecodes of the numeric metric history buffers, other data types are kept in lists
+_HISTORY_TYPECODES = {
+    MetricDataType.Int8: "q", MetricDataType.Int16: "q", MetricDataType.Int32: "q", MetricDataType.Int64: "q",
+    MetricDataType.UInt8: "q", MetricDataType.UInt16: "q", MetricDataType.UInt32: "q", MetricDataType.UInt64: "Q",
+    MetricDataType.Float: "d", MetricDataType.Double: "d", MetricDataType.Boolean: "q",
+}
+
+
+class MetricHistoryBuffer:
+    """
+    Fixed capacity ring buffer of the last values and timestamps of a metric
+
+    Numeric values are kept in array.array buffers ( booleans as integers ), other values in lists. Every sample
+    is written twice, at its ring position and at the same position plus the capacity, so the last samples are
+    always contiguous: appending a sample is O(1), and last() returns memoryview slices of the arrays, without
+    copying them. The views show the buffer contents, they change as new samples are appended.
+
+    Args:
+        capacity: maximum number of samples
+        spb_data_type: metric data type ( MetricDataType ), selects the values buffer type
+    """
+
+    __slots__ = ("capacity", "count", "_head", "_timestamps", "_values")
+
+    # Buffer size per sample of capacity: timestamp and value ( or value reference ), written twice
+    SAMPLE_BYTES = 32
+
+    def __init__(self, capacity: int, spb_data_type: MetricDataType = None):
+
+        self.capacity = capacity
+        self.count = 0      # Number of samples, up to the capacity
+        self._head = 0      # Ring position of the next sample
+
+        self._timestamps = array("q", bytes(16 * capacity))
+        typecode = _HISTORY_TYPECODES.get(spb_data_type)
+        if typecode is None:
+            self._values = [None] * (2 * capacity)
+        else:
+            self._values = array(typecode, bytes(16 * capacity))
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value, timestamp: int):
+        """
+        Append a sample, the oldest one is overwritten if the buffer is full
+
+        Args:
+            value: metric value
+            timestamp: timestamp in milliseconds
+        """
+        head = self._head
+        capacity = self.capacity
+        values = self._values
+        try:
+            values[head] = value
+        except (TypeError, OverflowError):
+            # Value not supported by the array type, values kept in a list from now on
+            values = self._values = list(values)
+            values[head] = value
+        values[head + capacity] = value
+        self._timestamps[head] = self._timestamps[head + capacity] = timestamp
+
+        self._head = head + 1 if head + 1 < capacity else 0
+        if self.count < capacity:
+            self.count += 1
+
+    def extend(self, values: list, timestamps: list):
+        """ Append the samples of list values, see append() """
+        for value, timestamp in zip(values, timestamps):
+            self.append(value, timestamp)
+
+    def last(self, n: int = None) -> tuple:
+        """
+        Get the last samples, oldest first
+
+        Args:
+            n: number of samples, None for all the samples
+
+        Returns: ( timestamps, values ) - memoryview slices of the arrays, list of values if not numeric
+        """
+        count = self.count if n is None else max(0, min(n, self.count))
+        end = self._head + self.capacity
+        values = self._values
+        if values.__class__ is list:
+            values = values[end - count:end]
+        else:
+            values = memoryview(values)[end - count:end]
+        return memoryview(self._timestamps)[end - count:end], values
+
+
+class MetricHistory:
+    """
+    Bounded history of the received data metric values, one ring buffer per metric ( MetricHistoryBuffer )
+
+    Shared by the entities of an application ( entity.history ), fed with the data metric values decoded from the
+    received BIRTH and DATA messages, list values included. The buffers are allocated at once, and kept within the
+    global memory budget: the buffers of the least recently updated metrics are evicted. Other values than numbers
+    are counted as references, their size is not part of the budget.
+
+    Args:
+        capacity: number of samples kept per metric
+        max_bytes: memory budget of the buffers, None for no limit
+    """
+
+    def __init__(self, capacity: int = 1024, max_bytes: int = None):
+
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+
+        self.evictions = 0  # Counters
+
+        self._buffers = OrderedDict()   # ( entity, metric name ) -> MetricHistoryBuffer
+        self._size = 0
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def __str__(self):
+        return str(self.stats())
+
+    def __repr__(self):
+        return str(self.stats())
+
+    def stats(self) -> dict:
+        return {
+            "buffers": len(self._buffers),
+            "bytes": self._size,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        """ Remove all the buffers, counters are not reset """
+        self._buffers.clear()
+        self._size = 0
+
+    def get(self, entity: str, name: str) -> MetricHistoryBuffer:
+        """
+        Get the history buffer of a metric
+
+        Args:
+            entity: entity domain ( e.g. "spBv1.Group1.EoN1.Device1" )
+            name: metric name
+
+        Returns: MetricHistoryBuffer, None if there is no history of the metric
+        """
+        return self._buffers.get((entity, name))
+
+    def append(self, entity: str, name: str, value, timestamp: int, spb_data_type: MetricDataType = None):
+        """ Append a metric value to its history, see MetricHistoryBuffer.append() """
+        key = (entity, name)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._new_buffer(key, spb_data_type)
+            if buffer is None:
+                return
+        elif self.max_bytes is not None:
+            self._buffers.move_to_end(key)  # Least recently updated buffers evicted first
+        buffer.append(value, timestamp)
+
+    def extend(self, entity: str, name: str, values: list, timestamps: list, spb_data_type: MetricDataType = None):
+        """ Append the list values of a metric to its history, see MetricHistoryBuffer.extend() """
+        key = (entity, name)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._new_buffer(key, spb_data_type)
+            if buffer is None:
+                return
+        elif self.max_bytes is not None:
+            self._buffers.move_to_end(key)
+        buffer.extend(values, timestamps)
+
+    def _new_buffer(self, key, spb_data_type):
+        # Buffers bigger than the budget are not allocated
+        size = MetricHistoryBuffer.SAMPLE_BYTES * self.capacity
+        if self.max_bytes is not None and size > self.max_bytes:
+            return None
+
+        buffer = self._buffers[key] = MetricHistoryBuffer(self.capacity, spb_data_type)
+        self._size += size
+        while self.max_bytes is not None and self._size > self.max_bytes:
+            self._buffers.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+        return buffer
+
+
 class SpbEntity:
     """
     Sparkplug B Entity Class
@@ -488,6 +1265,50 @@ class SpbEntity:
         self.data = MetricGroup(birth_prefix="DATA")
         self.commands = MetricGroup()
 
+        # Filter of the received metrics to be decoded and stored ( MetricFilter ), if None all metrics are stored.
+        self.metric_filter = None
+
+        # Cache of the decoded BIRTH payloads ( PayloadCache ), if None the BIRTH payloads are always decoded.
+        self.birth_cache = None
+
+        # History of the received data metric values ( MetricHistory ), if None only the last values are kept.
+        self.history = None
+
+        # Payload codec name or PayloadCodec object ( see spb_codec ), if None the default codec is used.
+        self.codec = None
+
+        # Template definitions ( name -> SpbTemplate ). Sent in the NBIRTH of edge nodes, and updated with the
+        # definitions received in BIRTH messages. Devices share the definitions of their edge node.
+        self.templates = {}
+
+        # DATA payloads size budget in bytes ( e.g. broker maximum packet size, minus the topic and MQTT header ).
+        # Larger DATA messages are split into several payloads, see serialize_payload_data_chunks(). None: no limit.
+        self.max_payload_bytes = None
+
+        # Callback of the DATA payloads statistics, called with a dictionary for each payload ( see
+        # serialize_payload_data_chunks ).
+        self.on_payload_stats = None
+
+        # Compression of the BIRTH and DATA payloads ( Sparkplug B compressed payloads ), "DEFLATE" or "GZIP".
+        # Only payloads of compression_threshold bytes or more are compressed. None: payloads not compressed.
+        self.compression = None
+        self.compression_threshold = 1024
+
+        # Metric aliases. If True, aliases are assigned to the data metrics without one on BIRTH ( from alias_base,
+        # the aliases must be unique across an edge node and its devices ), and the DATA metrics are sent with
+        # their alias only. alias_count limits the range of aliases of the entity, None: no limit ( see
+        # MqttSpbEntityEdgeNode.attach_device ).
+        self.use_aliases = False
+        self.alias_base = 0
+        self.alias_count = None
+
+        # Compact timestamps of the list values, sent as metric properties instead of a DataSet timestamps column:
+        # base timestamp and sampling period, or delta of delta varints. Decoded transparently by the entities.
+        self.compact_timestamps = False
+
+        # Data metric names of the aliases received in the last BIRTH message ( alias -> name )
+        self._metric_aliases = {}
+
         # Private members -----------
         self._spb_domain_name = spb_domain_name
         self._spb_eon_name = spb_eon_name
@@ -542,6 +1363,23 @@ class SpbEntity:
 
         return False
 
+    def get_history(self, name: str, n: int = None):
+        """
+        Get the last received values of a data metric, see history
+
+        Args:
+            name: metric name
+            n: number of samples, None for all the samples kept
+
+        Returns: ( timestamps, values ) oldest first, see MetricHistoryBuffer.last(). None if there is no history.
+        """
+        if self.history is None:
+            return None
+        buffer = self.history.get(self._entity_domain, name)
+        if buffer is None:
+            return None
+        return buffer.last(n)
+
     def _update_debug_id(self):
         """
             Update the console debug logger
@@ -596,34 +1434,75 @@ class SpbEntity:
     def entity_domain(self):
         return self._entity_domain
 
-    def _serialize_payload_metric(self, payload, name, metric_value: MetricValue):
+    def _serialize_payload_metric(self, payload, name, metric_value: MetricValue, codec: PayloadCodec = None,
+                                  is_birth: bool = False):
         """
             Add spB Metric to payload based on an MetricValue.
         Args:
-            payload: payload
+            payload: payload object ( codec.new_payload )
             name: metric name
             metric_value: MetricValue
+            codec: PayloadCodec of the payload object, if None the entity codec
+            is_birth: BIRTH payload, template instances include the member datatypes
+
+        The metric updated flag is not cleared, it is cleared by the callers once the payload is encoded ( see
+        MetricGroup.clear_updated ).
 
         Returns: Nothing
 
         """
+        if codec is None:
+            codec = get_codec(self.codec)
 
-        if metric_value.value is None:
-            addNullMetric(
+        # Values already converted to their encoded type
+        value = metric_value.encoded_value
+
+        if value is None:
+            codec.add_null_metric(
                 payload,
                 name=name,
                 alias=metric_value.spb_alias_num,
-                type=metric_value.spb_data_type
+                datatype=metric_value.spb_data_type
             )
             return 
 
         # If multiple values as list send it as spB DataSet
         if metric_value.is_list_values():
-            addMetricDataset_from_dict(
+            values_type = metric_value.spb_data_type
+            timestamps = metric_value.timestamp
+            properties = _get_compact_timestamps(timestamps) if self.compact_timestamps else None
+            codec.add_dataset_metric(
                 payload,
                 name=name,
                 alias=metric_value.spb_alias_num,
-                data={"timestamps": metric_value.timestamp, "values": metric_value.value}
+                data={"values": value} if properties else {"timestamps": timestamps, "values": value},
+                types={"values": values_type} if values_type in _DATASET_VALUES_TYPES else None,
+                properties=properties,
+            )
+            return
+
+        # TEMPLATE - Instance of a template definition
+        if metric_value.spb_data_type == MetricDataType.Template:
+            template_ref = getattr(value, "template_ref", None)
+            if template_ref is None:
+                raise ValueError("Template metric value is not a template instance. TemplateMetric:" + metric_value.name)
+
+            # Instances of a known definition are encoded with the member values only ( except on BIRTH )
+            definition = self.templates.get(template_ref)
+            if definition is None:
+                definition = SpbTemplate(template_ref, {})
+                member_datatypes = True
+            else:
+                member_datatypes = is_birth
+
+            codec.add_template_metric(
+                payload,
+                name=name,
+                alias=metric_value.spb_alias_num,
+                template_ref=template_ref,
+                members=definition.get_members(value),
+                timestamp=metric_value.timestamp,
+                member_datatypes=member_datatypes,
             )
             return
 
@@ -635,67 +1514,40 @@ class SpbEntity:
         # }
         if metric_value.spb_data_type == MetricDataType.DataSet:
 
-            # Check if all values are lists
-            if not all(isinstance(v, list) for v in metric_value.value.values()):
-                raise ValueError("Not all metric values in the dictionary are lists. DatasetMetric:" + name)
+            # Check if all values are lists ( or typed arrays )
+            if not all(isinstance(v, (list, tuple, array)) or getattr(v, "ndim", None) == 1
+                       for v in value.values()):
+                raise ValueError("Not all metric values in the dictionary are lists. DatasetMetric:" + metric_value.name)
             else:
                 # Get the length of the first list
-                first_list_length = len(next(iter(metric_value.value.values())))
+                first_list_length = len(next(iter(value.values())))
 
                 # Check if all lists have the same length
-                all_lists_same_length = all(len(v) == first_list_length for v in metric_value.value.values())
+                all_lists_same_length = all(len(v) == first_list_length for v in value.values())
 
                 if not all_lists_same_length:
-                    raise ValueError("Not all lists are of the same size. DatasetMetric:" + name)
+                    raise ValueError("Not all lists are of the same size. DatasetMetric:" + metric_value.name)
                 else:
-                    addMetricDataset_from_dict(
+                    codec.add_dataset_metric(
                         payload,
                         name=name,
                         alias=metric_value.spb_alias_num,
-                        data=metric_value.value
+                        data=value
                     )
                     return
 
-        # Convert certain metric types to correct value types--------------------------------
-        # DateTime
-        if metric_value.spb_data_type == MetricDataType.DateTime:
-            if isinstance(metric_value.value, datetime):
-                metric_value.value = int(metric_value.value.timestamp()*1000)
-            else:
-                metric_value.value = int(metric_value.value)
-        # UUID
-        elif metric_value.spb_data_type == MetricDataType.UUID:
-            if isinstance(metric_value.value, uuid.UUID):
-                metric_value.value = str(metric_value.value)
-            else:
-                metric_value.value = str(metric_value.value)
-        #BYTES
-        elif metric_value.spb_data_type == MetricDataType.Bytes:
-            metric_value.value = bytes(metric_value.value)
-
-        #FILE
-        elif metric_value.spb_data_type == MetricDataType.File:
-            if isinstance(metric_value.value, TextIOWrapper):
-                metric_value.value.seek(0)
-                metric_value.value = bytes(metric_value.value.read().encode('utf-8'))
-            elif isinstance(metric_value.value, BufferedReader):
-                metric_value.value.seek(0)
-                metric_value.value = bytes(metric_value.value.read())
-            else:
-                metric_value.value = bytes(metric_value.value)
-
         # Add metric
-        
-        addMetric(
+        codec.add_metric(
             payload,
             name=name,
             alias=metric_value.spb_alias_num,
-            type=metric_value.spb_data_type,
-            value=metric_value.value,
+            datatype=metric_value.spb_data_type,
+            value=value,
             timestamp=metric_value.timestamp
         )
 
-    def _deserialize_payload_metric(self, value_group: MetricGroup, metric_value: dict, skip_callback: bool = False):
+    def _deserialize_payload_metric(self, value_group: MetricGroup, metric_value: dict, skip_callback: bool = False,
+                                    name: str = None):
         """
             Parse a metric value from a spB payload and insert it into the Metric Group list of values
 
@@ -703,6 +1555,7 @@ class SpbEntity:
             value_group:  Metric Group to store the new value
             metric_value: spB Metric data as dict, from spB payload
             skip_callback: if True, upon updating the value, if a value callback on change exits, it will not be executed
+            name: Metric name to store the value with. If None, the metric_value name is used.
 
         Returns: Nothing
 
@@ -712,29 +1565,24 @@ class SpbEntity:
         if metric_value.get("value", None) is None:
             return
 
+        # The payload metric dictionary is not modified, it may be shared with other payload consumers.
+        if name is None:
+            name = metric_value['name']
+
         # DATASET - DICT / VALUE LIST - Check if multiple values are being send as DataSet or Metric
         if metric_value.get("datatype") == MetricDataType.DataSet:
 
-            # Get they dataSet values
-            columns_data = {column: [] for column in metric_value['datasetValue']['columns']}
+            # Get they dataSet values, already decoded into typed columns, as lists
+            header = metric_value.get('datasetValue', {})
+            column_types = dict(zip(header.get('columns', []), header.get('types', [])))
+            columns_data = {column: getDatasetColumnList(values, column_types.get(column))
+                            for column, values in metric_value['value'].items()}
 
-            for row in metric_value['datasetValue']['rows']:
-                for idx, element in enumerate(row['elements']):
-                    column_name = metric_value['datasetValue']['columns'][idx]
-                    value = next(iter(element.values())) # get first element value
-                    values_data_type = metric_value['datasetValue']['types'][
-                        metric_value['datasetValue']['columns'].index(column_name)]
-
-                    # If value is numeric type, convert it
-                    if values_data_type == MetricDataType.Double or values_data_type == MetricDataType.Float:
-                        value = float(value)
-                    elif values_data_type >= MetricDataType.Int8 and values_data_type <= MetricDataType.UInt64:
-                        value = int(value)
-                    elif values_data_type == MetricDataType.Boolean:
-                        value = bool(value)
-
-                    # Append the Value to the respective column list
-                    columns_data[column_name].append(value)
+            # LIST VALUES - Compact timestamps, carried in the metric properties
+            if "values" in columns_data and "timestamps" not in columns_data and "properties" in metric_value:
+                timestamps = _get_timestamps_from_properties(metric_value["properties"], len(columns_data["values"]))
+                if timestamps is not None:
+                    columns_data["timestamps"] = timestamps
 
             # LIST VALUES - They should contain the "timestamps" and "values" items, otherwise it is a dictionary
             if "timestamps" in columns_data.keys() and "values" in columns_data.keys():
@@ -744,205 +1592,465 @@ class SpbEntity:
                         metric_value['datasetValue']['columns'].index('values')]
                     # Add the values
                     value_group.set_value(
-                        name=metric_value['name'],
+                        name=name,
                         value=columns_data["values"],
-                        timestamp=[int(k) for k in columns_data['timestamps']],  # Force as integer
+                        timestamp=columns_data['timestamps'],
                         spb_data_type=values_data_type,
                         skip_callback=skip_callback,  # Dont trigger value update callback ( typically on birth data)
                     )
+                    if self.history is not None and value_group is self.data:
+                        self.history.extend(self._entity_domain, name, columns_data["values"],
+                                            columns_data['timestamps'], values_data_type)
 
             # DICT DataSet - The values are a dictionary/dataset
             else:
                 # Add value to the group
                 value_group.set_value(
-                    name=metric_value['name'],
+                    name=name,
                     value=columns_data,
                     timestamp=metric_value['timestamp'],
                     spb_data_type=metric_value['datatype'],
                     skip_callback=skip_callback,  # Dont trigger value update callback ( typically on birth data)
                 )  # update field
 
+        # TEMPLATE - Instance member values, converted with the cached definition
+        elif metric_value.get("datatype") == MetricDataType.Template:
+
+            value = TemplateInstance(metric_value.get('templateValue', {}).get('templateRef'), metric_value['value'])
+            definition = self.templates.get(value.template_ref)
+            if definition is not None:
+                definition.update_instance(value)
+
+            value_group.set_value(
+                name=name,
+                value=value,
+                timestamp=metric_value['timestamp'],
+                spb_data_type=MetricDataType.Template,
+                skip_callback=skip_callback,  # Dont trigger value update callback ( typically on birth data)
+            )
+
         # DEFAULT - Add it and keep the original data type
         else:
 
             # Add value to the group
             value_group.set_value(
-                name=metric_value['name'],
+                name=name,
                 value=metric_value['value'],
                 timestamp=metric_value['timestamp'],
                 spb_data_type=metric_value['datatype'],
                 skip_callback=skip_callback,  # Dont trigger value update callback ( typically on birth data)
             )  # update field
+            if self.history is not None and value_group is self.data:
+                self.history.append(self._entity_domain, name, metric_value['value'],
+                                    int(metric_value['timestamp']), metric_value['datatype'])
 
     def serialize_payload_birth(self):
         """
             Serialize the BIRTH message and get payload bytes
+
+            The encoded metrics are cached, only the metrics changed since the previous BIRTH message are encoded
+            again ( if supported by the codec ). The payload header ( timestamp, seq, bdSeq ) is always new.
+        """
+        codec = get_codec(self.codec)
+        message_type = "NBIRTH" if self._spb_eon_device_name is None else "DBIRTH"
+
+        if self.use_aliases:
+            self._assign_aliases()
+
+        if codec.new_fragment() is None:
+            return self._serialize_payload_birth_full(codec, message_type)
+
+        fragments = []
+
+        # Template definitions - Only on edge nodes, shared by its devices
+        if self._spb_eon_device_name is None and self.templates:
+            payload = codec.new_fragment()
+            self._serialize_payload_templates(payload, codec)
+            fragments.append(codec.encode(payload))
+
+        # Attributes, Data and Commands
+        for item in self.attributes.values():
+            name = self.attributes.birth_prefix + "/" + item.name
+            fragments.append(self._serialize_birth_fragment(name, item, codec))
+        for item in self.data.values():
+            fragments.append(self._serialize_birth_fragment(item.name, item, codec))
+        for item in self.commands.values():
+            fragments.append(self._serialize_birth_fragment(item.name, item, codec))
+
+        payload_bytes = self._compress_payload(codec, codec.join_fragments(message_type, fragments))
+        self._logger.debug("%s - BIRTH payload: %d metrics, %d bytes", self._entity_domain, len(fragments),
+                           len(payload_bytes))
+
+        # All the metrics sent, once the payload is encoded
+        for group in (self.attributes, self.data, self.commands):
+            group.clear_updated()
+        return payload_bytes
+
+    def _compress_payload(self, codec: PayloadCodec, payload_bytes: bytes) -> bytes:
+        """
+            Compress the payload bytes if compression is enabled and the payload is large enough
+
+            The payload is sent uncompressed if the codec does not support compression, or if the compressed
+            payload is not smaller.
+        """
+        if self.compression is not None and len(payload_bytes) >= self.compression_threshold:
+            compressed = codec.compress(payload_bytes, self.compression)
+            if compressed is not None and len(compressed) < len(payload_bytes):
+                return compressed
+        return payload_bytes
+
+    def _assign_aliases(self):
+        """
+            Assign an alias to the data metrics without one, following the highest alias in use
+
+            Raises ValueError if an alias is used by several metrics, or if it is out of the entity alias range.
+        """
+        aliases = [item.spb_alias_num for item in self.data.values() if item.spb_alias_num is not None]
+        if len(set(aliases)) != len(aliases):
+            raise ValueError("%s - Duplicate metric aliases" % self._entity_domain)
+        alias = max(aliases + [self.alias_base - 1]) + 1
+        for item in self.data.values():
+            if item.spb_alias_num is None:
+                item.spb_alias_num = alias
+                alias += 1
+        if self.alias_count is not None:
+            for item in self.data.values():
+                if not self.alias_base <= item.spb_alias_num < self.alias_base + self.alias_count:
+                    raise ValueError("%s - Metric alias %d out of the range %d - %d: %s" % (
+                        self._entity_domain, item.spb_alias_num, self.alias_base,
+                        self.alias_base + self.alias_count - 1, item.name))
+
+    def _data_metric_name(self, item: MetricValue):
+        """
+            Name of a metric in the DATA messages, None if it is sent with its alias only
         """
-        print("Serializing birth message")
-        if self._spb_eon_device_name is None:  # If EoN type
-            payload = getNodeBirthPayload()
-        else:  # Device
-            payload = getDeviceBirthPayload()
+        if self.use_aliases and item.spb_alias_num is not None:
+            return None
+        return item.name
+
+    def _serialize_birth_fragment(self, name, item: MetricValue, codec: PayloadCodec) -> bytes:
+        """
+            Get the encoded BIRTH metric of a MetricValue, from its cache if the metric has not changed
+        """
+        cached = item._birth_fragment
+        if cached is not None and cached[0] is codec and cached[1] == name and cached[2] == item.spb_alias_num:
+            return cached[3]
+
+        payload = codec.new_fragment()
+        self._serialize_payload_metric(payload=payload, name=name, metric_value=item, codec=codec, is_birth=True)
+        fragment = codec.encode(payload)
+
+        # Null metrics are sent with the current timestamp, templates depend on their definition
+        if item.spb_data_type != MetricDataType.Template and item.encoded_value is not None:
+            item._birth_fragment = (codec, name, item.spb_alias_num, fragment)
+        return fragment
+
+    def _serialize_payload_templates(self, payload, codec: PayloadCodec):
+        """ Add the template definitions to a payload """
+        for template in self.templates.values():
+            codec.add_template_metric(
+                payload,
+                name=SpbTemplate.DEFINITION_PREFIX + template.name,
+                alias=None,
+                template_ref=None,
+                members=template.get_members(template.defaults),
+                version=template.version,
+            )
+
+    def _serialize_payload_birth_full(self, codec: PayloadCodec, message_type: str):
+        """
+            Serialize the BIRTH message, all metrics encoded ( codecs without fragments support )
+        """
+        payload = codec.new_payload(message_type)
+
+        # Template definitions - Only on edge nodes, shared by its devices
+        if self._spb_eon_device_name is None:
+            self._serialize_payload_templates(payload, codec)
 
         # Attributes
-        if not self.attributes.is_empty():
-            print("Found Birth attributes")
-            for item in self.attributes.values():
-                # Add metric to payload
-                self._serialize_payload_metric(
-                    payload=payload,
-                    name=self.attributes.birth_prefix + "/" + item.name,
-                    metric_value=item
-                )
+        for item in self.attributes.values():
+            self._serialize_payload_metric(payload=payload, name=self.attributes.birth_prefix + "/" + item.name,
+                                           metric_value=item, codec=codec, is_birth=True)
 
         # Data
-        if not self.data.is_empty():
-            print("Found birth data")
-            for item in self.data.values():
-                # Add metric to payload
-                self._serialize_payload_metric(
-                    payload=payload,
-                    name = item.name,
-#                    name=self.data.birth_prefix + "/" + item.name,
-                    metric_value=item
-                )
+        for item in self.data.values():
+            self._serialize_payload_metric(payload=payload, name=item.name, metric_value=item, codec=codec,
+                                           is_birth=True)
 
         # Commands
-        if not self.commands.is_empty():
-            print("Found birth commands")
-            for item in self.commands.values():
-                # Add metric to payload
-                self._serialize_payload_metric(
-                    payload=payload,
-                    name=item.name,
-#                    name=self.commands.birth_prefix + "/" + item.name,
-                    metric_value=item
-                )
-                
-        payload_bytes = bytearray(payload.SerializeToString())
-        self._logger.debug(f"payload: {payload}")
+        for item in self.commands.values():
+            self._serialize_payload_metric(payload=payload, name=item.name, metric_value=item, codec=codec,
+                                           is_birth=True)
+
+        payload_bytes = self._compress_payload(codec, codec.encode(payload))
+
+        # All the metrics sent, once the payload is encoded
+        for group in (self.attributes, self.data, self.commands):
+            group.clear_updated()
         return payload_bytes
 
     def deserialize_payload_birth(self, data_bytes):
 
-        payload = SpbPayloadParser(data_bytes).payload
+        if self.birth_cache is not None:
+            payload = self.birth_cache.parse_payload(data_bytes, metric_filter=self.metric_filter, codec=self.codec)
+        else:
+            payload = SpbPayloadParser(data_bytes, metric_filter=self.metric_filter, codec=self.codec).payload
 
         if payload is not None:
+            self._update_payload_birth(payload)
 
-            # Iterate over the metrics to update the data fields
-            for field in payload.get('metrics', []):
+        return payload
 
-                if field['name'].startswith(self.attributes.birth_prefix):
+    def _update_payload_birth(self, payload):
+        """
+            Update the entity metric groups from a decoded BIRTH payload
 
-                    # remove the prefix
-                    field['name'] = field['name'].replace(self.attributes.birth_prefix + "/", '')
+        Args:
+            payload: Decoded payload ( SpbPayloadParser.payload ), it is not modified.
 
-                    # Insert the element in the metric group
-                    self._deserialize_payload_metric(
-                        value_group=self.attributes,
-                        metric_value=field,
-                        skip_callback=True,     # Dont trigger value update callback on birth data.
-                    )
+        Returns: Nothing
+        """
+        attributes_prefix = self.attributes.birth_prefix + "/"
+        commands_prefix = self.commands.birth_prefix + "/"
+        data_prefix = self.data.birth_prefix + "/"
+        self._metric_aliases = {}
+
+        # Iterate over the metrics to update the data fields
+        for field in payload.get('metrics', []):
+
+            # Data metric alias, resolved in the DATA messages sent with aliases only
+            alias = field.get('alias')
+            if alias is not None:
+                name = field.get('name', '')
+                if name.startswith(data_prefix):
+                    self._metric_aliases[alias] = name[len(data_prefix):]
+                elif not name.startswith(attributes_prefix) and not name.startswith(commands_prefix):
+                    self._metric_aliases[alias] = name
+
+            # Template definition - Cached, the instances are decoded against it
+            if field.get('datatype') == MetricDataType.Template and \
+                    field['name'].startswith(SpbTemplate.DEFINITION_PREFIX) and \
+                    field.get('templateValue', {}).get('isDefinition'):
+                name = field['name'][len(SpbTemplate.DEFINITION_PREFIX):]
+                self.templates[name] = SpbTemplate.from_dict(name, field['templateValue'])
+
+            elif field['name'].startswith(self.attributes.birth_prefix):
+
+                # Insert the element in the metric group ( removing the prefix )
+                self._deserialize_payload_metric(
+                    value_group=self.attributes,
+                    metric_value=field,
+                    skip_callback=True,     # Dont trigger value update callback on birth data.
+                    name=field['name'].replace(self.attributes.birth_prefix + "/", ''),
+                )
 
-                elif field['name'].startswith(self.commands.birth_prefix):
+            elif field['name'].startswith(self.commands.birth_prefix):
 
-                    # remove the prefix
-                    field['name'] = field['name'].replace(self.commands.birth_prefix + "/", '')
+                # Insert the element in the metric group ( removing the prefix )
+                self._deserialize_payload_metric(
+                    value_group=self.commands,
+                    metric_value=field,
+                    skip_callback=True,  # Dont trigger value update callback on birth data.
+                    name=field['name'].replace(self.commands.birth_prefix + "/", ''),
+                )
 
-                    # Insert the element in the metric group
-                    self._deserialize_payload_metric(
-                        value_group=self.commands,
-                        metric_value=field,
-                        skip_callback=True,  # Dont trigger value update callback on birth data.
-                    )
+            elif field['name'].startswith(self.data.birth_prefix):
 
-                elif field['name'].startswith(self.data.birth_prefix):
+                # Insert the element in the metric group ( removing the prefix )
+                self._deserialize_payload_metric(
+                    value_group=self.data,
+                    metric_value=field,
+                    skip_callback=True,  # Dont trigger value update callback on birth data.
+                    name=field['name'].replace(self.data.birth_prefix + "/", ''),
+                )
 
-                    # remove the prefix
-                    field['name'] = field['name'].replace(self.data.birth_prefix + "/", '')
+    def serialize_payload_data(self, send_all=False):
 
-                    # Insert the element in the metric group
-                    self._deserialize_payload_metric(
-                        value_group=self.data,
-                        metric_value=field,
-                        skip_callback=True,  # Dont trigger value update callback on birth data.
-                    )
+        # Get a new payload object to add metrics to it.
+        codec = get_codec(self.codec)
+        payload = codec.new_payload(("N" if self._spb_eon_device_name is None else "D") + "DATA")
+
+        # Iterate for each data field, only those values that have been updated, or if send_all==True then all.
+        # The updated flags are cleared once the payload is encoded, they are kept if a metric can not be encoded.
+        items = list(self.data.values()) if send_all else self.data.get_updated_values()
+        for item in items:
+            # Add metric to payload
+            self._serialize_payload_metric(
+                payload=payload,
+                name=self._data_metric_name(item),
+                metric_value=item,
+                codec=codec
+            )
 
-        return payload
+        payload_bytes = self._compress_payload(codec, codec.encode(payload))
+        self.data.clear_updated(items)
 
-    def serialize_payload_data(self, send_all=False):
+        return payload_bytes
 
-        # Get a new payload object to add metrics to it.
-        payload = getDdataPayload()
+    def serialize_payload_data_chunks(self, send_all=False) -> list:
+        """
+            Serialize the DATA message into one or more payloads, each one within max_payload_bytes
 
-        # Iterate for each data field.
-        for item in self.data.values():
-            # Only send those values that have been updated, or if send_all==True then send all.
-            if send_all or item.is_updated:
-                # Add metric to payload
-                self._serialize_payload_metric(
-                    payload=payload,
-                    name=item.name,
-                    metric_value=item
-                )
+            The metrics are split into several DATA payloads, each one with its own sequence number. List values
+            ( DataSet ) larger than the budget are split into several metrics of consecutive values. Other metrics
+            larger than the budget are sent alone in a payload. If max_payload_bytes is not set, or the codec does not
+            support payload fragments, a single payload is serialized ( serialize_payload_data ).
+            The budget applies to the uncompressed payloads, see compression.
 
-        payload_bytes = bytearray(payload.SerializeToString())
+            If on_payload_stats is set, it is called for each payload with a dictionary of: message_type, chunk
+            ( payload index ), chunks ( number of payloads ), metrics ( number of metrics ) and bytes ( payload size ).
 
-        return payload_bytes
+        Args:
+            send_all: If True, all the metrics are sent, otherwise only the updated ones
+
+        Returns: list of payload bytes
+        """
+        codec = get_codec(self.codec)
+        message_type = ("N" if self._spb_eon_device_name is None else "D") + "DATA"
+        max_bytes = self.max_payload_bytes
+
+        if max_bytes is None or codec.new_fragment() is None:
+            metrics = self.data.count() if send_all else len(self.data.get_updated_values())
+            chunks = [(self.serialize_payload_data(send_all), metrics)]
+        else:
+            # Encode the metrics, and group them into payloads within the budget
+            budget = max_bytes - _DATA_HEADER_MAX_BYTES
+            groups, group, group_bytes = [], [], 0
+            items = list(self.data.values()) if send_all else self.data.get_updated_values()
+            for item in items:
+                for fragment in self._serialize_data_fragments(item, codec, budget):
+                    if group and group_bytes + len(fragment) > budget:
+                        groups.append(group)
+                        group, group_bytes = [], 0
+                    group.append(fragment)
+                    group_bytes += len(fragment)
+            groups.append(group)
+
+            chunks = [(self._compress_payload(codec, codec.join_fragments(message_type, group)), len(group))
+                      for group in groups]
+            self.data.clear_updated(items)     # Once all the payloads are encoded
+            for payload_bytes, _ in chunks:
+                if len(payload_bytes) > max_bytes:
+                    self._logger.warning("%s - DATA payload of %d bytes, larger than the %d bytes budget"
+                                         % (self._entity_domain, len(payload_bytes), max_bytes))
+
+        if self.on_payload_stats is not None:
+            for idx, (payload_bytes, metrics) in enumerate(chunks):
+                self.on_payload_stats({
+                    "message_type": message_type,
+                    "chunk": idx,
+                    "chunks": len(chunks),
+                    "metrics": metrics,
+                    "bytes": len(payload_bytes),
+                })
+
+        return [payload_bytes for payload_bytes, _ in chunks]
+
+    def _serialize_data_fragments(self, item: MetricValue, codec: PayloadCodec, budget: int) -> list:
+        """
+            Encode a DATA metric into payload fragments, list values larger than the budget are split in halves
+        """
+        payload = codec.new_fragment()
+        self._serialize_payload_metric(payload=payload, name=self._data_metric_name(item), metric_value=item,
+                                       codec=codec)
+        fragment = codec.encode(payload)
+        if len(fragment) <= budget or not item.is_list_values() or len(item._value) < 2:
+            return [fragment]
+
+        half = len(item._value) // 2
+        fragments = []
+        for values, timestamps in ((item._value[:half], item._timestamp[:half]),
+                                   (item._value[half:], item._timestamp[half:])):
+            part = MetricValue(item.name, values, timestamps, spb_data_type=item.spb_data_type,
+                               spb_alias_num=item.spb_alias_num)
+            fragments += self._serialize_data_fragments(part, codec, budget)
+        return fragments
 
     def deserialize_payload_data(self, data_bytes):
 
-        payload = SpbPayloadParser(data_bytes).payload
+        payload = SpbPayloadParser(data_bytes, metric_filter=self.metric_filter, codec=self.codec).payload
 
         if payload is not None:
+            self._update_payload_data(payload)
 
-            # Iterate over the metrics to update the data fields
-            for field in payload.get('metrics', []):
+        return payload
 
-                # Insert the element in the metric group
-                self._deserialize_payload_metric(
-                    value_group=self.data,
-                    metric_value=field
-                )
+    def _update_payload_data(self, payload):
+        """
+            Update the entity data metric group from a decoded DATA payload
 
-        return payload
+        Args:
+            payload: Decoded payload ( SpbPayloadParser.payload ), it is not modified.
+
+        Returns: Nothing
+        """
+
+        # Iterate over the metrics to update the data fields
+        for field in payload.get('metrics', []):
+
+            # Metrics sent with their alias only, named after the last BIRTH message
+            name = field.get('name')
+            if name is None:
+                name = self._metric_aliases.get(field.get('alias'))
+                if name is None:
+                    continue    # Unknown alias, or metric filtered out of the BIRTH message
+
+            # Insert the element in the metric group
+            self._deserialize_payload_metric(
+                value_group=self.data,
+                metric_value=field,
+                name=name,
+            )
 
     def serialize_payload_cmd(self, send_all=False):
 
         # Get a new payload object to add metrics to it.
-        payload = getDdataPayload()
-
-        # Iterate for each data field.
-        for item in self.commands.values():
-            # Only send those values that have been updated, or if send_all==True then send all.
-            if send_all or item.is_updated:
-                # Add metric to payload
-                self._serialize_payload_metric(
-                    payload=payload,
-                    name=item.name,
-                    metric_value=item
-                )
+        codec = get_codec(self.codec)
+        payload = codec.new_payload(("N" if self._spb_eon_device_name is None else "D") + "CMD")
+
+        # Iterate for each command, only those values that have been updated, or if send_all==True then all.
+        items = list(self.commands.values()) if send_all else self.commands.get_updated_values()
+        for item in items:
+            # Add metric to payload
+            self._serialize_payload_metric(
+                payload=payload,
+                name=item.name,
+                metric_value=item,
+                codec=codec
+            )
 
-        payload_bytes = bytearray(payload.SerializeToString())
+        payload_bytes = codec.encode(payload)
+        self.commands.clear_updated(items)
 
         return payload_bytes
 
     def deserialize_payload_cmd(self, data_bytes):
 
-        payload = SpbPayloadParser(data_bytes).payload
+        payload = SpbPayloadParser(data_bytes, metric_filter=self.metric_filter, codec=self.codec).payload
 
         if payload is not None:
+            self._update_payload_cmd(payload)
 
-            # Iterate over the metrics to update the data fields
-            for field in payload.get('metrics', []):
+        return payload
 
-                # Insert the element in the metric group
-                self._deserialize_payload_metric(
-                    value_group=self.commands,
-                    metric_value=field
-                )
+    def _update_payload_cmd(self, payload):
+        """
+            Update the entity commands metric group from a decoded CMD payload
 
-        return payload
+        Args:
+            payload: Decoded payload ( SpbPayloadParser.payload ), it is not modified.
+
+        Returns: Nothing
+        """
+
+        # Iterate over the metrics to update the data fields
+        for field in payload.get('metrics', []):
+
+            # Insert the element in the metric group
+            self._deserialize_payload_metric(
+                value_group=self.commands,
+                metric_value=field
+            )
 
 class SpbTopic:
     """
@@ -1065,11 +2173,26 @@ class SpbTopic:
 class SpbPayloadParser:
     """
         Class to parse binary payloads into dictionary
+
+    Args:
+        payload_data: payload bytes to parse ( optional )
+        lazy: If True, the payload is parsed into a LazyPayload object, where the metrics are only
+              converted into dictionaries when they are accessed ( indexed or iterated ).
+        metric_filter: MetricFilter, if set only the metrics matching the filter are decoded.
+        zero_copy: If True, Bytes / File metric values are memoryview slices of payload_data instead of bytes
+                   copies ( no base64 'bytesValue' either ). The slices keep payload_data alive, copy them
+                   with bytes() if they have to be stored.
+        codec: payload codec name or PayloadCodec object ( see spb_codec ), if None the default codec is used.
     """
 
-    def __init__(self, payload_data=None):
+    def __init__(self, payload_data=None, lazy=False, metric_filter: MetricFilter = None, zero_copy=False,
+                 codec=None):
 
         self.payload = None
+        self.lazy = lazy
+        self.metric_filter = metric_filter
+        self.zero_copy = zero_copy
+        self.codec = codec
 
         # If data is passed, then process it
         if payload_data is not None:
@@ -1082,53 +2205,23 @@ class SpbPayloadParser:
         return str(self.payload)
 
     def as_dict(self):
+        if isinstance(self.payload, LazyPayload):
+            return self.payload.as_dict()
         return dict(self.payload)
 
     def parse_payload(self, payload_data):
         """
            Parse MQTT sparkplug B payload bytes ( protobuff ) into JSON
         :param payload_data: bytes ( protobuff )
-        :return:  Dictionary or None if fails
+        :return:  Dictionary ( LazyPayload if lazy parser ) or None if fails
         """
-        pb_payload = Payload()
+        codec = get_codec(self.codec)
 
         try:
-            pb_payload.ParseFromString(payload_data)
-            payload = MessageToDict(pb_payload)  # Convert it to DICT for easy handeling
-
-
-            if "metrics" in payload.keys():
-                for i in range(len(payload['metrics'])):
-
-                    # value - Add the metrics [TYPE_value] field into [value] field for convenience
-                    for k in payload['metrics'][i].keys():
-                        if "Value" in k:
-                            payload['metrics'][i]['value'] = payload['metrics'][i][k]
-                            break
-
-                    # PARSE values - If value is numeric type, convert it
-                    if payload['metrics'][i]['datatype'] == MetricDataType.Double or payload['metrics'][i]['datatype'] == MetricDataType.Float:
-                        payload['metrics'][i]['value'] = float(payload['metrics'][i]['value'])
-                    elif payload['metrics'][i]['datatype'] >= MetricDataType.Int8 and payload['metrics'][i]['datatype'] <= MetricDataType.UInt64:
-                        payload['metrics'][i]['value'] = int(payload['metrics'][i]['value'])
-                    elif payload['metrics'][i]['datatype'] == MetricDataType.Boolean:
-                        payload['metrics'][i]['value'] = bool(payload['metrics'][i]['value'])
-                    elif payload['metrics'][i]['datatype'] == MetricDataType.DateTime:
-                        try:
-                            payload['metrics'][i]['value'] = datetime.fromtimestamp(int(payload['metrics'][i]['value']) / 1000)
-                        except:
-                            pass
-                    elif payload['metrics'][i]['datatype'] == MetricDataType.Bytes or payload['metrics'][i]['datatype'] == MetricDataType.File:
-                        try:
-                            payload['metrics'][i]['value'] = base64.b64decode(payload['metrics'][i]['value'])
-                        except:
-                            pass
-
-                    # BUG FIX - Decoder makes alias as string, force alias to be int
-                    try:
-                        payload['metrics'][i]['alias'] = int(payload['metrics'][i]['alias'])
-                    except:
-                        pass
+            payload = codec.decode(payload_data,
+                                   lazy=self.lazy,
+                                   metric_filter=self.metric_filter,
+                                   zero_copy=self.zero_copy)
 
         except Exception as e:
 
@@ -1146,3 +2239,66 @@ class SpbPayloadParser:
 
         self.payload = payload  # Save the current payload
         return self.payload
+
+    @classmethod
+    def parse_many(cls, payloads, workers: int = None, chunk_size: int = 256, metric_filter: MetricFilter = None,
+                   codec=None):
+        """
+        Parse many payloads, spreading the decoding over a pool of processes.
+
+        The payloads are sent to the workers in chunks, and the results are yielded in the same order as
+        the payloads. Batches of a single chunk, or workers <= 1, are decoded in the current process.
+
+        Args:
+            payloads: iterable of payload bytes
+            workers: number of worker processes, defaults to the number of CPUs
+            chunk_size: number of payloads sent to a worker at once
+            metric_filter: MetricFilter, if set only the metrics matching the filter are decoded.
+            codec: payload codec name or PayloadCodec object, if None the default codec is used.
+
+        Returns: generator of payload dictionaries ( None for the payloads that can not be parsed )
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        chunk_size = max(1, int(chunk_size))
+        codec = get_codec(codec)    # Codec object sent to the workers, the registry may differ on them
+
+        iterator = iter(payloads)
+        chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+        first = next(chunks, None)
+        second = next(chunks, None) if first is not None else None
+        chunks = chain([chunk for chunk in (first, second) if chunk is not None], chunks)
+
+        # Small batch - The process pool startup costs more than the decoding
+        executor = None
+        if second is not None and workers > 1:
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError, ImportError):     # No multiprocessing support on this platform
+                executor = None
+
+        if executor is None:
+            for chunk in chunks:
+                yield from _parse_payload_chunk(chunk, metric_filter, codec)
+            return
+
+        # Keep a bounded number of chunks in flight, the results are yielded in order
+        pending = deque()
+        try:
+            for chunk in chunks:
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(_parse_payload_chunk, chunk, metric_filter, codec))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:  # Generator closed before the end
+                future.cancel()
+            executor.shutdown(wait=True)
+
+
+def _parse_payload_chunk(chunk, metric_filter=None, codec=None):
+    """ Parse a list of payloads ( SpbPayloadParser.parse_many worker ) """
+    parser = SpbPayloadParser(metric_filter=metric_filter, codec=codec)
+    return [parser.parse_payload(payload_data) for payload_data in chunk]
@@ -0,0 +1,297 @@
+
+from .spb_protobuf import Payload, getPayloadDict, LazyPayload
+from .spb_protobuf import getNodeBirthPayload, getDeviceBirthPayload, getDdataPayload, getNodeDeathPayload
+from .spb_protobuf import getSeqNum
+from .spb_protobuf import addMetric, addNullMetric, addTemplateMetric
+from .spb_protobuf.sparkplug_b import addMetricDataset_from_dict, getCompressedPayload, getDecompressedPayload
+from .spb_protobuf.sparkplug_b_wire import PayloadWriter, encodeVarint
+
+
+class PayloadCodec:
+    """
+    Sparkplug B payload codec interface
+
+    A codec encodes the entity metrics into payload bytes, and decodes the received payload bytes into the
+    payload dictionary ( see SpbPayloadParser ). Payloads are encoded in three steps, a payload object is
+    created for the message type, the metrics are added to it, and the payload object is encoded into bytes.
+    The payload object is opaque, it is only handled by the codec that created it.
+
+    Codecs are registered by name ( register_codec ), the default one is used by the entities and parsers
+    unless a codec is selected for them ( SpbEntity.codec, SpbPayloadParser codec ).
+    """
+
+    name = None     # Codec registration name
+
+    def new_payload(self, message_type: str):
+        """
+        Create a new payload object for a message type
+
+        Args:
+            message_type: Message type, "NBIRTH", "DBIRTH", "NDATA", "DDATA", "NCMD", "DCMD", "NDEATH" or "DDEATH".
+                          BIRTH payloads reset the sequence number, NBIRTH and DEATH payloads include the bdSeq.
+
+        Returns: payload object
+        """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def new_fragment(self):
+        """
+        Create a payload object holding only metrics, encoded ( encode ) into a fragment of payload bytes
+
+        Fragments are encoded once and joined into payloads ( join_fragments ), e.g. the metrics of the BIRTH
+        payloads, re-encoded only when they change. Returns None if the codec does not support fragments.
+        """
+        return None
+
+    def join_fragments(self, message_type: str, fragments: list) -> bytes:
+        """
+        Encode a payload from encoded metric fragments
+
+        Args:
+            message_type: Message type, see new_payload. The payload header is set as for new_payload.
+            fragments: list of encoded fragments ( bytes )
+
+        Returns: payload bytes
+        """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def add_metric(self, payload, name, alias, datatype, value, timestamp=None):
+        """
+        Add a metric to a payload object
+
+        Args:
+            payload: payload object ( new_payload )
+            name: metric name
+            alias: metric alias, None if not set
+            datatype: metric MetricDataType
+            value: metric value, already converted to the datatype python type ( int timestamp for DateTime )
+            timestamp: metric timestamp in milliseconds, None for the current time
+        """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def add_null_metric(self, payload, name, alias, datatype):
+        """ Add a null value metric to a payload object """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def add_dataset_metric(self, payload, name, alias, data: dict, types: dict = None, properties: dict = None):
+        """
+        Add a DataSet metric to a payload object from a dictionary of columns ( column name -> values list )
+
+        Args:
+            payload: payload object ( new_payload )
+            name: metric name
+            alias: metric alias, None if not set
+            data: dictionary of columns, lists, array.array or NumPy arrays of the same length
+            types: column types ( column name -> DataSetDataType ), inferred from the values if not set
+            properties: metric properties ( property name -> ( MetricDataType, value ) ), None if not set
+        """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def add_template_metric(self, payload, name, alias, template_ref, members, version=None, timestamp=None,
+                            member_datatypes=True):
+        """
+        Add a Template metric to a payload object, a definition ( template_ref None ) or an instance
+
+        Args:
+            payload: payload object ( new_payload )
+            name: metric name
+            alias: metric alias, None if not set
+            template_ref: name of the instance template definition, None for definitions
+            members: list of ( member name, MetricDataType, value ) tuples
+            version: template version, None if not set
+            timestamp: metric timestamp in milliseconds, None for the current time
+            member_datatypes: If False, the member datatypes are not encoded ( instance of a definition known
+                              by the receiver )
+        """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def metrics_count(self, payload) -> int:
+        """ Number of metrics added to a payload object """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def encode(self, payload) -> bytes:
+        """ Encode a payload object into bytes """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+    def compress(self, payload_data, algorithm: str = "DEFLATE") -> bytes:
+        """
+        Compress encoded payload bytes into a compressed payload, decoded transparently by decode()
+
+        Args:
+            payload_data: encoded payload bytes
+            algorithm: compression algorithm, "DEFLATE" or "GZIP"
+
+        Returns: compressed payload bytes, None if compression is not supported by the codec
+        """
+        return None
+
+    def decode(self, payload_data, lazy=False, metric_filter=None, zero_copy=False):
+        """
+        Decode payload bytes
+
+        Args:
+            payload_data: payload bytes
+            lazy: decode the payload into a LazyPayload ( metrics converted on access ) if supported
+            metric_filter: MetricFilter, if set only the metrics matching the filter are decoded.
+            zero_copy: Bytes / File values as memoryview slices of the payload data, if supported
+
+        Returns: payload dictionary, raises an exception if the payload can not be decoded.
+        """
+        raise NotImplementedError("Must be implemented in subclasses")
+
+
+class ProtobufCodec(PayloadCodec):
+    """
+    Default codec, based on the generated protobuf Payload class ( sparkplug_b_pb2 ) and the Tahu helpers.
+    """
+
+    name = "protobuf"
+
+    # DATA payloads written straight into the wire format ( PayloadWriter ), the protobuf message is only built
+    # for the metrics the writer does not handle ( DataSet, Template ).
+    wire_encoder = True
+
+    def __init__(self, wire_encoder: bool = None):
+        if wire_encoder is not None:
+            self.wire_encoder = wire_encoder
+
+    def new_payload(self, message_type: str):
+        if message_type == "NBIRTH":
+            return getNodeBirthPayload()
+        elif message_type == "DBIRTH":
+            return getDeviceBirthPayload()
+        elif message_type.endswith("DEATH"):
+            return getNodeDeathPayload()
+        elif self.wire_encoder and message_type.endswith("DATA"):
+            return PayloadWriter()
+        return getDdataPayload()
+
+    def new_fragment(self):
+        return Payload()    # No header fields, only metrics ( field 2 )
+
+    def join_fragments(self, message_type: str, fragments: list) -> bytes:
+        # Fields are serialized in field number order: timestamp ( 1 ), metrics ( 2 ) and seq ( 3 ). The header
+        # metrics ( NBIRTH bdSeq ) go before the fragments.
+        header = self.new_payload(message_type)
+        if header.__class__ is PayloadWriter:
+            header = header.get_message()
+        if not header.HasField("seq"):
+            return b"".join([header.SerializeToString()] + fragments)
+        seq = header.seq
+        header.ClearField("seq")
+        return b"".join([header.SerializeToString()] + fragments + [b"\x18" + encodeVarint(seq)])
+
+    def add_metric(self, payload, name, alias, datatype, value, timestamp=None):
+        if payload.__class__ is PayloadWriter:
+            payload.add_metric(name, alias, datatype, value, timestamp)
+        else:
+            addMetric(payload, name, alias, datatype, value, timestamp)
+
+    def add_null_metric(self, payload, name, alias, datatype):
+        if payload.__class__ is PayloadWriter:
+            payload.add_null_metric(name, alias, datatype)
+        else:
+            addNullMetric(payload, name=name, alias=alias, type=datatype)
+
+    def add_dataset_metric(self, payload, name, alias, data: dict, types: dict = None, properties: dict = None):
+        if payload.__class__ is PayloadWriter:
+            payload.add_dataset_metric(name, alias, data, types, properties=properties)
+        else:
+            addMetricDataset_from_dict(payload, name=name, alias=alias, data=data, types=types, properties=properties)
+
+    def add_template_metric(self, payload, name, alias, template_ref, members, version=None, timestamp=None,
+                            member_datatypes=True):
+        if payload.__class__ is PayloadWriter:
+            addTemplateMetric(payload.get_message(), name, alias, template_ref, members, version, timestamp,
+                              member_datatypes)
+        else:
+            addTemplateMetric(payload, name, alias, template_ref, members, version, timestamp, member_datatypes)
+
+    def metrics_count(self, payload) -> int:
+        if payload.__class__ is PayloadWriter:
+            return payload.metrics_count()
+        return len(payload.metrics)
+
+    def encode(self, payload) -> bytes:
+        if payload.__class__ is PayloadWriter:
+            return payload.encode()
+        return payload.SerializeToString()
+
+    def compress(self, payload_data, algorithm: str = "DEFLATE") -> bytes:
+        return getCompressedPayload(payload_data, algorithm).SerializeToString()
+
+    def decode(self, payload_data, lazy=False, metric_filter=None, zero_copy=False):
+        pb_payload = Payload()
+        pb_payload.ParseFromString(payload_data)
+        if pb_payload.HasField("uuid"):
+            inner_data = getDecompressedPayload(pb_payload)     # Compressed payload, the inner one is decoded
+            if inner_data is not None:
+                payload_data = inner_data
+                pb_payload = Payload.FromString(payload_data)
+        data = payload_data if zero_copy else None     # Bytes values sliced from the payload data
+        if lazy:
+            return LazyPayload(pb_payload, metric_filter, data)    # Metrics converted on access
+        return getPayloadDict(pb_payload, metric_filter, data)
+
+
+######################################################################
+# Codecs registry
+######################################################################
+_codecs = {}
+_default_codec = None
+
+
+def register_codec(codec: PayloadCodec, default: bool = False):
+    """
+    Register a codec by its name
+
+    Args:
+        codec: PayloadCodec object
+        default: If True, the codec is set as the default one
+    """
+    global _default_codec
+    if not codec.name:
+        raise ValueError("Codec name not set")
+    _codecs[codec.name] = codec
+    if default or _default_codec is None:
+        _default_codec = codec
+
+
+def unregister_codec(name: str):
+    """ Remove a codec from the registry, the default codec can not be removed """
+    if _codecs.get(name) is _default_codec:
+        raise ValueError("Default payload codec can not be unregistered: %s" % name)
+    _codecs.pop(name, None)
+
+
+def set_default_codec(codec):
+    """ Select the default codec, by its name or a PayloadCodec object """
+    global _default_codec
+    _default_codec = get_codec(codec)
+
+
+def get_codec(codec=None) -> PayloadCodec:
+    """
+    Get a codec
+
+    Args:
+        codec: codec name, PayloadCodec object ( returned as is ) or None for the default codec
+
+    Returns: PayloadCodec object
+    """
+    if codec is None:
+        return _default_codec
+    if isinstance(codec, PayloadCodec):
+        return codec
+    try:
+        return _codecs[codec]
+    except KeyError:
+        raise ValueError("Unknown payload codec: %s" % codec)
+
+
+def get_codecs() -> dict:
+    """ Registered codecs ( name -> PayloadCodec ) """
+    return dict(_codecs)
+
+
+register_codec(ProtobufCodec(), default=True)
@@ -1,8 +1,10 @@
 from .sparkplug_b import getDdataPayload, getNodeDeathPayload, getNodeBirthPayload, getDeviceBirthPayload
 from .sparkplug_b import getSeqNum, getBdSeqNum
-from .sparkplug_b import addMetric, MetricDataType, addNullMetric
+from .sparkplug_b import addMetric, MetricDataType, addNullMetric, addTemplateMetric
 from .sparkplug_b_pb2 import Payload
-from .sparkplug_b_tools import getMetricValue, getValueDataType
+from .sparkplug_b_tools import getMetricValue, getValueDataType, getMetricDict, getPayloadDict
+from .sparkplug_b_tools import getDatasetColumns, getDatasetColumnList, getTemplateDict, MetricBytesSlices
+from .sparkplug_b_tools import LazyPayload, LazyMetricList
 
 
 
@@ -11,6 +11,7 @@
 # *   Cirrus Link Solutions - initial implementation
 # ********************************************************************************/
 import time
+import zlib
 from .sparkplug_b_pb2 import Payload
 
 seqNum = 0
@@ -156,6 +157,103 @@ def initTemplateMetric(payload, name, alias, templateRef):
 
     return metric.template_value
 ######################################################################
+# Metric value encoders, one per metric datatype. Each encoder sets the
+# datatype and the value field of the metric, with the two's complement
+# conversion of the signed integers.
+######################################################################
+def _encodeInt8(metric, value):
+    metric.datatype = MetricDataType.Int8
+    metric.int_value = value + 0x100 if value < 0 else value
+
+def _encodeInt16(metric, value):
+    metric.datatype = MetricDataType.Int16
+    metric.int_value = value + 0x10000 if value < 0 else value
+
+def _encodeInt32(metric, value):
+    metric.datatype = MetricDataType.Int32
+    metric.int_value = value + 0x100000000 if value < 0 else value
+
+def _encodeInt64(metric, value):
+    metric.datatype = MetricDataType.Int64
+    metric.long_value = value + 0x10000000000000000 if value < 0 else value
+
+def _encodeUInt8(metric, value):
+    metric.datatype = MetricDataType.UInt8
+    metric.int_value = value
+
+def _encodeUInt16(metric, value):
+    metric.datatype = MetricDataType.UInt16
+    metric.int_value = value
+
+def _encodeUInt32(metric, value):
+    metric.datatype = MetricDataType.UInt32
+    metric.int_value = value
+
+def _encodeUInt64(metric, value):
+    metric.datatype = MetricDataType.UInt64
+    metric.long_value = value
+
+def _encodeFloat(metric, value):
+    metric.datatype = MetricDataType.Float
+    metric.float_value = value
+
+def _encodeDouble(metric, value):
+    metric.datatype = MetricDataType.Double
+    metric.double_value = value
+
+def _encodeBoolean(metric, value):
+    metric.datatype = MetricDataType.Boolean
+    metric.boolean_value = value
+
+def _encodeString(metric, value):
+    metric.datatype = MetricDataType.String
+    metric.string_value = value
+
+def _encodeDateTime(metric, value):
+    metric.datatype = MetricDataType.DateTime
+    metric.long_value = value
+
+def _encodeText(metric, value):
+    metric.datatype = MetricDataType.Text
+    metric.string_value = value
+
+def _encodeUUID(metric, value):
+    metric.datatype = MetricDataType.UUID
+    metric.string_value = value
+
+def _encodeBytes(metric, value):
+    metric.datatype = MetricDataType.Bytes
+    metric.bytes_value = value
+
+def _encodeFile(metric, value):
+    metric.datatype = MetricDataType.File
+    metric.bytes_value = value
+
+def _encodeTemplate(metric, value):
+    metric.datatype = MetricDataType.Template
+    metric.template_value.CopyFrom(value)   # Payload.Template message
+
+METRIC_ENCODERS = {
+    MetricDataType.Int8: _encodeInt8,
+    MetricDataType.Int16: _encodeInt16,
+    MetricDataType.Int32: _encodeInt32,
+    MetricDataType.Int64: _encodeInt64,
+    MetricDataType.UInt8: _encodeUInt8,
+    MetricDataType.UInt16: _encodeUInt16,
+    MetricDataType.UInt32: _encodeUInt32,
+    MetricDataType.UInt64: _encodeUInt64,
+    MetricDataType.Float: _encodeFloat,
+    MetricDataType.Double: _encodeDouble,
+    MetricDataType.Boolean: _encodeBoolean,
+    MetricDataType.String: _encodeString,
+    MetricDataType.DateTime: _encodeDateTime,
+    MetricDataType.Text: _encodeText,
+    MetricDataType.UUID: _encodeUUID,
+    MetricDataType.Bytes: _encodeBytes,
+    MetricDataType.File: _encodeFile,
+    MetricDataType.Template: _encodeTemplate,
+}
+######################################################################
 
 
 ######################################################################
@@ -170,78 +268,19 @@ def initTemplateMetric(payload, name, alias, templateRef):
 # Helper method for adding metrics to a container which can be a
 # payload or a template
 ######################################################################
-def addMetric(container, name, alias, type, value, timestamp=int(round(time.time() * 1000))):
+def addMetric(container, name, alias, type, value, timestamp=None):
     metric = container.metrics.add()
     if name is not None:
         metric.name = name
     if alias is not None:
         metric.alias = alias
+    if timestamp is None:
+        timestamp = int(round(time.time() * 1000))
     metric.timestamp = timestamp
 
-    # print( "Type: " + str(type))
-
-    if type == MetricDataType.Int8:
-        metric.datatype = MetricDataType.Int8
-        if value < 0:
-            value = value + 2**8
-        metric.int_value = value
-    elif type == MetricDataType.Int16:
-        metric.datatype = MetricDataType.Int16
-        if value < 0:
-            value = value + 2**16
-        metric.int_value = value
-    elif type == MetricDataType.Int32:
-        metric.datatype = MetricDataType.Int32
-        if value < 0:
-            value = value + 2**32
-        metric.int_value = value
-    elif type == MetricDataType.Int64:
-        metric.datatype = MetricDataType.Int64
-        if value < 0:
-            value = value + 2**64
-        metric.long_value = value
-    elif type == MetricDataType.UInt8:
-        metric.datatype = MetricDataType.UInt8
-        metric.int_value = value
-    elif type == MetricDataType.UInt16:
-        metric.datatype = MetricDataType.UInt16
-        metric.int_value = value
-    elif type == MetricDataType.UInt32:
-        metric.datatype = MetricDataType.UInt32
-        metric.int_value = value
-    elif type == MetricDataType.UInt64:
-        metric.datatype = MetricDataType.UInt64
-        metric.long_value = value
-    elif type == MetricDataType.Float:
-        metric.datatype = MetricDataType.Float
-        metric.float_value = value
-    elif type == MetricDataType.Double:
-        metric.datatype = MetricDataType.Double
-        metric.double_value = value
-    elif type == MetricDataType.Boolean:
-        metric.datatype = MetricDataType.Boolean
-        metric.boolean_value = value
-    elif type == MetricDataType.String:
-        metric.datatype = MetricDataType.String
-        metric.string_value = value
-    elif type == MetricDataType.DateTime:
-        metric.datatype = MetricDataType.DateTime
-        metric.long_value = value
-    elif type == MetricDataType.Text:
-        metric.datatype = MetricDataType.Text
-        metric.string_value = value
-    elif type == MetricDataType.UUID:
-        metric.datatype = MetricDataType.UUID
-        metric.string_value = value
-    elif type == MetricDataType.Bytes:
-        metric.datatype = MetricDataType.Bytes
-        metric.bytes_value = value
-    elif type == MetricDataType.File:
-        metric.datatype = MetricDataType.File
-        metric.bytes_value = value
-    elif type == MetricDataType.Template:
-        metric.datatype = MetricDataType.Template
-        metric.template_value = value
+    encoder = METRIC_ENCODERS.get(type)
+    if encoder is not None:
+        encoder(metric, value)
     else:
         print("Invalid: " + str(type))
 
@@ -249,6 +288,34 @@ def addMetric(container, name, alias, type, value, timestamp=int(round(time.time
     return metric
 ######################################################################
 
+######################################################################
+# Helper method for adding template metrics ( definitions or instances )
+#
+# members is a list of ( name, datatype, value ) tuples, None values
+# are added as null metrics. The members have no timestamp ( the one of
+# the template metric applies ), and no datatype if member_datatypes is
+# False ( instances of a definition known by the receiver ).
+######################################################################
+def addTemplateMetric(container, name, alias, templateRef, members, version=None, timestamp=None,
+                      member_datatypes=True):
+    template = initTemplateMetric(container, name, alias, templateRef)
+    if timestamp is not None:
+        container.metrics[-1].timestamp = timestamp
+    if version is not None:
+        template.version = version
+
+    for member_name, member_type, member_value in members:
+        if member_value is None:
+            member = addNullMetric(template, member_name, None, member_type)
+        else:
+            member = addMetric(template, member_name, None, member_type, member_value)
+        member.ClearField("timestamp")
+        if not member_datatypes:
+            member.ClearField("datatype")
+
+    return template
+######################################################################
+
 ######################################################################
 # Helper method for adding metrics to a container which can be a
 # payload or a template
@@ -274,44 +341,8 @@ def addNullMetric(container, name, alias, type):
     metric.timestamp = int(round(time.time() * 1000))
     metric.is_null = True
 
-    # print( "Type: " + str(type))
-
-    if type == MetricDataType.Int8:
-        metric.datatype = MetricDataType.Int8
-    elif type == MetricDataType.Int16:
-        metric.datatype = MetricDataType.Int16
-    elif type == MetricDataType.Int32:
-        metric.datatype = MetricDataType.Int32
-    elif type == MetricDataType.Int64:
-        metric.datatype = MetricDataType.Int64
-    elif type == MetricDataType.UInt8:
-        metric.datatype = MetricDataType.UInt8
-    elif type == MetricDataType.UInt16:
-        metric.datatype = MetricDataType.UInt16
-    elif type == MetricDataType.UInt32:
-        metric.datatype = MetricDataType.UInt32
-    elif type == MetricDataType.UInt64:
-        metric.datatype = MetricDataType.UInt64
-    elif type == MetricDataType.Float:
-        metric.datatype = MetricDataType.Float
-    elif type == MetricDataType.Double:
-        metric.datatype = MetricDataType.Double
-    elif type == MetricDataType.Boolean:
-        metric.datatype = MetricDataType.Boolean
-    elif type == MetricDataType.String:
-        metric.datatype = MetricDataType.String
-    elif type == MetricDataType.DateTime:
-        metric.datatype = MetricDataType.DateTime
-    elif type == MetricDataType.Text:
-        metric.datatype = MetricDataType.Text
-    elif type == MetricDataType.UUID:
-        metric.datatype = MetricDataType.UUID
-    elif type == MetricDataType.Bytes:
-        metric.datatype = MetricDataType.Bytes
-    elif type == MetricDataType.File:
-        metric.datatype = MetricDataType.File
-    elif type == MetricDataType.Template:
-        metric.datatype = MetricDataType.Template
+    if type in METRIC_ENCODERS:
+        metric.datatype = type
     else:
         print( "Invalid: " + str(type))
 
@@ -348,7 +379,7 @@ def getBdSeqNum():
 ######################################################################
 
 
-def addMetricDataset_from_dict(payload, name, alias, data):
+def addMetricDataset_from_dict(payload, name, alias, data, types=None, properties=None):
     """
     Converts a dictionary into a Sparkplug B dataset metric.
 
@@ -356,7 +387,11 @@ def addMetricDataset_from_dict(payload, name, alias, data):
         payload (Payload): The payload to add the dataset metric to.
         name (str): The name of the dataset metric.
         alias (int): The alias for the metric.
-        data (dict): The dictionary containing columns as keys and lists of values.
+        data (dict): The dictionary containing columns as keys and lists of values ( lists, array.array or
+            NumPy arrays ).
+        types (dict): Optional column types ( column name -> DataSetDataType ), the type of the other columns is
+            inferred from their values ( see sparkplug_b_wire.getDatasetTypes ).
+        properties (dict): Optional metric properties, see setMetricProperties.
 
     Returns:
         The initialized dataset metric.
@@ -377,49 +412,127 @@ def addMetricDataset_from_dict(payload, name, alias, data):
         dict_to_dataset_metric(payload, "environmental_data", 1, data)
 
     """
-    
-    # Extract columns and data types
-    columns = list(data.keys())
-
-    # Check for consistent column dimensions
-    lengths = [len(v) for v in data.values()]
-    if len(set(lengths)) > 1:
-        raise ValueError(f"All columns must have the same number of rows, but got lengths: {lengths}")
-
-    # Determine types based on the first row's types.
-    first_row = [v[0] for v in data.values()]
-    types = []
-    for value in first_row:
-        if isinstance(value, int):
-            types.append(DataSetDataType.Int64)
-        elif isinstance(value, float):
-            types.append(DataSetDataType.Float)
-        elif isinstance(value, str):
-            types.append(DataSetDataType.String)
-        else:
-            raise ValueError(f"Unsupported data type: {type(value)}")
-
-    # Initialize the dataset metric using the provided function
-    dataset = initDatasetMetric(payload, name, alias, columns, types)
-
-    # Get the number of rows from the data values
-    num_rows = lengths[0]
-
-    # Add rows to the dataset
-    for i in range(num_rows):
-        dataset_row = dataset.rows.add()
-        for col in columns:
-            element = dataset_row.elements.add()
-            value = data[col][i]
-            # Add the value based on its type
-            if isinstance(value, int):
-                element.long_value = value
-            elif isinstance(value, float):
-                element.float_value = value
-            elif isinstance(value, str):
-                element.string_value = value
-            else:
-                raise ValueError(f"Unsupported value type: {type(value)}")
+    from .sparkplug_b_wire import getDatasetTypes, encodeDatasetRows   # Imports this module
+
+    # Column types, checking the columns have the same number of rows, inferred once per column
+    column_types = getDatasetTypes(data, types)
+
+    # Initialize the dataset metric, and add the rows encoded in bulk
+    dataset = initDatasetMetric(payload, name, alias, list(data.keys()), column_types)
+    dataset.MergeFromString(encodeDatasetRows(list(data.values()), column_types))
+    if properties:
+        setMetricProperties(payload.metrics[-1], properties)
 
     return dataset
 
+
+######################################################################
+# Metric properties
+######################################################################
+def setMetricProperties(metric, properties):
+    """
+    Set the properties of a metric ( PropertySet )
+
+    Args:
+        metric: Payload.Metric protobuf object
+        properties: dictionary of property name -> ( MetricDataType, value ), integer, float, boolean and string
+            property types.
+    """
+    for key, (type, value) in properties.items():
+        metric.properties.keys.append(key)
+        property_value = metric.properties.values.add()
+        property_value.type = type
+        if value is None:
+            property_value.is_null = True
+        elif type in (MetricDataType.Int8, MetricDataType.Int16, MetricDataType.Int32, MetricDataType.UInt8,
+                      MetricDataType.UInt16, MetricDataType.UInt32):
+            property_value.int_value = value & 0xFFFFFFFF
+        elif type in (MetricDataType.Int64, MetricDataType.UInt64, MetricDataType.DateTime):
+            property_value.long_value = value & 0xFFFFFFFFFFFFFFFF
+        elif type == MetricDataType.Float:
+            property_value.float_value = value
+        elif type == MetricDataType.Double:
+            property_value.double_value = value
+        elif type == MetricDataType.Boolean:
+            property_value.boolean_value = value
+        elif type in (MetricDataType.String, MetricDataType.Text):
+            property_value.string_value = value
+        else:
+            raise ValueError("Unsupported property type: %s" % type)
+######################################################################
+
+
+######################################################################
+# Compressed payloads
+######################################################################
+# The compressed payload is the body of an outer payload, identified by its uuid. The algorithm is set in the
+# "algorithm" String metric, DEFLATE ( zlib format ) if missing.
+COMPRESSED_PAYLOAD_UUID = "SPBV1.0_COMPRESSED"
+COMPRESSION_ALGORITHMS = ("DEFLATE", "GZIP")
+
+# Maximum size of a decompressed payload, larger ones are rejected ( compression bombs )
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+
+
+def getCompressedPayload(payload_bytes, algorithm="DEFLATE", level=-1):
+    """
+    Compress the encoded payload bytes into a Sparkplug B compressed payload
+
+    Args:
+        payload_bytes: encoded payload bytes
+        algorithm: "DEFLATE" or "GZIP"
+        level: compression level, 0 to 9, -1 for the default one
+
+    Returns:
+        The outer Payload message, with the compressed payload in its body
+    """
+    algorithm = algorithm.upper()
+    if algorithm == "DEFLATE":
+        body = zlib.compress(payload_bytes, level)
+    elif algorithm == "GZIP":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)   # gzip header and trailer
+        body = compressor.compress(payload_bytes) + compressor.flush()
+    else:
+        raise ValueError("Unsupported compression algorithm: %s" % algorithm)
+
+    payload = Payload()
+    payload.timestamp = int(round(time.time() * 1000))
+    payload.uuid = COMPRESSED_PAYLOAD_UUID
+    payload.body = body
+    addMetric(payload, "algorithm", None, MetricDataType.String, algorithm)
+    return payload
+
+
+def getDecompressedPayload(payload, max_bytes=MAX_DECOMPRESSED_BYTES):
+    """
+    Get the inner payload bytes of a Sparkplug B compressed payload
+
+    Args:
+        payload: decoded Payload message
+        max_bytes: maximum size of the decompressed payload
+
+    Returns:
+        The decompressed payload bytes, or None if the payload is not compressed. Raises ValueError if the
+        algorithm is not supported, the compressed body is truncated or the decompressed payload is larger than
+        max_bytes.
+    """
+    if payload.uuid != COMPRESSED_PAYLOAD_UUID:
+        return None
+
+    algorithm = "DEFLATE"
+    for metric in payload.metrics:
+        if metric.name == "algorithm":
+            algorithm = metric.string_value.upper()
+    if algorithm == "DEFLATE":
+        decompressor = zlib.decompressobj()
+    elif algorithm == "GZIP":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    else:
+        raise ValueError("Unsupported compression algorithm: %s" % algorithm)
+
+    data = decompressor.decompress(payload.body, max_bytes)
+    if decompressor.unconsumed_tail:
+        raise ValueError("Decompressed payload larger than %d bytes" % max_bytes)
+    if not decompressor.eof:
+        raise ValueError("Truncated compressed payload")
+    return data
@@ -10,10 +10,23 @@
 # * Contributors:
 # *   Saxion - Javier FG
 # ********************************************************************************/
-from .sparkplug_b import MetricDataType
+from .sparkplug_b import MetricDataType, DataSetDataType
+from array import array
+from operator import attrgetter
 from datetime import datetime
 from io import TextIOWrapper, BufferedReader
 import uuid
+import base64
+import math
+import struct
+from collections.abc import MutableMapping, Sequence
+
+from google.protobuf.json_format import MessageToDict
+
+try:
+    import numpy
+except ImportError:     # NumPy is optional, DataSet columns are decoded as array.array
+    numpy = None
 
 ######################################################################
 # Helper method for getting the value field from metrics
@@ -82,6 +95,8 @@ def getValueDataType ( value ):
     elif isinstance(value, bytes) or isinstance(value, bytearray):
         return MetricDataType.Bytes
     elif isinstance(value, dict):
+        if getattr(value, "template_ref", None) is not None:     # Template instance ( SpbTemplate.instance )
+            return MetricDataType.Template
         return MetricDataType.DataSet
     elif isinstance(value, datetime):
         return MetricDataType.DateTime
@@ -92,3 +107,668 @@ def getValueDataType ( value ):
     else:
         return MetricDataType.Unknown
 
+
+
+######################################################################
+# Helper methods for converting a protobuf Payload into a dictionary
+#
+# The resulting dictionary is the same one produced by running
+# MessageToDict() over the payload ( camelCase keys, uint64 fields as
+# strings, ... ) plus the 'value' field of each metric converted into
+# its python type, but the metrics are read directly from the protobuf
+# fields in a single pass. DataSet rows are decoded into typed columns.
+######################################################################
+_FLOAT32 = struct.Struct("<f")
+
+# Metric datatypes whose value is converted into a python type
+_METRIC_FLOAT_TYPES = (MetricDataType.Float, MetricDataType.Double)
+_METRIC_INT_TYPES = tuple(range(MetricDataType.Int8, MetricDataType.UInt64 + 1))
+_METRIC_BYTES_TYPES = (MetricDataType.Bytes, MetricDataType.File)
+
+# Metric value fields ( protobuf oneof field name -> dictionary key )
+_METRIC_VALUE_KEYS = {
+    "int_value": "intValue",
+    "long_value": "longValue",
+    "float_value": "floatValue",
+    "double_value": "doubleValue",
+    "boolean_value": "booleanValue",
+    "string_value": "stringValue",
+    "bytes_value": "bytesValue",
+    "dataset_value": "datasetValue",
+    "template_value": "templateValue",
+    "extension_value": "extensionValue",
+}
+
+
+def _getShortestFloat(value):
+    """ Shortest decimal representation of a float32 value, as MessageToDict does """
+    if math.isnan(value) or math.isinf(value):
+        return _getJsonDouble(value)
+    precision = 6
+    rounded = float("{0:.{1}g}".format(value, precision))
+    while _FLOAT32.unpack(_FLOAT32.pack(rounded))[0] != value:
+        precision += 1
+        rounded = float("{0:.{1}g}".format(value, precision))
+    return rounded
+
+
+def _getJsonDouble(value):
+    """ Double representation as MessageToDict does ( special values as strings ) """
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    return value
+
+
+def _getJsonValue(field, value):
+    """ Get the MessageToDict representation of a metric value field """
+    if field == "int_value" or field == "boolean_value" or field == "string_value":
+        return value
+    elif field == "long_value":
+        return str(value)
+    elif field == "float_value":
+        return _getShortestFloat(value)
+    elif field == "double_value":
+        return _getJsonDouble(value)
+    elif field == "bytes_value":
+        return base64.b64encode(value).decode("utf-8")
+    return MessageToDict(value)   # DataSet, Template, Extension
+
+
+# DataSet column types ( DataSetDataType -> DataSetValue field, array typecode or None for list columns )
+_DATASET_COLUMN_TYPES = {
+    DataSetDataType.Int8: ("int_value", "b"),
+    DataSetDataType.Int16: ("int_value", "h"),
+    DataSetDataType.Int32: ("int_value", "i"),
+    DataSetDataType.Int64: ("long_value", "q"),
+    DataSetDataType.UInt8: ("int_value", "B"),
+    DataSetDataType.UInt16: ("int_value", "H"),
+    DataSetDataType.UInt32: ("int_value", "I"),
+    DataSetDataType.UInt64: ("long_value", "Q"),
+    DataSetDataType.Float: ("float_value", "f"),
+    DataSetDataType.Double: ("double_value", "d"),
+    DataSetDataType.Boolean: ("boolean_value", None),
+    DataSetDataType.String: ("string_value", None),
+    DataSetDataType.DateTime: ("long_value", "q"),
+    DataSetDataType.Text: ("string_value", None),
+}
+
+# Signed integers are sent as unsigned two's complement values, decoded via the unsigned typecode
+_DATASET_UNSIGNED_TYPECODES = {"b": "B", "h": "H", "i": "I", "q": "Q", "B": "B", "H": "H", "I": "I", "Q": "Q"}
+
+# NumPy dtype kind of each array typecode ( the sized dtype, e.g. 'i8', is the same on all platforms )
+_DATASET_NUMPY_KINDS = {"b": "i", "h": "i", "i": "i", "q": "i", "B": "u", "H": "u", "I": "u", "Q": "u", "f": "f", "d": "f"}
+
+
+def _getDatasetCellValue(cell):
+    """ Value of a DataSetValue, whatever field is set """
+    field = cell.WhichOneof("value")
+    if field is None:
+        return None
+    return getattr(cell, field)
+
+
+def _getTypedColumn(values, typecode):
+    """ Pack a list of values into an array ( NumPy array if available ) """
+    unsigned = _DATASET_UNSIGNED_TYPECODES.get(typecode)
+    if unsigned is None:
+        column = array(typecode, values)
+    else:
+        try:
+            column = array(unsigned, values)
+        except OverflowError:
+            # Values sent with a wider two's complement representation ( e.g. Int8 as 32 bits ), truncate them.
+            mask = (1 << (8 * array(unsigned).itemsize)) - 1
+            column = array(unsigned, [value & mask for value in values])
+        if unsigned != typecode:
+            column = array(typecode, column.tobytes())
+
+    if numpy is not None:
+        return numpy.frombuffer(column, dtype=_DATASET_NUMPY_KINDS[typecode] + str(column.itemsize))
+    return column
+
+
+def getDatasetColumns(dataset):
+    """
+    Decode a protobuf DataSet into typed columns, reading the rows directly.
+
+    Args:
+        dataset: Payload.DataSet protobuf object
+
+    Returns: dictionary of column name -> column values. Numeric columns are array.array objects ( or NumPy
+             arrays if NumPy is installed ), boolean and string columns are lists.
+    """
+    columns = {}
+    rows = [row.elements for row in dataset.rows]
+
+    for idx, (name, column_type) in enumerate(zip(dataset.columns, dataset.types)):
+        cells = [elements[idx] for elements in rows]
+        field, typecode = _DATASET_COLUMN_TYPES.get(column_type, (None, None))
+
+        # Unknown column type, or values not sent in the expected field, decode them one by one.
+        if field is None or (cells and cells[0].WhichOneof("value") != field):
+            columns[name] = [_getDatasetCellValue(cell) for cell in cells]
+            continue
+
+        values = list(map(attrgetter(field), cells))
+        columns[name] = values if typecode is None else _getTypedColumn(values, typecode)
+
+    return columns
+
+
+def getDatasetColumnList(values, column_type=None) -> list:
+    """
+    Convert a decoded DataSet column ( see getDatasetColumns ) into a list of python values.
+
+    Float values are stored as float32 in the columns, they are converted into their shortest decimal
+    representation, as the Float metric values ( e.g. 22.1 instead of 22.100000381469727 ).
+
+    Args:
+        values: column values, array.array, NumPy array or list
+        column_type: DataSetDataType of the column
+
+    Returns: list of values
+    """
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+    if column_type == DataSetDataType.Float:
+        values = [float(_getShortestFloat(value)) if value.__class__ is float else value for value in values]
+    return values
+
+
+def getDatasetHeaderDict(dataset):
+    """ DataSet dictionary representation without the rows ( columns and types ) """
+    result = {}
+    if dataset.HasField("num_of_columns"):
+        result["numOfColumns"] = str(dataset.num_of_columns)
+    if len(dataset.columns):
+        result["columns"] = list(dataset.columns)
+    if len(dataset.types):
+        result["types"] = list(dataset.types)
+    return result
+
+
+######################################################################
+# Zero-copy access to the Bytes / File metric values
+#
+# The protobuf runtime copies a bytes field every time it is accessed,
+# so the serialized payload is scanned to locate the value of each
+# metric, and the value is returned as a memoryview slice of the
+# original buffer instead ( no copy, no base64 round trip ).
+######################################################################
+_WIRE_KEY_PAYLOAD_METRICS = (2 << 3) | 2        # Payload.metrics, length delimited
+_WIRE_KEY_METRIC_BYTES_VALUE = (16 << 3) | 2    # Payload.Metric.bytes_value, length delimited
+
+
+def _readVarint(data, pos):
+    """ Read a protobuf varint, returns the value and the next position """
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 64:
+            raise ValueError("Invalid varint at %d" % pos)
+
+
+def _skipField(data, pos, wire_type):
+    """ Skip a protobuf field value, returns the next position """
+    if wire_type == 0:
+        return _readVarint(data, pos)[1]
+    elif wire_type == 1:
+        return pos + 8
+    elif wire_type == 2:
+        length, pos = _readVarint(data, pos)
+        return pos + length
+    elif wire_type == 5:
+        return pos + 4
+    raise ValueError("Unsupported wire type %d" % wire_type)
+
+
+def _getMetricBytesSlice(data, pos, end):
+    """ Offsets of the bytes_value field of a serialized metric, None if not present """
+    result = None
+    while pos < end:
+        key, pos = _readVarint(data, pos)
+        if key == _WIRE_KEY_METRIC_BYTES_VALUE:
+            length, pos = _readVarint(data, pos)
+            result = (pos, pos + length)    # Last value wins, as in the protobuf parser
+            pos += length
+        else:
+            pos = _skipField(data, pos, key & 0x07)
+    if pos != end:
+        raise ValueError("Invalid metric length")
+    return result
+
+
+def getMetricBytesSlices(data):
+    """
+    Locate the Bytes / File value of each metric in a serialized payload, without copying it.
+
+    Args:
+        data: serialized payload ( bytes-like object )
+
+    Returns: list with the (start, end) offsets of each metric bytes value ( None if the metric has no
+             bytes value ), or None if the payload can not be scanned.
+    """
+    slices = []
+    end = len(data)
+    pos = 0
+    try:
+        while pos < end:
+            key, pos = _readVarint(data, pos)
+            if key == _WIRE_KEY_PAYLOAD_METRICS:
+                length, pos = _readVarint(data, pos)
+                slices.append(_getMetricBytesSlice(data, pos, pos + length))
+                pos += length
+            else:
+                pos = _skipField(data, pos, key & 0x07)
+    except (IndexError, ValueError):
+        return None
+    if pos != end:
+        return None
+    return slices
+
+
+class MetricBytesSlices:
+    """
+    memoryview slices of the Bytes / File metric values of a serialized payload.
+
+    The payload is only scanned the first time a value is requested. The slices reference the original
+    buffer, which is kept alive while any of them exists.
+
+    Args:
+        data: serialized payload ( bytes-like object ) the protobuf Payload was parsed from
+        num_metrics: number of metrics of the parsed Payload, used to validate the scan
+    """
+
+    def __init__(self, data, num_metrics):
+        self._data = data
+        self._num_metrics = num_metrics
+        self._slices = None
+        self._view = None
+
+    def get(self, index):
+        """
+        Get the bytes value of a metric
+
+        Args:
+            index: metric index in the payload ( before any metric filter )
+
+        Returns: memoryview of the metric value, None if it can not be located ( value must be copied )
+        """
+        if self._slices is None:
+            slices = getMetricBytesSlices(self._data)
+            if slices is None or len(slices) != self._num_metrics:
+                slices = []
+            self._slices = slices
+            self._view = memoryview(self._data)
+
+        if index >= len(self._slices) or self._slices[index] is None:
+            return None
+        start, end = self._slices[index]
+        return self._view[start:end]
+
+
+def getMetricDict(metric, bytes_slices=None, index=None):
+    """
+    Convert a protobuf metric into its dictionary representation.
+
+    Args:
+        metric: Payload.Metric protobuf object
+        bytes_slices: Optional MetricBytesSlices of the serialized payload. If set, Bytes / File values are
+                      returned as memoryview slices of the payload buffer, in both 'bytesValue' and 'value'.
+        index: metric index in the payload, required with bytes_slices
+
+    Returns: dictionary with the metric fields, and the metric value converted into the 'value' field.
+             DataSet values are decoded into a dictionary of columns ( see getDatasetColumns ), Template values
+             into a dictionary of member values ( see getTemplateDict ).
+    """
+    result = {}
+    datatype = None
+
+    # Header fields ( HasField() is cheaper than ListFields() for the handful of fields of a metric )
+    if metric.HasField("name"):
+        result["name"] = metric.name
+    if metric.HasField("alias"):
+        result["alias"] = metric.alias
+    if metric.HasField("timestamp"):
+        result["timestamp"] = str(metric.timestamp)    # uint64
+    if metric.HasField("datatype"):
+        datatype = result["datatype"] = metric.datatype
+    if metric.HasField("is_historical"):
+        result["isHistorical"] = metric.is_historical
+    if metric.HasField("is_transient"):
+        result["isTransient"] = metric.is_transient
+    if metric.HasField("is_null"):
+        result["isNull"] = metric.is_null
+    if metric.HasField("metadata"):
+        result["metadata"] = MessageToDict(metric.metadata)
+    if metric.HasField("properties"):
+        result["properties"] = MessageToDict(metric.properties)
+
+    # No value ( e.g. null metric )
+    field = metric.WhichOneof("value")
+    if field is None:
+        return result
+
+    # Bytes - Zero-copy, slice of the payload buffer
+    if field == "bytes_value" and bytes_slices is not None:
+        value = bytes_slices.get(index)
+        if value is not None:
+            result["bytesValue"] = value
+            result["value"] = value
+            return result
+
+    value = getattr(metric, field)
+
+    # DataSet - Columns and types in 'datasetValue', rows decoded into typed columns in 'value'
+    if field == "dataset_value":
+        result["datasetValue"] = getDatasetHeaderDict(value)
+        result["value"] = getDatasetColumns(value)
+        return result
+
+    # Template - Definition / instance in 'templateValue', member values in 'value'
+    if field == "template_value":
+        template = result["templateValue"] = getTemplateDict(value)
+        result["value"] = {member.get("name"): member.get("value") for member in template.get("metrics", [])}
+        return result
+
+    json_value = _getJsonValue(field, value)
+
+    # Parse the value into its python type ( int and bytes fields are already typed )
+    if datatype in _METRIC_INT_TYPES and (field == "int_value" or field == "long_value"):
+        pass
+    elif datatype in _METRIC_BYTES_TYPES and field == "bytes_value":
+        pass
+    elif datatype in _METRIC_FLOAT_TYPES:
+        value = float(json_value)
+    elif datatype in _METRIC_INT_TYPES:
+        value = int(json_value)
+    elif datatype == MetricDataType.Boolean:
+        value = bool(json_value)
+    elif datatype == MetricDataType.DateTime:
+        value = json_value
+        try:
+            value = datetime.fromtimestamp(int(json_value) / 1000)
+        except Exception:
+            pass
+    elif datatype in _METRIC_BYTES_TYPES:
+        value = json_value
+        try:
+            value = base64.b64decode(json_value)
+        except Exception:
+            pass
+    elif datatype is None and field != "float_value":
+        pass    # No datatype ( template instance members ), native value of the field
+    else:
+        value = json_value
+
+    result[_METRIC_VALUE_KEYS[field]] = json_value
+    result["value"] = value
+    return result
+
+
+def _getTemplateMemberDict(metric):
+    """ Template member to dictionary, members of instances have only the name and the value """
+    field = metric.WhichOneof("value")
+    if field is None or metric.HasField("datatype") or metric.HasField("timestamp"):
+        return getMetricDict(metric)
+    value = getattr(metric, field)
+    json_value = _getJsonValue(field, value)
+    return {
+        "name": metric.name,
+        _METRIC_VALUE_KEYS[field]: json_value,
+        "value": json_value if field == "float_value" else value,
+    }
+
+
+def getTemplateDict(template):
+    """
+    Convert a protobuf Template ( definition or instance ) into its dictionary representation.
+
+    Args:
+        template: Payload.Template protobuf object
+
+    Returns: dictionary with the template fields, members converted with getMetricDict in 'metrics'
+    """
+    result = {}
+    if template.HasField("version"):
+        result["version"] = template.version
+    if len(template.metrics):
+        result["metrics"] = [_getTemplateMemberDict(metric) for metric in template.metrics]
+    if len(template.parameters):
+        result["parameters"] = [MessageToDict(parameter) for parameter in template.parameters]
+    if template.HasField("template_ref"):
+        result["templateRef"] = template.template_ref
+    if template.HasField("is_definition"):
+        result["isDefinition"] = template.is_definition
+    return result
+
+
+def getPayloadDict(payload, metric_filter=None, data=None):
+    """
+    Convert a protobuf payload into its dictionary representation.
+
+    Args:
+        payload: Payload protobuf object
+        metric_filter: Optional metric filter ( object with a match(name) method ), metrics that don't match
+                       are not converted nor included in the dictionary.
+        data: Optional serialized payload the protobuf object was parsed from. If set, Bytes / File metric
+              values are returned as memoryview slices of it ( zero-copy, see MetricBytesSlices ).
+
+    Returns: dictionary with the payload fields and the list of metrics dictionaries.
+    """
+    result = {}
+    for field, field_value in payload.ListFields():
+        number = field.number
+        if number == 1:
+            result["timestamp"] = str(field_value)
+        elif number == 2:
+            if data is not None:
+                bytes_slices = MetricBytesSlices(data, len(field_value))
+                match = metric_filter.match if metric_filter is not None else None
+                result["metrics"] = [getMetricDict(metric, bytes_slices, idx)
+                                     for idx, metric in enumerate(field_value)
+                                     if match is None or match(metric.name)]
+            elif metric_filter is None:
+                result["metrics"] = [getMetricDict(metric) for metric in field_value]
+            else:
+                match = metric_filter.match
+                result["metrics"] = [getMetricDict(metric) for metric in field_value if match(metric.name)]
+        elif number == 3:
+            result["seq"] = str(field_value)
+        elif number == 4:
+            result["uuid"] = field_value
+        elif number == 5:
+            result["body"] = base64.b64encode(field_value).decode("utf-8")
+    return result
+
+
+######################################################################
+# Lazy views over a protobuf Payload
+#
+# Same dictionary interface as getPayloadDict(), but each metric is only
+# converted ( getMetricDict ) when it is accessed.
+######################################################################
+class LazyMetricList(Sequence):
+    """
+    Read-only list of metric dictionaries, materialized on access.
+
+    Args:
+        metrics: Payload.metrics protobuf repeated field
+        metric_filter: Optional metric filter ( object with a match(name) method ), metrics that don't match
+                       are not part of the list.
+        bytes_slices: Optional MetricBytesSlices, Bytes / File values are returned as memoryview slices.
+    """
+
+    def __init__(self, metrics, metric_filter=None, bytes_slices=None):
+        self._indices = None
+        if metric_filter is not None:
+            match = metric_filter.match
+            if bytes_slices is None:
+                metrics = [metric for metric in metrics if match(metric.name)]
+            else:
+                # Keep the payload index of each metric to locate its bytes value
+                self._indices = [idx for idx, metric in enumerate(metrics) if match(metric.name)]
+                metrics = [metrics[idx] for idx in self._indices]
+        self._metrics = metrics
+        self._bytes_slices = bytes_slices
+        self._items = [None] * len(metrics)
+        self._names = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if item is None:
+            if self._bytes_slices is None:
+                item = getMetricDict(self._metrics[index])
+            else:
+                if index < 0:
+                    index += len(self._items)
+                payload_index = index if self._indices is None else self._indices[index]
+                item = getMetricDict(self._metrics[index], self._bytes_slices, payload_index)
+            self._items[index] = item
+        return item
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyMetricList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __str__(self):
+        return str(list(self))
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def names(self):
+        """ List of metric names ( metric values are not materialized ) """
+        return [metric.name for metric in self._metrics]
+
+    def get(self, name, default=None):
+        """
+        Get a metric dictionary by its name
+
+        Args:
+            name: metric name
+            default: value returned if the metric is not found
+
+        Returns: metric dictionary
+        """
+        if self._names is None:
+            self._names = {}
+            for idx, metric in enumerate(self._metrics):
+                self._names.setdefault(metric.name, idx)
+        idx = self._names.get(name)
+        if idx is None:
+            return default
+        return self[idx]
+
+
+class LazyPayload(MutableMapping):
+    """
+    Payload dictionary over a parsed protobuf Payload. Metrics are only converted when accessed.
+
+    The protobuf fields are read-only, extra keys ( e.g. 'timestamp_rx' ) can be added to the object.
+
+    Args:
+        payload: Payload protobuf object
+        metric_filter: Optional metric filter ( object with a match(name) method ), metrics that don't match
+                       are not part of the payload metrics.
+        data: Optional serialized payload the protobuf object was parsed from. If set, Bytes / File metric
+              values are returned as memoryview slices of it ( zero-copy, see MetricBytesSlices ).
+    """
+
+    def __init__(self, payload, metric_filter=None, data=None):
+        self._payload = payload
+        self._metric_filter = metric_filter
+        self._data = data
+        self._metrics = None
+        self._extra = {}
+
+    @property
+    def pb_payload(self):
+        """ Parsed protobuf Payload object """
+        return self._payload
+
+    def _keys(self):
+        payload = self._payload
+        keys = []
+        if payload.HasField("timestamp"):
+            keys.append("timestamp")
+        if len(payload.metrics):
+            keys.append("metrics")  # Also if the metric filter removes every metric, as getPayloadDict()
+        if payload.HasField("seq"):
+            keys.append("seq")
+        if payload.HasField("uuid"):
+            keys.append("uuid")
+        if payload.HasField("body"):
+            keys.append("body")
+        keys.extend(self._extra.keys())
+        return keys
+
+    def __getitem__(self, key):
+        payload = self._payload
+        if key in self._extra:
+            return self._extra[key]
+        elif key == "metrics" and len(payload.metrics):
+            if self._metrics is None:
+                bytes_slices = None
+                if self._data is not None:
+                    bytes_slices = MetricBytesSlices(self._data, len(payload.metrics))
+                self._metrics = LazyMetricList(payload.metrics, self._metric_filter, bytes_slices)
+            return self._metrics
+        elif key == "timestamp" and payload.HasField("timestamp"):
+            return str(payload.timestamp)
+        elif key == "seq" and payload.HasField("seq"):
+            return str(payload.seq)
+        elif key == "uuid" and payload.HasField("uuid"):
+            return payload.uuid
+        elif key == "body" and payload.HasField("body"):
+            return base64.b64encode(payload.body).decode("utf-8")
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in ("timestamp", "metrics", "seq", "uuid", "body"):
+            raise TypeError("LazyPayload protobuf field '%s' is read-only" % key)
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        del self._extra[key]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __str__(self):
+        return str(self.as_dict())
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+    def copy(self):
+        """ New view over the same protobuf Payload, sharing the converted metrics but not the extra keys """
+        result = LazyPayload(self._payload, self._metric_filter, self._data)
+        result._metrics = self._metrics
+        result._extra = dict(self._extra)
+        return result
+
+    def as_dict(self):
+        """ Get the full payload dictionary, all metrics are materialized ( same as getPayloadDict ) """
+        result = {}
+        for key in self._keys():
+            value = self[key]
+            result[key] = list(value) if key == "metrics" else value
+        return result
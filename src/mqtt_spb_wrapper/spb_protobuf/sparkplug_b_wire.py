@@ -0,0 +1,664 @@
+"""
+Sparkplug B payload wire format encoder
+
+Encodes DATA payloads of scalar metrics straight into the protobuf wire format, without building the protobuf
+message objects. The fields are written in field number order, as the protobuf serializer does, so the encoded
+bytes are the same as the ones of the Payload message ( sparkplug_b_pb2 ).
+
+Metrics that can not be written ( DataSet, Template, or values the protobuf fields would reject ) switch the
+writer to a protobuf Payload message, parsed from the bytes already written.
+
+DataSet rows are also written in the wire format, column by column, and merged into the DataSet message.
+The compact timestamps of list values are encoded as delta of delta varints.
+"""
+import struct
+import time
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice, repeat
+from numbers import Integral, Real
+
+from .sparkplug_b_pb2 import Payload
+from .sparkplug_b import MetricDataType, DataSetDataType, getSeqNum, addMetric, addNullMetric
+from .sparkplug_b import addMetricDataset_from_dict, setMetricProperties
+
+try:
+    import numpy
+except ImportError:     # NumPy is optional, NumPy array columns are only accepted if it is installed
+    numpy = None
+
+# Field tags ( field number << 3 | wire type )
+_TAG_PAYLOAD_TIMESTAMP = b"\x08"     # 1, varint
+_TAG_PAYLOAD_METRIC = b"\x12"        # 2, length delimited
+_TAG_PAYLOAD_SEQ = b"\x18"           # 3, varint
+_TAG_METRIC_NAME = b"\x0a"           # 1, length delimited
+_TAG_METRIC_ALIAS = b"\x10"          # 2, varint
+_TAG_METRIC_TIMESTAMP = b"\x18"      # 3, varint
+_TAG_METRIC_DATATYPE = b"\x20"       # 4, varint
+_TAG_METRIC_IS_NULL = b"\x38\x01"    # 7, varint, True
+
+_UINT32_MAX = 0xFFFFFFFF
+_UINT64_MAX = 0xFFFFFFFFFFFFFFFF
+
+_packFloat = struct.Struct("<f").pack
+_packDouble = struct.Struct("<d").pack
+
+
+_VARINT_BYTES = tuple(bytes((value,)) for value in range(0x80))    # One byte varints
+
+
+def _isUInt64(value) -> bool:
+    """ True if the value can be written as an unsigned varint field ( alias, timestamp ), None excluded """
+    return value.__class__ is int and 0 <= value <= _UINT64_MAX
+
+
+def encodeVarint(value: int) -> bytes:
+    """ Varint encoding of an unsigned integer, the value is not checked ( see _isUInt64 ) """
+    if value < 0x80:
+        return _VARINT_BYTES[value]
+    if value < 0x4000:
+        return bytes((value & 0x7F | 0x80, value >> 7))
+    if value < 0x200000:
+        return bytes((value & 0x7F | 0x80, value >> 7 & 0x7F | 0x80, value >> 14))
+    if value < 0x10000000:
+        return bytes((value & 0x7F | 0x80, value >> 7 & 0x7F | 0x80, value >> 14 & 0x7F | 0x80, value >> 21))
+    if value < 0x800000000:
+        return bytes((value & 0x7F | 0x80, value >> 7 & 0x7F | 0x80, value >> 14 & 0x7F | 0x80,
+                      value >> 21 & 0x7F | 0x80, value >> 28))
+    if value < 0x40000000000:   # Millisecond timestamps
+        return bytes((value & 0x7F | 0x80, value >> 7 & 0x7F | 0x80, value >> 14 & 0x7F | 0x80,
+                      value >> 21 & 0x7F | 0x80, value >> 28 & 0x7F | 0x80, value >> 35))
+    result = bytearray()
+    while value > 0x7F:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+
+@lru_cache(maxsize=4096)
+def _getNameField(name: str) -> bytes:
+    """ Encoded metric name field, metric names are repeated on every message """
+    data = name.encode("utf-8")
+    return _TAG_METRIC_NAME + encodeVarint(len(data)) + data
+
+
+def _uint32Field(tag, datatype, offset=0):
+    prefix = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag
+
+    def encode(value):
+        if value.__class__ is not int:
+            return None
+        if value < 0:
+            value += offset
+        if value < 0 or value > _UINT32_MAX:
+            return None
+        return prefix + encodeVarint(value)
+    return encode
+
+
+def _uint64Field(tag, datatype, offset=0):
+    prefix = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag
+
+    def encode(value):
+        if value.__class__ is not int:
+            return None
+        if value < 0:
+            value += offset
+        if value < 0 or value > _UINT64_MAX:
+            return None
+        return prefix + encodeVarint(value)
+    return encode
+
+
+def _floatField(tag, datatype, pack):
+    prefix = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag
+
+    def encode(value):
+        if value.__class__ is not float and value.__class__ is not int:
+            return None
+        try:
+            return prefix + pack(value)
+        except (OverflowError, struct.error):
+            return None
+    return encode
+
+
+def _booleanField(tag, datatype):
+    true_value = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag + b"\x01"
+    false_value = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag + b"\x00"
+
+    def encode(value):
+        if value is True:
+            return true_value
+        if value is False:
+            return false_value
+        return None
+    return encode
+
+
+def _stringField(tag, datatype):
+    prefix = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag
+
+    def encode(value):
+        if value.__class__ is not str:
+            return None
+        data = value.encode("utf-8")
+        return prefix + encodeVarint(len(data)) + data
+    return encode
+
+
+def _bytesField(tag, datatype):
+    prefix = _TAG_METRIC_DATATYPE + encodeVarint(datatype) + tag
+
+    def encode(value):
+        if value.__class__ is not bytes:
+            return None
+        return prefix + encodeVarint(len(value)) + value
+    return encode
+
+
+# Metric value field encoders by datatype, datatype and value fields of the metric. They return None if the
+# value can not be written, the metric is then added with the protobuf helpers.
+_VALUE_FIELD_ENCODERS = {
+    MetricDataType.Int8: _uint32Field(b"\x50", MetricDataType.Int8, 0x100),
+    MetricDataType.Int16: _uint32Field(b"\x50", MetricDataType.Int16, 0x10000),
+    MetricDataType.Int32: _uint32Field(b"\x50", MetricDataType.Int32, 0x100000000),
+    MetricDataType.Int64: _uint64Field(b"\x58", MetricDataType.Int64, 0x10000000000000000),
+    MetricDataType.UInt8: _uint32Field(b"\x50", MetricDataType.UInt8),
+    MetricDataType.UInt16: _uint32Field(b"\x50", MetricDataType.UInt16),
+    MetricDataType.UInt32: _uint32Field(b"\x50", MetricDataType.UInt32),
+    MetricDataType.UInt64: _uint64Field(b"\x58", MetricDataType.UInt64),
+    MetricDataType.Float: _floatField(b"\x65", MetricDataType.Float, _packFloat),
+    MetricDataType.Double: _floatField(b"\x69", MetricDataType.Double, _packDouble),
+    MetricDataType.Boolean: _booleanField(b"\x70", MetricDataType.Boolean),
+    MetricDataType.String: _stringField(b"\x7a", MetricDataType.String),
+    MetricDataType.DateTime: _uint64Field(b"\x58", MetricDataType.DateTime),
+    MetricDataType.Text: _stringField(b"\x7a", MetricDataType.Text),
+    MetricDataType.UUID: _stringField(b"\x7a", MetricDataType.UUID),
+    MetricDataType.Bytes: _bytesField(b"\x82\x01", MetricDataType.Bytes),
+    MetricDataType.File: _bytesField(b"\x82\x01", MetricDataType.File),
+}
+
+# Datatype fields of the null metrics
+_NULL_DATATYPE_FIELDS = {datatype: _TAG_METRIC_DATATYPE + encodeVarint(datatype) + _TAG_METRIC_IS_NULL
+                         for datatype in _VALUE_FIELD_ENCODERS}
+
+
+class PayloadWriter:
+    """
+    DATA payload written straight into the protobuf wire format
+
+    Same header as getDdataPayload(), the timestamp and the next sequence number. Metrics are added with
+    add_metric() / add_null_metric(), other metrics are added to the protobuf message returned by get_message(),
+    after which the writer only uses the message.
+    """
+
+    __slots__ = ("buffer", "count", "seq", "message", "_timestamp", "_timestamp_field")
+
+    def __init__(self):
+        self.buffer = bytearray(_TAG_PAYLOAD_TIMESTAMP)
+        self.buffer += encodeVarint(int(round(time.time() * 1000)))
+        self.seq = getSeqNum()
+        self.count = 0
+        self.message = None     # Protobuf message, once a metric could not be written
+        self._timestamp = None  # Last metric timestamp and its encoded field, metrics often share the timestamp
+        self._timestamp_field = None
+
+    def _write_metric(self, name, alias, timestamp, fields: bytes):
+        """ Write a metric, with its name, alias and timestamp fields, and the datatype and value fields """
+        metric = _getNameField(name) if name is not None else b""
+        if alias is not None:
+            metric += _TAG_METRIC_ALIAS + encodeVarint(alias)
+        if timestamp != self._timestamp:
+            self._timestamp = timestamp
+            self._timestamp_field = _TAG_METRIC_TIMESTAMP + encodeVarint(timestamp)
+        metric += self._timestamp_field
+        metric += fields
+
+        buffer = self.buffer
+        buffer += _TAG_PAYLOAD_METRIC
+        buffer += encodeVarint(len(metric))
+        buffer += metric
+        self.count += 1
+
+    def add_metric(self, name, alias, datatype, value, timestamp=None):
+        if self.message is None and (name is None or name.__class__ is str) and (alias is None or _isUInt64(alias)) \
+                and (timestamp is None or _isUInt64(timestamp)):
+            encoder = _VALUE_FIELD_ENCODERS.get(datatype)
+            fields = encoder(value) if encoder is not None else None
+            if fields is not None:
+                if timestamp is None:
+                    timestamp = int(round(time.time() * 1000))
+                self._write_metric(name, alias, timestamp, fields)
+                return
+        addMetric(self.get_message(), name, alias, datatype, value, timestamp)
+
+    def add_null_metric(self, name, alias, datatype):
+        fields = _NULL_DATATYPE_FIELDS.get(datatype)
+        if self.message is None and fields is not None and (name is None or name.__class__ is str) and \
+                (alias is None or _isUInt64(alias)):
+            self._write_metric(name, alias, int(round(time.time() * 1000)), fields)
+            return
+        addNullMetric(self.get_message(), name, alias, datatype)
+
+    def add_dataset_metric(self, name, alias, data: dict, types: dict = None, timestamp=None, properties=None):
+        """ Add a DataSet metric from a dictionary of columns, see addMetricDataset_from_dict() """
+        if self.message is None and (name is None or name.__class__ is str) and (alias is None or _isUInt64(alias)) \
+                and (timestamp is None or _isUInt64(timestamp)):
+            column_types = getDatasetTypes(data, types)
+            dataset = [_TAG_DATASET_NUM_OF_COLUMNS, encodeVarint(len(column_types))]
+            for column in data:
+                column = column.encode("utf-8")
+                dataset += (_TAG_DATASET_COLUMN, encodeVarint(len(column)), column)
+            for column_type in column_types:
+                dataset += (_TAG_DATASET_TYPE, encodeVarint(column_type))
+            dataset.append(encodeDatasetRows(list(data.values()), column_types))
+            dataset = b"".join(dataset)
+
+            # Properties ( 9 ) between the datatype ( 4 ) and the value ( 17 ) fields
+            fields = _DATASET_DATATYPE_FIELD
+            if properties:
+                metric = Payload.Metric()
+                setMetricProperties(metric, properties)
+                fields = _DATASET_DATATYPE + metric.SerializeToString() + _TAG_METRIC_DATASET
+
+            if timestamp is None:
+                timestamp = int(round(time.time() * 1000))
+            self._write_metric(name, alias, timestamp, fields + encodeVarint(len(dataset)) + dataset)
+            return
+        addMetricDataset_from_dict(self.get_message(), name, alias, data, types, properties)
+        if timestamp is not None:
+            self.message.metrics[-1].timestamp = timestamp
+
+    def get_message(self):
+        """ Protobuf Payload message of the writer, with the metrics already written """
+        if self.message is None:
+            self.message = Payload.FromString(bytes(self.buffer))
+            self.message.seq = self.seq
+        return self.message
+
+    def metrics_count(self) -> int:
+        if self.message is not None:
+            return len(self.message.metrics)
+        return self.count
+
+    def encode(self) -> bytes:
+        if self.message is not None:
+            return self.message.SerializeToString()
+        return b"".join((self.buffer, _TAG_PAYLOAD_SEQ, encodeVarint(self.seq)))   # Single copy of the buffer
+
+
+# DataSet message fields, DataSet.rows ( 4 ) of Row.elements ( 1 ) of DataSetValue
+_DATASET_DATATYPE = _TAG_METRIC_DATATYPE + encodeVarint(MetricDataType.DataSet)
+_TAG_METRIC_DATASET = b"\x8a\x01"     # 17, length delimited
+_DATASET_DATATYPE_FIELD = _DATASET_DATATYPE + _TAG_METRIC_DATASET
+_TAG_DATASET_NUM_OF_COLUMNS = b"\x08"
+_TAG_DATASET_COLUMN = b"\x12"
+_TAG_DATASET_TYPE = b"\x18"
+_TAG_DATASET_ROW = b"\x22"
+_DATASET_NULL_ELEMENT = b"\x0a\x00"  # Element without value
+_DATASET_BOOLEAN_ELEMENTS = (b"\x0a\x02\x28\x00", b"\x0a\x02\x28\x01")
+_DATASET_FLOAT_ELEMENTS = {     # Element prefix, struct format and size of the fixed size values
+    DataSetDataType.Float: (b"\x0a\x05\x1d", "f", 4),
+    DataSetDataType.Double: (b"\x0a\x09\x21", "d", 8),
+}
+_DATASET_INTEGER_ELEMENTS = {   # Element prefixes by varint size, value bits and signed integer type
+    datatype: ([bytes((0x0a, 1 + size, tag)) for size in range(11)], bits, signed)
+    for datatype, tag, bits, signed in (
+        (DataSetDataType.Int8, 0x08, 8, True),
+        (DataSetDataType.Int16, 0x08, 16, True),
+        (DataSetDataType.Int32, 0x08, 32, True),
+        (DataSetDataType.Int64, 0x10, 64, True),
+        (DataSetDataType.UInt8, 0x08, 8, False),
+        (DataSetDataType.UInt16, 0x08, 16, False),
+        (DataSetDataType.UInt32, 0x08, 32, False),
+        (DataSetDataType.UInt64, 0x10, 64, False),
+        (DataSetDataType.DateTime, 0x10, 64, False),
+    )
+}
+
+# Column types of the integer arrays, by item size
+_DATASET_SIGNED_TYPES = {1: DataSetDataType.Int8, 2: DataSetDataType.Int16, 4: DataSetDataType.Int32,
+                         8: DataSetDataType.Int64}
+_DATASET_UNSIGNED_TYPES = {1: DataSetDataType.UInt8, 2: DataSetDataType.UInt16, 4: DataSetDataType.UInt32,
+                           8: DataSetDataType.UInt64}
+
+
+def _getValuesDatasetType(values) -> int:
+    """ DataSet column type of a sequence of python values, None values are ignored """
+    types = set()
+    for value_type in set(map(type, values)):
+        if value_type is type(None):
+            continue
+        elif issubclass(value_type, bool) or (numpy is not None and issubclass(value_type, numpy.bool_)):
+            types.add(DataSetDataType.Boolean)
+        elif issubclass(value_type, Integral):
+            types.add(DataSetDataType.Int64)
+        elif issubclass(value_type, Real):
+            types.add(DataSetDataType.Double)
+        elif issubclass(value_type, str):
+            types.add(DataSetDataType.String)
+        elif issubclass(value_type, datetime):
+            types.add(DataSetDataType.DateTime)
+        else:
+            raise ValueError(f"Unsupported data type: {value_type}")
+
+    if not types:
+        return DataSetDataType.String   # No values, any type is valid
+    if types == {DataSetDataType.Int64, DataSetDataType.Double}:
+        return DataSetDataType.Double
+    if len(types) > 1:
+        raise ValueError(f"Mixed data types in the column values: {types}")
+
+    column_type = types.pop()
+    if column_type == DataSetDataType.Int64 and \
+            max(values if None not in values else [v for v in values if v is not None]) > 0x7FFFFFFFFFFFFFFF:
+        return DataSetDataType.UInt64
+    return column_type
+
+
+def getDatasetColumnType(values) -> int:
+    """
+    DataSet column type of a column of values
+
+    The type of NumPy arrays and array.array columns is their item type ( Float or Double, integer widths ).
+    The type of other sequences is inferred from the python types of all the values: Int64 for integers ( UInt64
+    if larger ), Double for floats, Boolean, String or DateTime.
+
+    Args:
+        values: column values, list, tuple, array.array or NumPy array
+
+    Returns: DataSetDataType
+    """
+    dtype = getattr(values, "dtype", None)
+    if dtype is not None:
+        kind, size = dtype.kind, dtype.itemsize
+        if kind == "i" and size in _DATASET_SIGNED_TYPES:
+            return _DATASET_SIGNED_TYPES[size]
+        if kind == "u" and size in _DATASET_UNSIGNED_TYPES:
+            return _DATASET_UNSIGNED_TYPES[size]
+        if kind == "f":
+            return DataSetDataType.Float if size <= 4 else DataSetDataType.Double
+        if kind == "b":
+            return DataSetDataType.Boolean
+        if kind == "U":
+            return DataSetDataType.String
+        if kind == "M":
+            return DataSetDataType.DateTime
+        if kind != "O":
+            raise ValueError(f"Unsupported data type: {dtype}")
+        return _getValuesDatasetType(values.tolist())
+
+    typecode = getattr(values, "typecode", None)
+    if typecode is not None:
+        if typecode in "bhilq":
+            return _DATASET_SIGNED_TYPES[values.itemsize]
+        if typecode in "BHILQ":
+            return _DATASET_UNSIGNED_TYPES[values.itemsize]
+        if typecode == "f":
+            return DataSetDataType.Float
+        if typecode == "d":
+            return DataSetDataType.Double
+        raise ValueError(f"Unsupported array typecode: {typecode}")
+
+    return _getValuesDatasetType(values)
+
+
+def getDatasetTypes(data: dict, types: dict = None) -> list:
+    """
+    DataSet column types of a dictionary of columns, the given types or inferred from the column values
+
+    Args:
+        data: dictionary of columns ( column name -> values ), all the columns of the same length
+        types: column types ( column name -> DataSetDataType ), None to infer all of them
+
+    Returns: list of DataSetDataType, in the columns order
+    """
+    lengths = [len(v) for v in data.values()]
+    if len(set(lengths)) > 1:
+        raise ValueError(f"All columns must have the same number of rows, but got lengths: {lengths}")
+    if types is None:
+        types = {}
+    return [types[column] if column in types else getDatasetColumnType(values) for column, values in data.items()]
+
+
+def _getColumnValues(values, column_type):
+    """ Column values as a list of python values, datetimes as milliseconds for the DateTime columns """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind == "M":
+            return values.astype("datetime64[ms]").astype("int64").tolist()
+        return values.tolist()
+    if isinstance(values, array):
+        return values.tolist()
+    if column_type == DataSetDataType.DateTime:
+        return [int(v.timestamp() * 1000) if isinstance(v, datetime) else v for v in values]
+    return values
+
+
+def _getIntegerValues(values, column_type, bits, signed):
+    """ Integer values checked against the column type range, negative values as two's complement """
+    if not values:
+        return values
+    low, high = min(values), max(values)
+    if low < (-(1 << (bits - 1)) if signed else 0) or high >= (1 << (bits - (1 if signed else 0))):
+        raise ValueError(f"Column values out of range for the type {column_type}: {low}, {high}")
+    if low < 0:     # Two's complement, as the metric values
+        offset = 1 << bits
+        values = [v + offset if v < 0 else v for v in values]
+    return values
+
+
+def _encodeStringElement(value) -> bytes:
+    if value.__class__ is not str:
+        raise ValueError(f"Unsupported value type: {type(value)}")
+    data = value.encode("utf-8")
+    field = b"\x32" + encodeVarint(len(data)) + data
+    return b"\x0a" + encodeVarint(len(field)) + field
+
+
+def _encodeDatasetElements(values, column_type) -> list:
+    """ Encoded Row.elements fields of a column of values, None values are sent as elements without value """
+    values = _getColumnValues(values, column_type)
+    if None in values:
+        encoded = iter(_encodeDatasetElements([v for v in values if v is not None], column_type))
+        return [_DATASET_NULL_ELEMENT if v is None else next(encoded) for v in values]
+
+    integer = _DATASET_INTEGER_ELEMENTS.get(column_type)
+    if integer is not None:
+        prefixes, bits, signed = integer
+        values = _getIntegerValues(values, column_type, bits, signed)
+        return [prefixes[len(v)] + v for v in map(encodeVarint, values)]
+
+    fixed = _DATASET_FLOAT_ELEMENTS.get(column_type)
+    if fixed is not None:
+        prefix, fmt, size = fixed
+        try:
+            return list(map(struct.Struct("<3s" + fmt).pack, repeat(prefix, len(values)), values))
+        except (OverflowError, struct.error) as e:
+            raise ValueError(f"Column values invalid for the type {column_type}: {e}")
+
+    if column_type == DataSetDataType.Boolean:
+        return [_DATASET_BOOLEAN_ELEMENTS[1] if v else _DATASET_BOOLEAN_ELEMENTS[0] for v in values]
+
+    if column_type == DataSetDataType.String or column_type == DataSetDataType.Text:
+        # String columns often repeat a few values ( states, units ), each value is encoded once
+        try:
+            elements = {value: _encodeStringElement(value) for value in set(values)}
+        except TypeError:
+            raise ValueError(f"Unsupported value type in the column {column_type} values")
+        return list(map(elements.__getitem__, values))
+
+    raise ValueError(f"Unsupported data type: {column_type}")
+
+
+if numpy is not None:
+    _VARINT_SHIFTS = numpy.arange(0, 70, 7, dtype=numpy.uint64)
+    _VARINT_LIMITS = numpy.left_shift(numpy.uint64(1), _VARINT_SHIFTS[1:])
+    _VARINT_INDEXES = numpy.arange(10)
+
+
+def _getVarintArrays(values):
+    """ Varint encoding of an array of uint64 values ( NumPy ), as a ( values, 10 ) bytes array and the sizes """
+    values = values[:, None]
+    sizes = 1 + (values >= _VARINT_LIMITS).sum(axis=1)
+    data = ((values >> _VARINT_SHIFTS) & numpy.uint64(0x7F)).astype(numpy.uint8)
+    data |= (_VARINT_INDEXES < (sizes - 1)[:, None]).astype(numpy.uint8) << 7
+    return data, sizes
+
+
+def _getPrefixedArray(prefix: bytes, data, sizes=None):
+    """ Rows of bytes with a prefix ( NumPy ), flattened, of the given sizes ( without prefix ) if not all used """
+    rows = numpy.empty((len(data), len(prefix) + data.shape[1]), dtype=numpy.uint8)
+    rows[:, :len(prefix)] = numpy.frombuffer(prefix, dtype=numpy.uint8)
+    rows[:, len(prefix):] = data
+    if sizes is None:
+        return rows.ravel()
+    return rows[numpy.arange(rows.shape[1]) < (sizes + len(prefix))[:, None]]
+
+
+def _getIntegerArray(values, column_type, bits, signed):
+    """ NumPy integer array as uint64 values, checked against the column type range, as two's complement """
+    if values.dtype.kind not in "iub":
+        raise ValueError(f"Column values invalid for the type {column_type}: {values.dtype}")
+    low, high = int(values.min()), int(values.max())
+    if low < (-(1 << (bits - 1)) if signed else 0) or high >= (1 << (bits - (1 if signed else 0))):
+        raise ValueError(f"Column values out of range for the type {column_type}: {low}, {high}")
+    if low < 0:
+        values = values.astype("u%d" % (bits // 8))
+    return values.astype(numpy.uint64)
+
+
+def _encodeDatasetColumn(values, column_type):
+    """ Encoded Row.elements fields of a column of values ( NumPy ), as a bytes array and the elements sizes """
+    if not isinstance(values, numpy.ndarray) or values.dtype.kind not in "iufb":
+        values = _getColumnValues(values, column_type)
+    if len(values) and (values.__class__ is numpy.ndarray or None not in values):
+        integer = _DATASET_INTEGER_ELEMENTS.get(column_type)
+        if integer is not None:
+            prefixes, bits, signed = integer
+            if values.__class__ is numpy.ndarray:
+                values = _getIntegerArray(values, column_type, bits, signed)
+            else:
+                values = numpy.array(_getIntegerValues(values, column_type, bits, signed), dtype=numpy.uint64)
+            data, sizes = _getVarintArrays(values)
+            elements = numpy.empty((len(data), 13), dtype=numpy.uint8)
+            elements[:, 0] = 0x0a                           # Row.elements, size and DataSetValue field tag
+            elements[:, 1] = sizes + 1
+            elements[:, 2] = prefixes[0][2]
+            elements[:, 3:] = data
+            return elements[numpy.arange(13) < (sizes + 3)[:, None]], sizes + 3
+
+        fixed = _DATASET_FLOAT_ELEMENTS.get(column_type)
+        if fixed is not None:
+            prefix, fmt, size = fixed
+            try:
+                data = numpy.asarray(values, dtype="<" + fmt)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Column values invalid for the type {column_type}: {e}")
+            data = _getPrefixedArray(prefix, data.view(numpy.uint8).reshape(len(data), size))
+            return data, numpy.full(len(values), len(prefix) + size)
+
+        if column_type == DataSetDataType.Boolean:
+            data = numpy.asarray(values, dtype=bool).view(numpy.uint8).reshape(len(values), 1)
+            return _getPrefixedArray(_DATASET_BOOLEAN_ELEMENTS[0][:3], data), numpy.full(len(values), 4)
+
+    # Strings and columns with null values, element by element
+    elements = _encodeDatasetElements(values, column_type)
+    return numpy.frombuffer(b"".join(elements), dtype=numpy.uint8), \
+        numpy.fromiter(map(len, elements), dtype=numpy.intp, count=len(elements))
+
+
+def _joinDatasetRows(columns: list) -> bytes:
+    """
+    Join the encoded elements of the columns into rows ( NumPy ), the bytes of the rows are gathered from the
+    columns in a single pass.
+
+    Args:
+        columns: list of the column bytes arrays and elements sizes ( _encodeDatasetColumn )
+    """
+    sizes = numpy.stack([column_sizes for _, column_sizes in columns], axis=1)
+    header, header_sizes = _getVarintArrays(sizes.sum(axis=1).astype(numpy.uint64))
+    columns = [(_getPrefixedArray(_TAG_DATASET_ROW, header, header_sizes), header_sizes + 1)] + columns
+
+    # Start of each element in the joined columns bytes, in rows order
+    sizes = numpy.stack([column_sizes for _, column_sizes in columns], axis=1)
+    bases = numpy.cumsum([0] + [len(data) for data, _ in columns[:-1]])
+    starts = (numpy.cumsum(sizes, axis=0) - sizes + bases).ravel()
+    sizes = sizes.ravel()
+
+    # Index of every row byte in the joined columns bytes
+    index = numpy.repeat(starts - (numpy.cumsum(sizes) - sizes), sizes) + numpy.arange(sizes.sum())
+    return numpy.concatenate([data for data, _ in columns])[index].tobytes()
+
+
+def encodeDatasetRows(columns: list, types: list) -> bytes:
+    """
+    Encode the rows of a DataSet, as the rows field of a DataSet message ( DataSet.MergeFromString )
+
+    The elements are encoded column by column, one conversion per column, and then joined into rows. With NumPy,
+    the numeric columns are encoded and the rows joined with array operations.
+
+    Args:
+        columns: list of column values, lists, tuples, array.array or NumPy arrays of the same length
+        types: list of the DataSetDataType of the columns
+
+    Returns: encoded rows
+    """
+    if not columns or not len(columns[0]):
+        return b""
+    if numpy is not None:
+        return _joinDatasetRows([_encodeDatasetColumn(values, column_type)
+                                 for values, column_type in zip(columns, types)])
+
+    elements = [_encodeDatasetElements(values, column_type) for values, column_type in zip(columns, types)]
+    rows = [b"".join(row) for row in zip(*elements)]
+    return b"".join([_TAG_DATASET_ROW + encodeVarint(len(row)) + row for row in rows])
+
+
+def encodeTimestampDeltas(timestamps) -> bytes:
+    """
+    Encode timestamps as the zigzag varints of their delta of deltas ( compact timestamps of list values )
+
+    The delta of deltas of a regular sampling are 0, one byte per timestamp, and small values for the jitter.
+
+    Args:
+        timestamps: list of integer timestamps, the first one is the base timestamp and is not encoded
+
+    Returns: encoded deltas
+    """
+    result = []
+    previous, delta = timestamps[0], 0
+    for timestamp in islice(timestamps, 1, None):
+        new_delta = timestamp - previous
+        value = new_delta - delta
+        result.append(encodeVarint(value << 1 if value >= 0 else (-value << 1) - 1))
+        previous, delta = timestamp, new_delta
+    return b"".join(result)
+
+
+def decodeTimestampDeltas(base: int, data: bytes) -> list:
+    """
+    Decode the timestamps encoded by encodeTimestampDeltas()
+
+    Args:
+        base: base timestamp, the first one
+        data: encoded deltas
+
+    Returns: list of timestamps, raises ValueError if the data is truncated
+    """
+    timestamps = [base]
+    timestamp, delta, value, shift = base, 0, 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        delta += (value >> 1) ^ -(value & 1)
+        timestamp += delta
+        timestamps.append(timestamp)
+        value, shift = 0, 0
+    if shift:
+        raise ValueError("Truncated timestamp deltas")
+    return timestamps
@@ -5,6 +5,7 @@ from datetime import datetime
 import uuid
 
 from mqtt_spb_wrapper import *
+from mqtt_spb_wrapper.spb_codec import ProtobufCodec
 
 
 class TestMqttSpbEntity(unittest.TestCase):
@@ -95,6 +96,37 @@ class TestMqttSpbEntity(unittest.TestCase):
         # Ensure that data is marked as not updated after publishing
         self.assertFalse(entity.data.is_updated())
 
+    def test_publish_payload_not_copied(self):
+        """Test the encoded payload bytes are published as they are, without copies."""
+        encoded = []
+
+        class RecordingCodec(ProtobufCodec):
+            def encode(self, payload):
+                encoded.append(super().encode(payload))
+                return encoded[-1]
+
+            def join_fragments(self, message_type, fragments):
+                encoded.append(super().join_fragments(message_type, fragments))
+                return encoded[-1]
+
+        self.mock_mqtt_client.is_connected.return_value = True
+        for entity in (MqttSpbEntityEdgeNode(spb_domain_name="Group1", spb_eon_name="EoN1",
+                                             mqtt=self.mock_mqtt_client),
+                       MqttSpbEntityDevice(spb_domain_name="Group1", spb_eon_name="EoN1",
+                                           spb_eon_device_name="Device1", mqtt=self.mock_mqtt_client)):
+            entity.codec = RecordingCodec()
+
+            entity.data.set_value(name="temperature", value=25.5)
+            entity.publish_birth()
+            entity.data.set_value(name="temperature", value=26.5)
+            entity.publish_data()
+
+        published = [c.args[1] for c in self.mock_mqtt_client.publish.call_args_list]
+        self.assertEqual(len(published), 4)
+        for payload_bytes in published:
+            self.assertIsInstance(payload_bytes, bytes)
+            self.assertTrue(any(payload_bytes is data for data in encoded))
+
     def test_publish_data_no_updates(self):
         """Test publishing data when there are no updates."""
         entity = MqttSpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
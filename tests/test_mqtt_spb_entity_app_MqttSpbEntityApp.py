@@ -0,0 +1,192 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+
+from mqtt_spb_wrapper import MqttSpbEntityApp, SpbEntity, SpbPayloadParser, MetricDataType, MetricFilter, PayloadCache, \
+    SpbTemplate, MetricHistory
+
+
+class TestMqttSpbEntityApp(unittest.TestCase):
+
+    def setUp(self):
+        self.app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1")
+        self.app._spb_initialized = True
+        self.app.on_message = None
+
+        # Remote device entity, to generate the payloads
+        self.device = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        self.device.attributes.set_value("serial", "SN-001")
+        self.device.data.set_value("temperature", 21.5)
+        self.device.data.set_value("counter", 10)
+
+    def _message(self, message_type, payload):
+        return SimpleNamespace(topic="spBv1.0/Group1/%s/EoN1/Device1" % message_type, payload=payload)
+
+    def test_message_decoded_once(self):
+        """Test a DATA message is decoded only once and shared by the entity and callbacks."""
+        callback_entity = MagicMock()
+        callback_app = MagicMock()
+        self.app.callback_data = callback_app
+        self.app.get_edge_device("EoN1", "Device1").callback_data = callback_entity
+
+        msg = self._message("DDATA", self.device.serialize_payload_data(send_all=True))
+
+        with patch.object(SpbPayloadParser, "parse_payload", autospec=True,
+                          side_effect=SpbPayloadParser.parse_payload) as parse_payload:
+            self.app._mqtt_on_message(None, None, msg)
+            self.assertEqual(parse_payload.call_count, 1)
+
+        device = self.app.get_edge_device("EoN1", "Device1")
+        self.assertEqual(device.data.get_value("temperature"), 21.5)
+        self.assertEqual(device.data.get_value("counter"), 10)
+
+        payload = callback_entity.call_args[0][0]
+        self.assertIs(callback_app.call_args[0][1], payload)
+        self.assertEqual(len(payload["metrics"]), 2)
+        self.assertIn("timestamp_rx", payload)
+
+    def test_timestamp_rx_before_callbacks(self):
+        """Test the payload receive timestamp is set before the payload is passed to the callbacks."""
+        keys = []
+        self.app.callback_data = lambda topic, payload: keys.append(list(payload.keys()))
+        self.app.on_message = lambda topic, payload: keys.append(list(payload.keys()))
+
+        self.app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data(send_all=True)))
+        self.assertEqual(len(keys), 2)
+        self.assertEqual(keys[0], keys[1])
+        self.assertIn("timestamp_rx", keys[0])
+
+    def test_invalid_payload_decoded_once(self):
+        """Test an invalid payload is decoded only once and ignored by the base class message handler."""
+        callback_data = MagicMock()
+        self.app.callback_data = callback_data
+        self.app.on_message = MagicMock()
+
+        with patch.object(SpbPayloadParser, "parse_payload", autospec=True,
+                          side_effect=SpbPayloadParser.parse_payload) as parse_payload:
+            self.app._mqtt_on_message(None, None, self._message("DDATA", b"\xff\xff invalid"))
+            self.assertEqual(parse_payload.call_count, 1)
+        callback_data.assert_called_once()
+        self.assertIsNone(callback_data.call_args[0][1])
+        self.app.on_message.assert_not_called()
+
+    def test_birth_payload_not_modified(self):
+        """Test the BIRTH entity update does not modify the payload passed to the callbacks."""
+        callback_birth = MagicMock()
+        self.app.callback_birth = callback_birth
+
+        self.app._mqtt_on_message(None, None, self._message("DBIRTH", self.device.serialize_payload_birth()))
+
+        device = self.app.get_edge_device("EoN1", "Device1")
+        self.assertEqual(device.attributes.get_value("serial"), "SN-001")
+
+        names = [metric["name"] for metric in callback_birth.call_args[0][1]["metrics"]]
+        self.assertIn("ATTR/serial", names)
+
+    def test_lazy_payload(self):
+        """Test the lazy payload is decoded once and shared."""
+        app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1", lazy_payload=True)
+        app.on_message = None
+        callback_data = MagicMock()
+        app.callback_data = callback_data
+
+        app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data(send_all=True)))
+
+        payload = callback_data.call_args[0][1]
+        self.assertEqual(payload["metrics"].get("counter")["datatype"], MetricDataType.Int64)
+        self.assertIn("timestamp_rx", payload)
+        self.assertEqual(app.get_edge_device("EoN1", "Device1").data.get_value("counter"), 10)
+
+    def test_metric_filter(self):
+        """Test only the metrics matching the entity filter are decoded and stored."""
+        callback_data = MagicMock()
+        app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1",
+                               metric_filter=MetricFilter(names=["counter"]))
+        app.on_message = None
+        app.callback_data = callback_data
+
+        app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data(send_all=True)))
+
+        device = app.get_edge_device("EoN1", "Device1")
+        self.assertIs(device.metric_filter, app.metric_filter)
+        self.assertEqual(list(device.data.get_names()), ["counter"])
+        self.assertEqual([metric["name"] for metric in callback_data.call_args[0][1]["metrics"]], ["counter"])
+
+        # Entity filter can be changed per entity
+        device.metric_filter = MetricFilter(names=["temperature"])
+        app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data(send_all=True)))
+        self.assertEqual(list(device.data.get_names()), ["counter", "temperature"])
+
+
+    def test_zero_copy(self):
+        """Test the Bytes values are passed as slices of the MQTT payload."""
+        app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1", zero_copy=True)
+        app.on_message = None
+        callback_data = MagicMock()
+        app.callback_data = callback_data
+
+        self.device.data.set_value("snapshot", b"\x89PNG" * 1024)
+        msg = self._message("DDATA", bytes(self.device.serialize_payload_data(send_all=True)))
+        app._mqtt_on_message(None, None, msg)
+
+        snapshot = app.get_edge_device("EoN1", "Device1").data.get_value("snapshot")
+        self.assertIsInstance(snapshot, memoryview)
+        self.assertIs(snapshot.obj, msg.payload)
+        self.assertEqual(snapshot, b"\x89PNG" * 1024)
+        self.assertEqual(callback_data.call_args[0][1]["metrics"][2]["value"], snapshot)
+
+    def test_birth_cache(self):
+        """Test the replayed BIRTH messages are decoded only once."""
+        app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1", birth_cache=PayloadCache())
+        app.on_message = None
+        callback_birth = MagicMock()
+        app.callback_birth = callback_birth
+
+        msg = self._message("DBIRTH", self.device.serialize_payload_birth())
+        for _ in range(3):
+            app._mqtt_on_message(None, None, msg)
+
+        device = app.get_edge_device("EoN1", "Device1")
+        self.assertIs(device.birth_cache, app.birth_cache)
+        self.assertEqual(device.attributes.get_value("serial"), "SN-001")
+        self.assertEqual((app.birth_cache.hits, app.birth_cache.misses), (2, 1))
+        self.assertEqual(callback_birth.call_count, 3)
+        self.assertIn("timestamp_rx", callback_birth.call_args[0][1])
+
+        # DATA messages are not cached
+        app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data(send_all=True)))
+        self.assertEqual(len(app.birth_cache), 1)
+
+    def test_history(self):
+        """Test the received data metric values are kept in the history shared by the discovered entities."""
+        app = MqttSpbEntityApp(spb_domain_name="Group1", spb_app_name="App1", history=MetricHistory(capacity=4))
+        app.on_message = None
+
+        for i in range(6):
+            self.device.data.set_value("temperature", 20.0 + i, timestamp=1000 + i)
+            app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data()))
+
+        device = app.get_edge_device("EoN1", "Device1")
+        self.assertIs(device.history, app.history)
+        timestamps, values = device.get_history("temperature")
+        self.assertEqual((timestamps.tolist(), values.tolist()), ([1002, 1003, 1004, 1005], [22.0, 23.0, 24.0, 25.0]))
+
+    def test_template_definitions(self):
+        """Test the NBIRTH template definitions are cached and shared with the edge node devices."""
+        pump = SpbTemplate("Pump", {"rpm": (MetricDataType.Int32, 0)})
+        node = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        node.templates["Pump"] = pump
+        self.app._mqtt_on_message(None, None, SimpleNamespace(topic="spBv1.0/Group1/NBIRTH/EoN1",
+                                                               payload=node.serialize_payload_birth()))
+        self.assertEqual(self.app.get_edge_node("EoN1").templates["Pump"].members, pump.members)
+
+        self.device.templates = node.templates
+        self.device.data.set_value("pump1", pump.instance(rpm=1500))
+        self.app._mqtt_on_message(None, None, self._message("DDATA", self.device.serialize_payload_data()))
+
+        device = self.app.get_edge_device("EoN1", "Device1")
+        self.assertIs(device.templates, self.app.get_edge_node("EoN1").templates)
+        self.assertEqual(device.data.get_value("pump1"), {"rpm": 1500})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock
+
+from mqtt_spb_wrapper.mqtt_spb_entity_edgenode import MqttSpbEntityEdgeNode
+from mqtt_spb_wrapper.mqtt_spb_entity_device import MqttSpbEntityDevice
+from mqtt_spb_wrapper.spb_base import SpbPayloadParser
+
+
+class TestMqttSpbEntityEdgeNode(unittest.TestCase):
+
+    def setUp(self):
+        self.mqtt = MagicMock()     # Shared MQTT client of the edge node and its devices
+
+    def test_attach_device_aliases(self):
+        """Test the edge node and two attached devices publish BIRTH messages with unique aliases."""
+        node = MqttSpbEntityEdgeNode("Group1", "EoN1", mqtt=self.mqtt)
+        devices = [MqttSpbEntityDevice("Group1", "EoN1", "Device%d" % i, mqtt=self.mqtt) for i in (1, 2)]
+        for entity in [node] + devices:
+            entity.use_aliases = True
+            entity.data.set_value("temperature", 20.5)
+            entity.data.set_value("pressure", 1.2)
+        node.alias_range = 10
+        for device in devices:
+            node.attach_device(device)
+        node.attach_device(devices[0])     # Already attached, same range
+
+        aliases = []
+        for entity in [node] + devices:
+            metrics = SpbPayloadParser(entity.serialize_payload_birth()).payload["metrics"]
+            aliases.append(sorted(m["alias"] for m in metrics if "alias" in m))
+        self.assertEqual(aliases, [[0, 1], [10, 11], [20, 21]])
+
+        # Aliases out of the device range are rejected on BIRTH
+        devices[1].data.set_value("level", 3.0, spb_alias_num=0)
+        with self.assertRaises(ValueError):
+            devices[1].serialize_payload_birth()
+
+        # Devices of other edge nodes can't be attached
+        with self.assertRaises(ValueError):
+            node.attach_device(MqttSpbEntityDevice("Group1", "EoN2", "Device1", mqtt=self.mqtt))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+from array import array
+from datetime import datetime
+from unittest import mock
+
+import numpy
+
+from mqtt_spb_wrapper.spb_protobuf import Payload, MetricDataType, addMetric, addNullMetric
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import addMetricDataset_from_dict
+from mqtt_spb_wrapper.spb_protobuf import sparkplug_b_wire
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b_wire import PayloadWriter, encodeVarint, encodeTimestampDeltas, \
+    decodeTimestampDeltas
+
+
+class TestPayloadWriter(unittest.TestCase):
+
+    METRICS = [
+        ("int8", None, MetricDataType.Int8, -128),
+        ("int16", 1, MetricDataType.Int16, -2),
+        ("int32", 2, MetricDataType.Int32, 2 ** 31 - 1),
+        ("int64", None, MetricDataType.Int64, -2 ** 63),
+        ("uint8", None, MetricDataType.UInt8, 0),
+        ("uint16", None, MetricDataType.UInt16, 65535),
+        ("uint32", 300, MetricDataType.UInt32, 2 ** 32 - 1),
+        ("uint64", None, MetricDataType.UInt64, 2 ** 64 - 1),
+        ("float", None, MetricDataType.Float, 1.1),
+        ("float_int", None, MetricDataType.Float, 3),
+        ("double", None, MetricDataType.Double, -123.456e-78),
+        ("boolean", None, MetricDataType.Boolean, True),
+        ("boolean_false", None, MetricDataType.Boolean, False),
+        ("string", None, MetricDataType.String, "text é中"),
+        ("empty_string", None, MetricDataType.String, ""),
+        ("datetime", None, MetricDataType.DateTime, 1729453899000),
+        ("text", None, MetricDataType.Text, "x" * 200),
+        ("uuid", None, MetricDataType.UUID, "4d1c1f8e-9d9a-4c8e-b7b5-0d6f9c3b8a21"),
+        ("bytes", None, MetricDataType.Bytes, b"\x00\x01\x02" * 100),
+        ("file", None, MetricDataType.File, b""),
+        (None, 7, MetricDataType.Double, 1.5),
+    ]
+
+    def _expected(self, writer):
+        """ Protobuf message with the writer header """
+        payload = Payload()
+        payload.timestamp = writer.get_message().timestamp if writer.message is not None else \
+            Payload.FromString(writer.encode()).timestamp
+        payload.seq = writer.seq
+        return payload
+
+    def test_round_trip(self):
+        """Test the written payload is decoded by the protobuf Payload message."""
+        writer = PayloadWriter()
+        for name, alias, datatype, value in self.METRICS:
+            writer.add_metric(name, alias, datatype, value, timestamp=1729453899000)
+        self.assertIsNone(writer.message)
+        self.assertEqual(writer.metrics_count(), len(self.METRICS))
+
+        decoded = Payload.FromString(writer.encode())
+        self.assertEqual(decoded.seq, writer.seq)
+        self.assertEqual(len(decoded.metrics), len(self.METRICS))
+        for metric, (name, alias, datatype, value) in zip(decoded.metrics, self.METRICS):
+            self.assertEqual(metric.name if metric.HasField("name") else None, name)
+            self.assertEqual(metric.alias if metric.HasField("alias") else None, alias)
+            self.assertEqual(metric.timestamp, 1729453899000)
+            self.assertEqual(metric.datatype, datatype)
+            decoded_value = getattr(metric, metric.WhichOneof("value"))
+            if datatype == MetricDataType.Float:
+                self.assertAlmostEqual(decoded_value, value, places=6)
+            elif isinstance(value, int) and not isinstance(value, bool) and value < 0:
+                bits = {MetricDataType.Int8: 8, MetricDataType.Int16: 16, MetricDataType.Int32: 32,
+                        MetricDataType.Int64: 64}[datatype]
+                self.assertEqual(decoded_value, value + 2 ** bits)  # Two's complement
+            else:
+                self.assertEqual(decoded_value, value)
+
+    def test_same_bytes(self):
+        """Test the written payload bytes are the same as the protobuf ones."""
+        writer = PayloadWriter()
+        expected = self._expected(writer)
+        for name, alias, datatype, value in self.METRICS:
+            writer.add_metric(name, alias, datatype, value, timestamp=1729453899000)
+            addMetric(expected, name, alias, datatype, value, timestamp=1729453899000)
+        self.assertEqual(writer.encode(), expected.SerializeToString())
+
+    def test_null_metrics(self):
+        """Test null metrics are written with the is_null flag."""
+        writer = PayloadWriter()
+        writer.add_null_metric("null", 5, MetricDataType.String)
+        decoded = Payload.FromString(writer.encode())
+        self.assertTrue(decoded.metrics[0].is_null)
+        self.assertEqual(decoded.metrics[0].datatype, MetricDataType.String)
+        self.assertEqual(decoded.metrics[0].alias, 5)
+
+        expected = self._expected(writer)
+        addNullMetric(expected, "null", 5, MetricDataType.String)
+        expected.metrics[0].timestamp = decoded.metrics[0].timestamp
+        self.assertEqual(writer.encode(), expected.SerializeToString())
+
+    def test_protobuf_fallback(self):
+        """Test the writer switches to the protobuf message for the metrics it can not write."""
+        writer = PayloadWriter()
+        writer.add_metric("before", None, MetricDataType.Double, 1.5, timestamp=1000)
+        addMetricDataset_from_dict(writer.get_message(), "dataset", None, {"a": [1, 2]})
+        writer.add_metric("after", None, MetricDataType.Int32, -1, timestamp=1000)
+        self.assertIsNotNone(writer.message)
+        self.assertEqual(writer.metrics_count(), 3)
+
+        decoded = Payload.FromString(writer.encode())
+        self.assertEqual([m.name for m in decoded.metrics], ["before", "dataset", "after"])
+        self.assertEqual(decoded.metrics[2].int_value, 2 ** 32 - 1)
+        self.assertEqual(decoded.seq, writer.seq)
+
+        # Values rejected by the wire encoder are checked by the protobuf fields
+        for datatype, value in [(MetricDataType.Int32, 2 ** 40), (MetricDataType.String, 10),
+                                (MetricDataType.Boolean, "true")]:
+            with self.assertRaises((TypeError, ValueError)):
+                PayloadWriter().add_metric("invalid", None, datatype, value)
+
+        # Negative or non integer timestamps, rejected as by the protobuf fields
+        for timestamp in (-5, 1.5, "1000"):
+            with self.assertRaises((TypeError, ValueError)):
+                PayloadWriter().add_metric("invalid", None, MetricDataType.Double, 1.5, timestamp=timestamp)
+            with self.assertRaises((TypeError, ValueError)):
+                PayloadWriter().add_dataset_metric("invalid", None, {"a": [1, 2]}, timestamp=timestamp)
+
+    def test_dataset_metric(self):
+        """Test DataSet metrics are written with the same bytes as the protobuf ones, with or without NumPy."""
+        data = {
+            "int8": array("b", [-128, 0, 127]),
+            "uint64": [0, 2 ** 64 - 1, 300],
+            "double": [0.5, -1.5, 1e300],
+            "float": numpy.array([0.5, 2.5, -3.0], dtype=numpy.float32),
+            "bool": numpy.array([True, False, True]),
+            "string": ["a", None, "é中"],
+            "datetime": [datetime(2024, 10, 20), datetime(2024, 10, 21), 1729453899000],
+        }
+        for use_numpy in (True, False):
+            with mock.patch.object(sparkplug_b_wire, "numpy", numpy if use_numpy else None):
+                writer = PayloadWriter()
+                writer.add_dataset_metric("dataset", 3, data, types={"datetime": MetricDataType.DateTime},
+                                          timestamp=1000)
+                writer.add_metric("after", None, MetricDataType.Int32, -1, timestamp=1000)
+                self.assertIsNone(writer.message)
+
+                expected = self._expected(writer)
+                addMetricDataset_from_dict(expected, "dataset", 3, data, types={"datetime": MetricDataType.DateTime})
+                expected.metrics[0].timestamp = 1000
+                addMetric(expected, "after", None, MetricDataType.Int32, -1, timestamp=1000)
+                self.assertEqual(writer.encode(), expected.SerializeToString())
+
+                rows = Payload.FromString(writer.encode()).metrics[0].dataset_value.rows
+                self.assertEqual(rows[0].elements[0].int_value, 128)    # Two's complement
+                self.assertFalse(rows[1].elements[5].HasField("string_value"))
+
+    def test_dataset_metric_properties(self):
+        """Test DataSet metric properties are written with the same bytes as the protobuf ones."""
+        data = {"values": [0.5, 1.5, 2.5]}
+        properties = {"timestamps_base": (MetricDataType.DateTime, 1729453899000),
+                      "timestamps_period": (MetricDataType.UInt64, 10),
+                      "label": (MetricDataType.String, "line1")}
+        writer = PayloadWriter()
+        writer.add_dataset_metric("dataset", None, data, timestamp=1000, properties=properties)
+        expected = self._expected(writer)
+        addMetricDataset_from_dict(expected, "dataset", None, data, properties=properties)
+        expected.metrics[0].timestamp = 1000
+        self.assertEqual(writer.encode(), expected.SerializeToString())
+
+        metric = Payload.FromString(writer.encode()).metrics[0]
+        self.assertEqual(list(metric.properties.keys), list(properties.keys()))
+        self.assertEqual(metric.properties.values[1].long_value, 10)
+
+    def test_timestamp_deltas(self):
+        """Test the delta of delta timestamps encoding, one byte per timestamp for a regular sampling."""
+        regular = [1729453899000 + 10 * i for i in range(100)]
+        self.assertEqual(len(encodeTimestampDeltas(regular)), 99)
+        for timestamps in (regular, [5], [1000, 900, 1200, 1200, 2 ** 40, 0]):
+            self.assertEqual(decodeTimestampDeltas(timestamps[0], encodeTimestampDeltas(timestamps)), timestamps)
+        with self.assertRaises(ValueError):
+            decodeTimestampDeltas(0, b"\x80")
+
+    def test_encode_varint(self):
+        """Test the varint encoding."""
+        for value in (0, 1, 127, 128, 300, 2 ** 32, 2 ** 64 - 1):
+            payload = Payload(seq=value)
+            self.assertEqual(b"\x18" + encodeVarint(value), payload.SerializeToString())
+
+
+if __name__ == '__main__':
+    unittest.main()
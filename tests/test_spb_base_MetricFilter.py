@@ -0,0 +1,60 @@
+import unittest
+
+from mqtt_spb_wrapper.spb_base import MetricFilter, SpbPayloadParser, SpbEntity, Payload, MetricDataType
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import addMetric
+
+
+class TestMetricFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.metric_filter = MetricFilter(names=["temperature", "pressure"], prefixes=["Line3/", "Line4/Press"])
+
+        payload = Payload()
+        for name in ["temperature", "humidity", "Line3/Press01/speed", "Line4/Press02/speed", "Line4/Robot/speed"]:
+            addMetric(payload, name=name, alias=None, type=MetricDataType.Double, value=1.5)
+        self.payload_data = payload.SerializeToString()
+
+    def test_match(self):
+        """Test matching metric names and prefixes."""
+        self.assertTrue(self.metric_filter.match("temperature"))
+        self.assertTrue(self.metric_filter("pressure"))
+        self.assertTrue(self.metric_filter.match("Line3/Press01/speed"))
+        self.assertTrue(self.metric_filter.match("Line4/Press02/speed"))
+        self.assertFalse(self.metric_filter.match("Line4/Robot/speed"))
+        self.assertFalse(self.metric_filter.match("humidity"))
+        self.assertFalse(self.metric_filter.match("temp"))
+        self.assertTrue(self.metric_filter.match(""))     # Metrics sent with their alias only
+
+        # Results are cached
+        self.assertFalse(self.metric_filter.match("humidity"))
+        self.assertIn("humidity", self.metric_filter._cache)
+
+    def test_empty_filter(self):
+        """Test an empty filter does not match any metric."""
+        self.assertFalse(MetricFilter().match("temperature"))
+
+    def test_as_dict(self):
+        """Test the dictionary representation of the filter."""
+        self.assertEqual(self.metric_filter.as_dict(), {
+            "names": ["pressure", "temperature"],
+            "prefixes": ["Line3/", "Line4/Press"],
+        })
+
+    def test_payload_parser_filter(self):
+        """Test only the matching metrics are decoded."""
+        for lazy in (False, True):
+            parser = SpbPayloadParser(self.payload_data, lazy=lazy, metric_filter=self.metric_filter)
+            names = [metric['name'] for metric in parser.payload['metrics']]
+            self.assertEqual(names, ["temperature", "Line3/Press01/speed", "Line4/Press02/speed"])
+
+    def test_entity_filter(self):
+        """Test the entity only stores the matching metrics."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        entity.metric_filter = self.metric_filter
+        entity.deserialize_payload_data(self.payload_data)
+
+        self.assertEqual(list(entity.data.get_names()), ["temperature", "Line3/Press01/speed", "Line4/Press02/speed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
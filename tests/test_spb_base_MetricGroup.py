@@ -198,6 +198,31 @@ class TestMetricGroup(unittest.TestCase):
         self.assertIsInstance(metric_value, MetricValue)
         self.assertEqual(metric_value.value, 123)
 
+    def test_updated_values(self):
+        """Test the updated metrics are tracked in the order of their updates, until read."""
+        mg = MetricGroup()
+        for name in ("a", "b", "c"):
+            mg.set_value(name=name, value=1)
+        for item in mg.get_updated_values():
+            _ = item.value
+        self.assertFalse(mg.is_updated())
+        self.assertEqual(mg.get_updated_values(), [])
+
+        mg.set_value(name="c", value=2)
+        mg["a"].value = 2
+        mg.set_value(name="d", value=2)
+        self.assertTrue(mg.is_updated())
+        self.assertEqual([item.name for item in mg.get_updated_values()], ["c", "a", "d"])
+
+        mg.remove_value("a")
+        del mg["d"]
+        mg["e"] = MetricValue(name="e", value=3)
+        self.assertEqual([item.name for item in mg.get_updated_values()], ["c", "e"])
+        mg["c"].is_updated = False
+        self.assertEqual([item.name for item in mg.get_updated_values()], ["e"])
+        mg.clear()
+        self.assertFalse(mg.is_updated())
+
     def test_metricgroup_str_repr(self):
         """Test the __str__ and __repr__ methods."""
         mg = MetricGroup()
@@ -207,5 +232,67 @@ class TestMetricGroup(unittest.TestCase):
         self.assertIn("test_metric", mg_str)
         self.assertIn("test_metric", mg_repr)
 
+    def test_report_by_exception(self):
+        """Test unchanged values are not reported and counted as suppressed."""
+        mg = MetricGroup()
+        mg.set_value(name="state", value="running", timestamp=1000, report_by_exception=True)
+        _ = mg["state"].value  # Sent
+        mg.set_value(name="state", value="running", timestamp=2000)
+        self.assertFalse(mg.is_updated())
+        self.assertEqual(mg.get_value_timestamp("state"), 1000)
+        self.assertEqual(mg["state"].suppressed_count, 1)
+        self.assertEqual(mg.suppressed_count, 1)
+        mg.set_value(name="state", value="stopped")
+        self.assertTrue(mg.is_updated())
+        self.assertEqual(mg.get_value("state"), "stopped")
+
+        # Disabled, all the updates are reported
+        mg.set_value(name="state", value="stopped", report_by_exception=False)
+        self.assertTrue(mg.is_updated())
+        self.assertEqual(mg.suppressed_count, 1)
+
+    def test_deadband(self):
+        """Test numeric changes within the deadbands are not reported."""
+        callback_values = []
+        mg = MetricGroup()
+        mg.set_value(name="temperature", value=20.0, deadband=0.5, callback_on_change=callback_values.append)
+        self.assertTrue(mg["temperature"].report_by_exception)
+        _ = mg["temperature"].value
+        for value in (20.2, 19.6, 20.5):  # Compared to the last reported value, no drift
+            mg.set_value(name="temperature", value=value)
+        self.assertFalse(mg.is_updated())
+        self.assertEqual(mg.get_value("temperature"), 20.0)
+        self.assertEqual(callback_values, [])
+        mg.set_value(name="temperature", value=20.6)
+        self.assertTrue(mg.is_updated())
+        self.assertEqual(callback_values, [20.6])
+        self.assertEqual(mg.suppressed_count, 3)
+
+        mg.set_value(name="level", value=1000, deadband_percent=1)
+        _ = mg["level"].value
+        mg.set_value(name="level", value=1010)
+        self.assertFalse(mg["level"].is_updated)
+        mg.set_value(name="level", value=1011)
+        self.assertTrue(mg["level"].is_updated)
+
+        # Changes that are always reported
+        mg.set_value(name="temperature", value=float("nan"))
+        self.assertTrue(mg["temperature"].is_updated)
+        mg.set_value(name="flag", value=True, report_by_exception=True)
+        self.assertTrue(mg["flag"].is_reportable(1))
+        self.assertTrue(mg["flag"].is_reportable([True, True]))
+
+    def test_report_by_exception_serialize(self):
+        """Test only the reported metrics are serialized on DATA."""
+        from mqtt_spb_wrapper.spb_base import SpbEntity
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        entity.data.set_value("a", 1.0, deadband=0.5)
+        entity.data.set_value("b", 1.0, deadband=0.5)
+        entity.serialize_payload_data()
+        entity.data.set_value("a", 1.2)
+        entity.data.set_value("b", 2.0)
+        payload = entity.deserialize_payload_data(entity.serialize_payload_data())
+        self.assertEqual([m["name"] for m in payload["metrics"]], ["b"])
+
 if __name__ == '__main__':
     unittest.main()
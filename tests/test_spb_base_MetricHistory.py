@@ -0,0 +1,75 @@
+import unittest
+
+from mqtt_spb_wrapper.spb_base import MetricHistory, MetricHistoryBuffer, SpbEntity, MetricDataType
+
+
+class TestMetricHistory(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        """Test the last samples are contiguous memoryview slices, the oldest ones overwritten."""
+        buffer = MetricHistoryBuffer(4, MetricDataType.Double)
+        self.assertEqual(buffer.last(), (memoryview(b""), memoryview(b"")))
+        for i in range(10):
+            buffer.append(i * 0.5, 1000 + i)
+
+            timestamps, values = buffer.last()
+            self.assertEqual(len(buffer), min(i + 1, 4))
+            self.assertEqual(values.tolist(), [j * 0.5 for j in range(max(0, i - 3), i + 1)])
+            self.assertEqual(timestamps.tolist(), [1000 + j for j in range(max(0, i - 3), i + 1)])
+
+        timestamps, values = buffer.last(2)
+        self.assertIsInstance(values, memoryview)
+        self.assertEqual((timestamps.tolist(), values.tolist()), ([1008, 1009], [4.0, 4.5]))
+        self.assertEqual(buffer.last(0)[1].tolist(), [])
+
+    def test_object_values(self):
+        """Test non numeric values, and values not supported by the array type, are kept in lists."""
+        buffer = MetricHistoryBuffer(3, MetricDataType.String)
+        buffer.extend(["a", "b", "c", "d"], [1, 2, 3, 4])
+        timestamps, values = buffer.last()
+        self.assertEqual((timestamps.tolist(), values), ([2, 3, 4], ["b", "c", "d"]))
+
+        buffer = MetricHistoryBuffer(3, MetricDataType.Int32)
+        buffer.extend([1, 2], [1, 2])
+        buffer.append(2.5, 3)
+        self.assertEqual(buffer.last()[1], [1, 2, 2.5])
+
+    def test_memory_budget(self):
+        """Test the buffers of the least recently updated metrics are evicted beyond the memory budget."""
+        size = MetricHistoryBuffer.SAMPLE_BYTES * 8
+        history = MetricHistory(capacity=8, max_bytes=2 * size)
+        history.append("Device1", "a", 1, 1000, MetricDataType.Int32)
+        history.append("Device1", "b", 2, 1000, MetricDataType.Int32)
+        history.append("Device1", "a", 3, 1001, MetricDataType.Int32)
+        history.append("Device2", "a", 4, 1000, MetricDataType.Int32)
+        self.assertIsNone(history.get("Device1", "b"))
+        self.assertEqual(history.get("Device1", "a").last()[1].tolist(), [1, 3])
+        self.assertEqual(history.stats(), {"buffers": 2, "bytes": 2 * size, "evictions": 1})
+
+        history = MetricHistory(capacity=8, max_bytes=size - 1)
+        history.append("Device1", "a", 1, 1000)
+        self.assertEqual(len(history), 0)
+
+    def test_entity_history(self):
+        """Test the received data metric values, and list values, are fed to the history."""
+        device = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        mirror = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        mirror.history = MetricHistory(capacity=16)
+        self.assertIsNone(mirror.get_history("temperature"))
+
+        for i in range(3):
+            device.data.set_value("temperature", 20.0 + i, timestamp=1000 + i)
+            device.attributes.set_value("serial", "SN-%d" % i)
+            mirror.deserialize_payload_data(device.serialize_payload_data())
+        device.data.set_value("vibration", [0.5, 1.5], timestamp=[2000, 2001])
+        mirror.deserialize_payload_data(device.serialize_payload_data())
+
+        timestamps, values = mirror.get_history("temperature")
+        self.assertEqual((timestamps.tolist(), values.tolist()), ([1000, 1001, 1002], [20.0, 21.0, 22.0]))
+        self.assertEqual(mirror.get_history("temperature", 1)[1].tolist(), [22.0])
+        self.assertEqual(mirror.get_history("vibration")[1].tolist(), [0.5, 1.5])
+        self.assertIsNone(mirror.get_history("serial"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,6 +33,21 @@ class TestMetricValue(unittest.TestCase):
         self.assertEqual(mv.timestamp, timestamps)
         self.assertTrue(mv.is_list_values())
 
+    def test_list_values_mode(self):
+        """Test the switch between single and list values, the values set first then the timestamps."""
+        mv = MetricValue(name="readings", value=1.5, timestamp=1000)
+        self.assertFalse(hasattr(mv, "__dict__"))
+        mv.set([1.5, 2.5], [1000, 2000])
+        self.assertTrue(mv.is_list_values())
+        self.assertEqual(mv.value, [1.5, 2.5])
+        self.assertEqual(mv.encoded_value, [1.5, 2.5])
+        mv.set(3.5, 3000)
+        self.assertFalse(mv.is_list_values())
+        self.assertEqual((mv.value, mv.timestamp, mv.encoded_value), (3.5, 3000, 3.5))
+        mv.value = [4.5]    # Single value set as a list
+        self.assertEqual(mv.value, 4.5)
+        self.assertTrue(mv.is_reportable(5.5))
+
     def test_value_setter(self):
         """Test setting a new value."""
         mv = MetricValue(name="humidity", value=60)
@@ -136,6 +151,35 @@ class TestMetricValue(unittest.TestCase):
         self.assertEqual(mv.spb_data_type, MetricDataType.File)
         self.assertEqual(mv.value.getvalue(), file_content)
 
+    def test_encoded_value(self):
+        """Test values are converted to their encoded type once, when the value or the datatype is set."""
+        moment = datetime(2024, 10, 20, 12, 0, 0)
+        mv = MetricValue(name="datetime", value=moment)
+        self.assertEqual(mv.encoded_value, int(moment.timestamp() * 1000))
+        self.assertTrue(mv.is_updated)      # Reading the encoded value does not clear the flag
+        self.assertEqual(mv.value, moment)
+
+        value = uuid.uuid4()
+        mv = MetricValue(name="uuid", value=value)
+        self.assertEqual(mv.encoded_value, str(value))
+
+        # File contents read once
+        file_obj = BytesIO(b"Sample data")
+        mv = MetricValue(name="file", value=file_obj, spb_data_type=MetricDataType.File)
+        file_obj.seek(0)
+        file_obj.write(b"Changed")
+        self.assertEqual(mv.encoded_value, b"Sample data")
+        mv.value = file_obj
+        self.assertEqual(mv.encoded_value, b"Changeddata")
+
+        # Datatype change, invalid values rejected when set
+        mv = MetricValue(name="counter", value=1729453899000)
+        mv.spb_data_type = MetricDataType.DateTime
+        self.assertEqual(mv.encoded_value, 1729453899000)
+        with self.assertRaises(ValueError):
+            mv.value = "not a datetime"
+        self.assertEqual(mv.value, 1729453899000)
+
     def test_invalid_value_type(self):
         """Test handling of unsupported value types."""
         class UnsupportedType:
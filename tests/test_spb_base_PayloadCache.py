@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+
+from mqtt_spb_wrapper.spb_base import PayloadCache, SpbPayloadParser, SpbEntity, MetricFilter, Payload, MetricDataType
+from mqtt_spb_wrapper.spb_protobuf import addMetric, LazyPayload
+
+
+class TestPayloadCache(unittest.TestCase):
+
+    def _payload(self, value):
+        payload = Payload()
+        addMetric(payload, name="ATTR/serial", alias=None, type=MetricDataType.String, value="SN-%d" % value)
+        addMetric(payload, name="temperature", alias=None, type=MetricDataType.Double, value=20.0 + value)
+        return payload.SerializeToString()
+
+    def test_hits_and_misses(self):
+        """Test identical payloads are decoded only once."""
+        cache = PayloadCache()
+        data = self._payload(1)
+
+        with patch.object(SpbPayloadParser, "parse_payload", autospec=True,
+                          side_effect=SpbPayloadParser.parse_payload) as parse_payload:
+            first = cache.parse_payload(data)
+            second = cache.parse_payload(bytes(bytearray(data)))  # Same content, different object
+            self.assertEqual(parse_payload.call_count, 1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second["metrics"][1]["value"], 21.0)
+        self.assertEqual(cache.stats(), {"entries": 1, "bytes": len(data), "hits": 1, "misses": 1, "evictions": 0})
+
+    def test_cached_payload_copy(self):
+        """Test extra keys added to a returned payload are not stored in the cache."""
+        cache = PayloadCache()
+        data = self._payload(1)
+
+        payload = cache.parse_payload(data)
+        payload["timestamp_rx"] = 1000
+        self.assertNotIn("timestamp_rx", cache.parse_payload(data))
+
+        lazy_payload = cache.parse_payload(data, lazy=True)
+        self.assertIsInstance(lazy_payload, LazyPayload)
+        lazy_payload["timestamp_rx"] = 1000
+        self.assertNotIn("timestamp_rx", cache.parse_payload(data, lazy=True))
+        self.assertEqual(cache.misses, 2)   # Lazy payloads are cached apart
+
+    def test_metric_filter_key(self):
+        """Test the metric filter is part of the cache key."""
+        cache = PayloadCache()
+        data = self._payload(1)
+        metric_filter = MetricFilter(names=["temperature"])
+
+        self.assertEqual(len(cache.parse_payload(data)["metrics"]), 2)
+        self.assertEqual(len(cache.parse_payload(data, metric_filter=metric_filter)["metrics"]), 1)
+        self.assertEqual(len(cache.parse_payload(data, metric_filter=metric_filter)["metrics"]), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_lru_eviction(self):
+        """Test the least recently used payloads are evicted."""
+        cache = PayloadCache(max_entries=2)
+        data = [self._payload(i) for i in range(3)]
+
+        cache.parse_payload(data[0])
+        cache.parse_payload(data[1])
+        cache.parse_payload(data[0])    # data[1] is now the least recently used
+        cache.parse_payload(data[2])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+
+        cache.parse_payload(data[0])
+        self.assertEqual(cache.hits, 2)
+        cache.parse_payload(data[1])
+        self.assertEqual(cache.misses, 4)
+
+    def test_max_bytes(self):
+        """Test the total size of the cached payloads is limited."""
+        data = [self._payload(i) for i in range(3)]
+        cache = PayloadCache(max_bytes=2 * len(data[0]))
+
+        for item in data:
+            cache.parse_payload(item)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_invalid_payload(self):
+        """Test invalid payloads are not cached."""
+        cache = PayloadCache()
+        self.assertIsNone(cache.parse_payload(b"invalid_data"))
+        self.assertEqual(len(cache), 0)
+
+    def test_entity_birth_cache(self):
+        """Test the entity BIRTH deserialization uses the cache."""
+        device = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        device.attributes.set_value("serial", "SN-001")
+        device.data.set_value("temperature", 21.5)
+        data = device.serialize_payload_birth()
+
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        entity.birth_cache = PayloadCache()
+        for _ in range(3):
+            entity.deserialize_payload_birth(data)
+
+        self.assertEqual(entity.attributes.get_value("serial"), "SN-001")
+        self.assertEqual((entity.birth_cache.hits, entity.birth_cache.misses), (2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
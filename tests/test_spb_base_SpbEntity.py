@@ -2,7 +2,9 @@ import unittest
 from datetime import datetime
 import uuid
 
-from mqtt_spb_wrapper.spb_base import SpbEntity, MetricDataType, SpbPayloadParser
+from mqtt_spb_wrapper.spb_base import SpbEntity, MetricDataType, SpbPayloadParser, SpbTemplate, TemplateInstance
+from mqtt_spb_wrapper.spb_base import Payload, MetricFilter
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import initDatasetMetric, DataSetDataType
 
 
 class TestSpbEntity(unittest.TestCase):
@@ -58,7 +60,7 @@ class TestSpbEntity(unittest.TestCase):
         entity.commands.set_value(name="cmd1", value=True)
         # Serialize birth payload
         payload_bytes = entity.serialize_payload_birth()
-        self.assertIsInstance(payload_bytes, bytearray)
+        self.assertIsInstance(payload_bytes, bytes)
         # Parse the payload and check contents
         parser = SpbPayloadParser(payload_bytes)
         self.assertIsNotNone(parser.payload)
@@ -78,7 +80,7 @@ class TestSpbEntity(unittest.TestCase):
         entity.commands.set_value(name="cmd1", value=True)
         # Serialize birth payload
         payload_bytes = entity.serialize_payload_birth()
-        self.assertIsInstance(payload_bytes, bytearray)
+        self.assertIsInstance(payload_bytes, bytes)
         # Parse the payload and check contents
         parser = SpbPayloadParser(payload_bytes)
         self.assertIsNotNone(parser.payload)
@@ -113,7 +115,7 @@ class TestSpbEntity(unittest.TestCase):
         entity.data.set_value(name="data2", value=456)
         # Serialize data payload
         payload_bytes = entity.serialize_payload_data()
-        self.assertIsInstance(payload_bytes, bytearray)
+        self.assertIsInstance(payload_bytes, bytes)
         # Parse the payload and check contents
         parser = SpbPayloadParser(payload_bytes)
         self.assertIsNotNone(parser.payload)
@@ -145,7 +147,7 @@ class TestSpbEntity(unittest.TestCase):
         entity.commands.set_value(name="cmd2", value=False)
         # Serialize command payload
         payload_bytes = entity.serialize_payload_cmd()
-        self.assertIsInstance(payload_bytes, bytearray)
+        self.assertIsInstance(payload_bytes, bytes)
         # Parse the payload and check contents
         parser = SpbPayloadParser(payload_bytes)
         self.assertIsNotNone(parser.payload)
@@ -212,7 +214,7 @@ class TestSpbEntity(unittest.TestCase):
         entity.data.set_value(name="bytes_metric", value=b'\x00\x01\x02')
         # Serialize data payload
         payload_bytes = entity.serialize_payload_data()
-        self.assertIsInstance(payload_bytes, bytearray)
+        self.assertIsInstance(payload_bytes, bytes)
         # Parse the payload and check contents
         parser = SpbPayloadParser(payload_bytes)
         self.assertIsNotNone(parser.payload)
@@ -256,6 +258,303 @@ class TestSpbEntity(unittest.TestCase):
         self.assertEqual(new_entity.data.get_value("uuid_metric"), str(test_uuid))
         self.assertEqual(new_entity.data.get_value("bytes_metric"), b'\x00\x01\x02')
 
+    def test_deserialization_with_dataset(self):
+        """Test deserialization of DataSet values, as list values and as dictionaries."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        entity.data.set_value(name="series", value=[1.5, 2.5, 3.5], timestamp=[1000, 2000, 3000])
+        entity.data.set_value(name="table", value={"a": [1, 2], "b": ["x", "y"]})
+        payload_bytes = entity.serialize_payload_data()
+        # Create a new entity and deserialize the payload
+        new_entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        new_entity.deserialize_payload_data(payload_bytes)
+        # Verify the columns are converted back into python lists
+        self.assertEqual(new_entity.data.get_value("series"), [1.5, 2.5, 3.5])
+        self.assertEqual(new_entity.data["series"].timestamp, [1000, 2000, 3000])
+        self.assertEqual(new_entity.data.get_value("table"), {"a": [1, 2], "b": ["x", "y"]})
+
+    def test_deserialization_with_float_dataset(self):
+        """Test Float DataSet columns, as written row by row by the previous encoder, decode into the sent values."""
+        payload = Payload()
+        for name, data in (("series", {"timestamps": [1000, 2000, 3000], "values": [22.1, 23.3, 0.1]}),
+                           ("table", {"a": [1.1, 2.2]})):
+            columns = list(data.keys())
+            types = [DataSetDataType.Int64 if isinstance(data[c][0], int) else DataSetDataType.Float for c in columns]
+            dataset = initDatasetMetric(payload, name, None, columns, types)
+            for row in zip(*data.values()):
+                dataset_row = dataset.rows.add()
+                for value in row:
+                    element = dataset_row.elements.add()
+                    if isinstance(value, int):
+                        element.long_value = value
+                    else:
+                        element.float_value = value
+
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        entity.deserialize_payload_data(payload.SerializeToString())
+        self.assertEqual(entity.data.get_value("series"), [22.1, 23.3, 0.1])
+        self.assertEqual(entity.data["series"].timestamp, [1000, 2000, 3000])
+        self.assertEqual(entity.data.get_value("table"), {"a": [1.1, 2.2]})
+
+    def test_deserialization_with_compact_timestamps(self):
+        """Test list values sent with compact timestamps, periodic and jittered, decoded transparently."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        periodic = [1729453899000 + i for i in range(200)]
+        jittered = [1729453899000 + 10 * i + (i % 3) for i in range(200)]
+        entity.data.set_value(name="periodic", value=[i * 0.5 for i in range(200)], timestamp=periodic)
+        entity.data.set_value(name="jittered", value=[i * 0.5 for i in range(200)], timestamp=jittered)
+        uncompact = entity.serialize_payload_data(send_all=True)
+
+        entity.compact_timestamps = True
+        payload_bytes = entity.serialize_payload_data(send_all=True)
+        self.assertLess(len(payload_bytes), len(uncompact) * 2 // 3)
+        for metric in SpbPayloadParser(payload_bytes).payload["metrics"]:
+            self.assertEqual(list(metric["value"].keys()), ["values"])
+
+        new_entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        new_entity.deserialize_payload_data(payload_bytes)
+        self.assertEqual(new_entity.data["periodic"].timestamp, periodic)
+        self.assertEqual(new_entity.data["jittered"].timestamp, jittered)
+        self.assertEqual(new_entity.data.get_value("jittered"), [i * 0.5 for i in range(200)])
+
+    def test_template_serialization(self):
+        """Test template definitions sent on NBIRTH and instances decoded against the cached definitions."""
+        pump = SpbTemplate("Pump", {"rpm": (MetricDataType.Int32, 0),
+                                    "running": (MetricDataType.Boolean, False),
+                                    "since": MetricDataType.DateTime}, version="1.0")
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        entity.templates["Pump"] = pump
+        entity.data.set_value("pump1", pump.instance(rpm=1200, since=datetime(2024, 1, 1)))
+        self.assertEqual(entity.data["pump1"].spb_data_type, MetricDataType.Template)
+
+        # Definitions are learned from the BIRTH message
+        new_entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        new_entity.deserialize_payload_birth(entity.serialize_payload_birth())
+        self.assertEqual(new_entity.templates["Pump"].version, "1.0")
+        self.assertEqual(new_entity.templates["Pump"].members, pump.members)
+
+        # DATA instances are encoded without the member datatypes
+        entity.data.set_value("pump1", pump.instance(rpm=1500, running=True, since=datetime(2024, 1, 2)))
+        payload_bytes = entity.serialize_payload_data()
+        metric = SpbPayloadParser().parse_payload(payload_bytes)["metrics"][0]
+        self.assertEqual(metric["templateValue"]["templateRef"], "Pump")
+        self.assertNotIn("datatype", metric["templateValue"]["metrics"][0])
+
+        new_entity.deserialize_payload_data(payload_bytes)
+        value = new_entity.data.get_value("pump1")
+        self.assertIsInstance(value, TemplateInstance)
+        self.assertEqual(value.template_ref, "Pump")
+        self.assertEqual(value, {"rpm": 1500, "running": True, "since": datetime(2024, 1, 2)})
+
+    def test_template_instance(self):
+        """Test template instances default values and member validation."""
+        pump = SpbTemplate("Pump", {"rpm": (MetricDataType.Int32, 0), "running": MetricDataType.Boolean})
+        self.assertEqual(pump.instance(running=True), {"rpm": 0, "running": True})
+        with self.assertRaises(ValueError):
+            pump.instance(speed=10)
+
+        # Template values must be template instances
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        entity.data.set_value("pump1", {"rpm": 10}, spb_data_type=MetricDataType.Template)
+        with self.assertRaises(ValueError):
+            entity.serialize_payload_data()
+
+    def test_birth_payload_cache(self):
+        """Test the BIRTH metrics are encoded again only when they change."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        entity.attributes.set_value("serial", "SN-001")
+        entity.data.set_value("temperature", 21.5)
+        entity.data.set_value("counter", 10)
+        entity.commands.set_value("reset", False)
+
+        first = SpbPayloadParser(entity.serialize_payload_birth()).payload
+        fragment = entity.data["temperature"]._birth_fragment
+        self.assertIsNotNone(fragment)
+        self.assertFalse(entity.data.is_updated())
+
+        # Same metrics, new header
+        second = SpbPayloadParser(entity.serialize_payload_birth()).payload
+        self.assertIs(entity.data["temperature"]._birth_fragment, fragment)
+        self.assertEqual(second["metrics"], first["metrics"])
+        self.assertNotEqual(second["seq"], first["seq"])
+
+        # Changed metrics are encoded again
+        entity.data.set_value("temperature", 22.0)
+        entity.attributes.set_value("serial", "SN-002")
+        entity.data["counter"].spb_data_type = MetricDataType.Int16
+        entity.data.set_value("new_metric", "value")
+        entity.commands.remove_value("reset")
+        metrics = {m["name"]: m for m in SpbPayloadParser(entity.serialize_payload_birth()).payload["metrics"]}
+        self.assertEqual(metrics["temperature"]["value"], 22.0)
+        self.assertEqual(metrics["ATTR/serial"]["value"], "SN-002")
+        self.assertEqual(metrics["counter"]["datatype"], MetricDataType.Int16)
+        self.assertEqual(metrics["new_metric"]["value"], "value")
+        self.assertNotIn("reset", metrics)
+
+    def test_serialize_payload_data_chunks(self):
+        """Test the DATA payloads are split within the payload budget, with consecutive sequence numbers."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        for i in range(20):
+            entity.data.set_value("metric%d" % i, "x" * 100)
+        entity.data.set_value("series", [float(i) for i in range(200)], timestamp=list(range(1000, 1200)))
+        entity.data.set_value("file", b"\x00" * 2000, spb_data_type=MetricDataType.Bytes)
+
+        # No budget, a single payload
+        stats = []
+        entity.on_payload_stats = stats.append
+        self.assertEqual(len(entity.serialize_payload_data_chunks(send_all=True)), 1)
+        self.assertEqual(stats[0]["metrics"], 22)
+
+        stats.clear()
+        entity.max_payload_bytes = 1024
+        with self.assertLogs(entity._logger, level="WARNING"):
+            payloads = entity.serialize_payload_data_chunks(send_all=True)
+        self.assertFalse(entity.data.is_updated())
+        self.assertGreater(len(payloads), 4)
+        self.assertEqual([s["bytes"] for s in stats], [len(p) for p in payloads])
+        self.assertEqual([s["chunk"] for s in stats], list(range(len(payloads))))
+        self.assertTrue(all(s["chunks"] == len(payloads) and s["message_type"] == "DDATA" for s in stats))
+
+        decoded = [SpbPayloadParser(p).payload for p in payloads]
+        for payload, stat in zip(decoded, stats):
+            self.assertEqual(len(payload["metrics"]), stat["metrics"])
+            if stat["bytes"] > 1024:    # Single metric larger than the budget
+                self.assertEqual(payload["metrics"][0]["name"], "file")
+        seqs = [int(payload["seq"]) for payload in decoded]
+        self.assertEqual(seqs, [(seqs[0] + i) % 256 for i in range(len(seqs))])
+
+        # All the metrics are sent, the list values split into consecutive values
+        new_entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        values, timestamps = [], []
+        for payload_bytes in payloads:
+            new_entity.deserialize_payload_data(payload_bytes)
+            value = new_entity.data.get_value("series")
+            if value is not None:
+                values += value if isinstance(value, list) else [value]
+                timestamp = new_entity.data["series"].timestamp
+                timestamps += timestamp if isinstance(timestamp, list) else [timestamp]
+                new_entity.data.remove_value("series")
+        self.assertEqual(values, [float(i) for i in range(200)])
+        self.assertEqual(timestamps, list(range(1000, 1200)))
+        self.assertEqual(new_entity.data.count(), 21)
+
+    def test_serialize_payload_compression(self):
+        """Test the BIRTH and DATA payloads are compressed above the compression threshold."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        for i in range(50):
+            entity.attributes.set_value("attribute%d" % i, "value%d" % (i % 5))
+            entity.data.set_value("metric%d" % i, "value%d" % (i % 5))
+        plain = entity.serialize_payload_birth()
+
+        entity.compression = "GZIP"
+        birth = entity.serialize_payload_birth()
+        self.assertLess(len(birth), len(plain) // 2)
+        self.assertEqual(Payload.FromString(birth).uuid, "SPBV1.0_COMPRESSED")
+
+        new_entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        new_entity.deserialize_payload_birth(birth)
+        self.assertEqual(new_entity.attributes.count(), 50)
+        self.assertEqual(new_entity.attributes.get_value("attribute7"), "value2")
+
+        # Small payloads are sent uncompressed
+        entity.compression = "DEFLATE"
+        entity.data.set_value("metric7", "changed")
+        data = entity.serialize_payload_data()
+        self.assertFalse(Payload.FromString(data).HasField("uuid"))
+
+        entity.compression_threshold = 0
+        entity.data.set_value("metric7", "changed again")
+        data = entity.serialize_payload_data(send_all=True)
+        self.assertEqual(Payload.FromString(data).uuid, "SPBV1.0_COMPRESSED")
+        new_entity.deserialize_payload_data(data)
+        self.assertEqual(new_entity.data.get_value("metric7"), "changed again")
+
+    def test_serialize_payload_no_side_effects(self):
+        """Test the serialization does not change the metric values, nor calls their callbacks."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
+        moment = datetime(2024, 10, 20, 12, 0, 0)
+        changes = []
+        entity.data.set_value("moment", moment, callback_on_change=changes.append)
+        entity.data.set_value("id", uuid.UUID("4d1c1f8e-9d9a-4c8e-b7b5-0d6f9c3b8a21"), callback_on_change=changes.append)
+
+        for payload_bytes in (entity.serialize_payload_birth(), entity.serialize_payload_data(send_all=True)):
+            metrics = {m["name"]: m["value"] for m in SpbPayloadParser(payload_bytes).payload["metrics"]}
+            self.assertEqual(metrics["moment"], moment)
+            self.assertEqual(metrics["id"], "4d1c1f8e-9d9a-4c8e-b7b5-0d6f9c3b8a21")
+        self.assertEqual(changes, [])
+        self.assertFalse(entity.data.is_updated())
+        self.assertEqual(entity.data.get_value("moment"), moment)
+        self.assertIsInstance(entity.data.get_value("id"), uuid.UUID)
+
+    def test_serialize_payload_data_error(self):
+        """Test the updated flags are kept if the DATA payload can not be encoded."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        for max_payload_bytes in (None, 1000):
+            entity.max_payload_bytes = max_payload_bytes
+            entity.data.set_value("a", 1.5)
+            entity.data.set_value("b", [1, "x"], timestamp=[1000, 2000])   # Mixed types, can not be encoded
+            entity.data.set_value("c", 2.5)
+            with self.assertRaises(ValueError):
+                entity.serialize_payload_data_chunks()
+            self.assertEqual([item.name for item in entity.data.get_updated_values()], ["a", "b", "c"])
+
+            # Sent once the value is fixed
+            entity.data.set_value("b", [1, 2], timestamp=[1000, 2000])
+            payloads = entity.serialize_payload_data_chunks()
+            names = [m["name"] for p in payloads for m in SpbPayloadParser(p).payload["metrics"]]
+            self.assertEqual(sorted(names), ["a", "b", "c"])
+            self.assertFalse(entity.data.is_updated())
+
+    def test_serialize_payload_aliases(self):
+        """Test the aliases are assigned on BIRTH, the DATA metrics sent with their alias only and resolved."""
+        entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        entity.use_aliases = True
+        entity.alias_base = 100
+        entity.data.set_value("Line3/Press07/Hydraulic/Pressure", 120.5)
+        entity.data.set_value("Line3/Press07/Hydraulic/Temperature", 45.0, spb_alias_num=7)
+        entity.data.set_value("Line3/Press07/State", "RUN")
+        entity.attributes.set_value("serial", "A123")
+
+        birth = entity.serialize_payload_birth()
+        aliases = {m["name"]: m.get("alias") for m in SpbPayloadParser(birth).payload["metrics"]}
+        self.assertEqual(aliases, {"ATTR/serial": None, "Line3/Press07/Hydraulic/Pressure": 100,
+                                   "Line3/Press07/Hydraulic/Temperature": 7, "Line3/Press07/State": 101})
+
+        entity.data.set_value("Line3/Press07/Hydraulic/Pressure", 121.0)
+        data = entity.serialize_payload_data()
+        metrics = SpbPayloadParser(data).payload["metrics"]
+        self.assertEqual([(m.get("name"), m["alias"]) for m in metrics], [(None, 100)])
+
+        receiver = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        filtered = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        filtered.metric_filter = MetricFilter(names=["Line3/Press07/State"])
+        for mirror in (receiver, filtered):
+            mirror.deserialize_payload_birth(birth)
+        receiver.deserialize_payload_data(data)
+        self.assertEqual(receiver.data.get_value("Line3/Press07/Hydraulic/Pressure"), 121.0)
+
+        # Split DATA payloads, alias only as well
+        entity.max_payload_bytes = 32
+        payloads = entity.serialize_payload_data_chunks(send_all=True)
+        self.assertGreater(len(payloads), 1)
+        for payload_bytes in payloads:
+            self.assertTrue(all("name" not in m for m in SpbPayloadParser(payload_bytes).payload["metrics"]))
+            receiver.deserialize_payload_data(payload_bytes)
+            filtered.deserialize_payload_data(payload_bytes)
+        self.assertEqual(receiver.data.count(), 3)
+        self.assertEqual(receiver.data.get_value("Line3/Press07/State"), "RUN")
+        self.assertEqual(filtered.data.count(), 1)
+        self.assertEqual(filtered.data.get_value("Line3/Press07/State"), "RUN")
+
+        # Unknown aliases are ignored
+        new_receiver = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        new_receiver.deserialize_payload_data(data)
+        self.assertTrue(new_receiver.data.is_empty())
+
+        # Duplicate aliases are rejected on BIRTH
+        entity.data.set_value("Line3/Press07/Hydraulic/Level", 3.0, spb_alias_num=7)
+        with self.assertRaises(ValueError):
+            entity.serialize_payload_birth()
+
     def test_metrics_callbacks(self):
         """Test that callbacks are called when metric values change."""
         entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
@@ -274,7 +573,7 @@ class TestSpbEntity(unittest.TestCase):
         """Test serialization when no metrics are set."""
         entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1")
         payload_bytes = entity.serialize_payload_data()
-        self.assertIsInstance(payload_bytes, bytearray)
+        self.assertIsInstance(payload_bytes, bytes)
         # self.assertEqual(len(payload_bytes), 0)  # Empty payload
 
     def test_deserialize_invalid_payload(self):
@@ -4,8 +4,11 @@ import time
 import uuid
 from datetime import datetime
 
-from mqtt_spb_wrapper.spb_base import SpbPayloadParser, Payload, MetricDataType
-from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import addMetric
+from google.protobuf.json_format import MessageToDict
+
+from mqtt_spb_wrapper.spb_base import SpbPayloadParser, Payload, MetricDataType, MetricFilter
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import addMetric, addNullMetric, addMetricDataset_from_dict
+from mqtt_spb_wrapper.spb_protobuf.sparkplug_b import getCompressedPayload, getDecompressedPayload
 
 
 class TestSpbPayloadParser(unittest.TestCase):
@@ -132,6 +135,51 @@ class TestSpbPayloadParser(unittest.TestCase):
         parser = SpbPayloadParser(invalid_data)
         self.assertIsNone(parser.payload)
 
+    def test_parse_compressed_payload(self):
+        """Test compressed payloads are decompressed transparently, DEFLATE and GZIP."""
+        payload = Payload()
+        payload.seq = 5
+        addMetric(payload, "temperature", None, MetricDataType.Double, 22.5)
+        addMetric(payload, "status", None, MetricDataType.String, "ok" * 100)
+        payload_bytes = payload.SerializeToString()
+
+        for algorithm in ("DEFLATE", "GZIP"):
+            compressed = getCompressedPayload(payload_bytes, algorithm)
+            self.assertEqual(compressed.uuid, "SPBV1.0_COMPRESSED")
+            self.assertEqual(compressed.metrics[0].string_value, algorithm)
+            self.assertLess(len(compressed.SerializeToString()), len(payload_bytes))
+
+            for lazy in (False, True):
+                parsed = SpbPayloadParser(compressed.SerializeToString(), lazy=lazy, zero_copy=lazy).payload
+                self.assertEqual(int(parsed["seq"]), 5)
+                self.assertEqual([m["name"] for m in parsed["metrics"]], ["temperature", "status"])
+                self.assertEqual(parsed["metrics"][1]["value"], "ok" * 100)
+
+        # Unsupported algorithm, corrupted body
+        compressed = getCompressedPayload(payload_bytes)
+        compressed.metrics[0].string_value = "LZ4"
+        self.assertIsNone(SpbPayloadParser(compressed.SerializeToString()).payload)
+        compressed = getCompressedPayload(payload_bytes)
+        compressed.body = compressed.body[:10]
+        self.assertIsNone(SpbPayloadParser(compressed.SerializeToString()).payload)
+
+    def test_truncated_compressed_payload(self):
+        """Test truncated compressed bodies are rejected, even if the partial payload could be decoded."""
+        payload = Payload()
+        for i in range(20):
+            addMetric(payload, "temperature%d" % i, None, MetricDataType.Double, 20.0 + i)
+        payload_bytes = payload.SerializeToString()
+
+        for algorithm in ("DEFLATE", "GZIP"):
+            compressed = getCompressedPayload(payload_bytes, algorithm)
+            self.assertEqual(getDecompressedPayload(compressed), payload_bytes)
+            for size in (1, 4, len(compressed.body) // 2):
+                truncated = getCompressedPayload(payload_bytes, algorithm)
+                truncated.body = compressed.body[:-size]
+                with self.assertRaises(ValueError):
+                    getDecompressedPayload(truncated)
+                self.assertIsNone(SpbPayloadParser(truncated.SerializeToString()).payload)
+
     def test_parse_online_offline_payload(self):
         """Test parsing payloads with 'ONLINE' or 'OFFLINE' strings."""
         online_data = b'ONLINE'
@@ -221,5 +269,185 @@ class TestSpbPayloadParser(unittest.TestCase):
         self.assertEqual(decoded_value, bytes_value)
         self.assertEqual(metric['datatype'], MetricDataType.Bytes)
 
+    def test_parse_payload_with_bytes_zero_copy(self):
+        """Test Bytes / File values are slices of the payload buffer in zero-copy mode."""
+        payload_bytes = Payload()
+        file_value = bytes(range(256)) * 64
+        addMetric(payload_bytes, name="temperature", alias=None, type=MetricDataType.Double, value=25.5)
+        addMetric(payload_bytes, name="file_metric", alias=None, type=MetricDataType.File, value=file_value)
+        addMetric(payload_bytes, name="bytes_metric", alias=None, type=MetricDataType.Bytes, value=b'\x00\xFF')
+        payload_data = payload_bytes.SerializeToString()
+
+        metrics = SpbPayloadParser(payload_data, zero_copy=True).payload['metrics']
+        self.assertEqual(metrics[0]['value'], 25.5)
+        self.assertIsInstance(metrics[1]['value'], memoryview)
+        self.assertIs(metrics[1]['value'].obj, payload_data)
+        self.assertEqual(metrics[1]['value'], file_value)
+        self.assertIs(metrics[1]['bytesValue'], metrics[1]['value'])
+        self.assertEqual(metrics[2]['value'], b'\x00\xFF')
+
+        # Lazy and filtered payloads, the metric index in the payload is kept
+        metric_filter = MetricFilter(names=["bytes_metric"])
+        for lazy in (False, True):
+            metrics = SpbPayloadParser(payload_data, lazy=lazy, metric_filter=metric_filter, zero_copy=True).payload['metrics']
+            self.assertEqual(len(metrics), 1)
+            self.assertIs(metrics[-1]['value'].obj, payload_data)
+            self.assertEqual(metrics[-1]['value'], b'\x00\xFF')
+
+    def test_parse_many(self):
+        """Test parsing many payloads, in process and with a process pool, keeps the payloads order."""
+        payloads = []
+        for i in range(20):
+            payload_bytes = Payload()
+            payload_bytes.seq = i
+            addMetric(payload_bytes, name="counter", alias=None, type=MetricDataType.Int64, value=i)
+            addMetric(payload_bytes, name="temperature", alias=None, type=MetricDataType.Double, value=i * 0.5)
+            payloads.append(payload_bytes.SerializeToString())
+        payloads[5] = b"invalid_data"
+
+        expected = [SpbPayloadParser().parse_payload(payload_data) for payload_data in payloads]
+        self.assertIsNone(expected[5])
+
+        for workers, chunk_size in ((1, 4), (2, 4), (2, 100)):
+            results = list(SpbPayloadParser.parse_many(iter(payloads), workers=workers, chunk_size=chunk_size))
+            self.assertEqual(results, expected)
+
+        results = SpbPayloadParser.parse_many(payloads, workers=2, chunk_size=3, metric_filter=MetricFilter(names=["counter"]))
+        self.assertEqual([payload['metrics'][0]['value'] for payload in results if payload is not None],
+                         [i for i in range(20) if i != 5])
+        self.assertEqual(list(SpbPayloadParser.parse_many([])), [])
+
+    def test_parse_payload_messagetodict_format(self):
+        """Test the decoded payload keeps the MessageToDict field format."""
+        payload_bytes = Payload()
+        payload_bytes.timestamp = 1729453899362
+        payload_bytes.seq = 3
+        addMetric(payload_bytes, name="float_metric", alias=0, type=MetricDataType.Float, value=0.1, timestamp=1000)
+        addMetric(payload_bytes, name="int64_metric", alias=None, type=MetricDataType.Int64, value=-5, timestamp=1000)
+        addMetric(payload_bytes, name="uint64_metric", alias=None, type=MetricDataType.UInt64, value=2**63, timestamp=1000)
+        payload_data = payload_bytes.SerializeToString()
+
+        parser = SpbPayloadParser(payload_data)
+        self.assertEqual(parser.payload['timestamp'], '1729453899362')
+        self.assertEqual(parser.payload['seq'], '3')
+
+        metrics = parser.payload['metrics']
+        self.assertEqual(metrics[0], {
+            'name': 'float_metric', 'alias': 0, 'timestamp': '1000', 'datatype': MetricDataType.Float,
+            'floatValue': 0.1, 'value': 0.1,
+        })
+        self.assertEqual(metrics[1]['longValue'], str(2**64 - 5))
+        self.assertEqual(metrics[1]['value'], 2**64 - 5)
+        self.assertEqual(metrics[2]['longValue'], str(2**63))
+        self.assertEqual(metrics[2]['value'], 2**63)
+
+    def test_parse_payload_with_dataset(self):
+        """Test parsing a payload containing a DataSet metric."""
+        payload_bytes = Payload()
+        addMetricDataset_from_dict(payload_bytes, "dataset_metric", None, {
+            "timestamps": [1620000000000, 1620000001000],
+            "values": [1.5, 2.5],
+        })
+        payload_data = payload_bytes.SerializeToString()
+
+        parser = SpbPayloadParser(payload_data)
+        metric = parser.payload['metrics'][0]
+        self.assertEqual(metric['datatype'], MetricDataType.DataSet)
+        expected = MessageToDict(payload_bytes.metrics[0].dataset_value)
+        del expected['rows']
+        self.assertEqual(metric['datasetValue'], expected)
+        self.assertEqual(list(metric['value'].keys()), ["timestamps", "values"])
+        self.assertEqual(list(metric['value']['timestamps']), [1620000000000, 1620000001000])
+        self.assertEqual(list(metric['value']['values']), [1.5, 2.5])
+
+    def test_parse_payload_with_dataset_columns(self):
+        """Test the DataSet rows are decoded into typed columns."""
+        payload_bytes = Payload()
+        dataset = payload_bytes.metrics.add(name="dataset_metric", datatype=MetricDataType.DataSet).dataset_value
+        dataset.num_of_columns = 5
+        dataset.columns.extend(["int8", "int64", "float", "bool", "text"])
+        dataset.types.extend([MetricDataType.Int8, MetricDataType.Int64, MetricDataType.Float,
+                              MetricDataType.Boolean, MetricDataType.String])
+        for i8, i64, f, b, t in [(-1, -5000000000, 0.5, True, "a"), (127, 5000000000, -1.25, False, "b")]:
+            row = dataset.rows.add()
+            row.elements.add().int_value = i8 & 0xFFFFFFFF  # Two's complement, as sent by Tahu clients
+            row.elements.add().long_value = i64 & 0xFFFFFFFFFFFFFFFF
+            row.elements.add().float_value = f
+            row.elements.add().boolean_value = b
+            row.elements.add().string_value = t
+        payload_data = payload_bytes.SerializeToString()
+
+        columns = SpbPayloadParser(payload_data).payload['metrics'][0]['value']
+        self.assertEqual(list(columns['int8']), [-1, 127])
+        self.assertEqual(list(columns['int64']), [-5000000000, 5000000000])
+        self.assertEqual(list(columns['float']), [0.5, -1.25])
+        self.assertEqual(columns['bool'], [True, False])
+        self.assertEqual(columns['text'], ["a", "b"])
+        self.assertEqual(columns['int8'].itemsize, 1)
+        self.assertEqual(columns['float'].itemsize, 4)
+
+    def test_parse_payload_with_null_metric(self):
+        """Test a null metric does not invalidate the rest of the payload."""
+        payload_bytes = Payload()
+        addNullMetric(payload_bytes, name="null_metric", alias=None, type=MetricDataType.Double)
+        addMetric(payload_bytes, name="temperature", alias=None, type=MetricDataType.Double, value=25.5)
+        payload_data = payload_bytes.SerializeToString()
+
+        parser = SpbPayloadParser(payload_data)
+        metrics = parser.payload['metrics']
+        self.assertEqual(len(metrics), 2)
+        self.assertTrue(metrics[0]['isNull'])
+        self.assertNotIn('value', metrics[0])
+        self.assertEqual(metrics[1]['value'], 25.5)
+
+    def test_parse_lazy_payload(self):
+        """Test the lazy payload only converts the metrics that are accessed."""
+        payload_bytes = Payload()
+        payload_bytes.timestamp = 1729453899362
+        for i in range(10):
+            addMetric(payload_bytes, name="metric_%d" % i, alias=None, type=MetricDataType.Int32, value=i)
+        payload_data = payload_bytes.SerializeToString()
+
+        parser = SpbPayloadParser(payload_data, lazy=True)
+        self.assertIsNotNone(parser.payload)
+        self.assertIn('metrics', parser.payload)
+        self.assertEqual(parser.payload['timestamp'], '1729453899362')
+
+        metrics = parser.payload['metrics']
+        self.assertEqual(len(metrics), 10)
+        self.assertEqual(metrics[3]['value'], 3)
+        self.assertEqual(metrics.get('metric_7')['value'], 7)
+        self.assertIsNone(metrics.get('unknown'))
+        self.assertEqual(sum(item is not None for item in metrics._items), 2)
+
+        # Full dictionary is the same as the non lazy parser
+        self.assertEqual(parser.as_dict(), SpbPayloadParser(payload_data).as_dict())
+        self.assertEqual(dict(parser.payload), SpbPayloadParser(payload_data).payload)
+
+    def test_parse_lazy_payload_filtered(self):
+        """Test the lazy and the eager payloads are the same with metric filters, also when no metric matches."""
+        payload_bytes = Payload()
+        payload_bytes.timestamp = 1729453899362
+        for i in range(3):
+            addMetric(payload_bytes, name="metric_%d" % i, alias=None, type=MetricDataType.Int32, value=i)
+        payload_data = payload_bytes.SerializeToString()
+
+        for names, expected in ((["unknown"], []), (["metric_1"], ["metric_1"])):
+            metric_filter = MetricFilter(names=names)
+            for zero_copy in (False, True):
+                eager = SpbPayloadParser(payload_data, metric_filter=metric_filter, zero_copy=zero_copy).payload
+                lazy = SpbPayloadParser(payload_data, lazy=True, metric_filter=metric_filter,
+                                        zero_copy=zero_copy).payload
+                self.assertEqual(list(lazy.keys()), list(eager.keys()))
+                self.assertEqual('metrics' in lazy, 'metrics' in eager)
+                self.assertEqual(lazy, eager)
+                self.assertEqual(lazy.as_dict(), eager)
+                self.assertEqual([metric['name'] for metric in lazy['metrics']], expected)
+
+    def test_parse_lazy_payload_invalid(self):
+        """Test the lazy parser with invalid and STATE payloads."""
+        self.assertIsNone(SpbPayloadParser(b'invalid_payload_data', lazy=True).payload)
+        self.assertEqual(SpbPayloadParser(b'ONLINE', lazy=True).payload, 'ONLINE')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+import time
+from array import array
+from datetime import datetime
+
+import numpy
+
+from mqtt_spb_wrapper.spb_base import SpbEntity, SpbPayloadParser, MetricFilter, MetricDataType
+from mqtt_spb_wrapper.spb_codec import PayloadCodec, ProtobufCodec, register_codec, unregister_codec, \
+    set_default_codec, get_codec, get_codecs
+
+
+class CountingCodec(ProtobufCodec):
+    """ Codec wrapping the default one, counting the encoded and decoded payloads """
+
+    name = "counting"
+
+    def __init__(self):
+        self.encoded = 0
+        self.decoded = 0
+
+    def encode(self, payload):
+        self.encoded += 1
+        return super().encode(payload)
+
+    def decode(self, payload_data, lazy=False, metric_filter=None, zero_copy=False):
+        self.decoded += 1
+        return super().decode(payload_data, lazy, metric_filter, zero_copy)
+
+
+class TestPayloadCodec(unittest.TestCase):
+    """ Conformance tests, run for every registered codec over the same corpus """
+
+    def setUp(self):
+        self.entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+        self.entity.attributes.set_value("serial", "SN-001")
+        self.entity.data.set_value("int_metric", -5, spb_data_type=MetricDataType.Int32)
+        self.entity.data.set_value("long_metric", 2 ** 40)
+        self.entity.data.set_value("double_metric", 123.456)
+        self.entity.data.set_value("bool_metric", True)
+        self.entity.data.set_value("string_metric", "test string")
+        self.entity.data.set_value("datetime_metric", datetime(2024, 10, 20, 21, 51, 39))
+        self.entity.data.set_value("bytes_metric", b"\x00\x01\x02")
+        self.entity.data.set_value("list_metric", [1.5, 2.5], timestamp=[1000, 2000])
+        self.entity.commands.set_value("reboot", False)
+
+    def _corpus(self, codec):
+        self.entity.codec = codec
+        return [
+            self.entity.serialize_payload_birth(),
+            self.entity.serialize_payload_data(send_all=True),
+            self.entity.serialize_payload_cmd(send_all=True),
+        ]
+
+    def test_registry(self):
+        """Test the default codec is registered and selectable."""
+        self.assertIsInstance(get_codec(), ProtobufCodec)
+        self.assertIs(get_codec("protobuf"), get_codec())
+        self.assertIn("protobuf", get_codecs())
+        codec = CountingCodec()
+        self.assertIs(get_codec(codec), codec)
+        with self.assertRaises(ValueError):
+            get_codec("unknown")
+
+    def test_encode_conformance(self):
+        """Test every codec encodes payloads decoded the same way by the default codec."""
+        reference = [SpbPayloadParser(data).payload for data in self._corpus(None)]
+        for name, codec in get_codecs().items():
+            for expected, data in zip(reference, self._corpus(codec)):
+                payload = SpbPayloadParser(data).payload
+                self.assertEqual([m["name"] for m in payload["metrics"]], [m["name"] for m in expected["metrics"]], name)
+                self.assertEqual([m.get("value") for m in payload["metrics"] if m["datatype"] != MetricDataType.DataSet],
+                                 [m.get("value") for m in expected["metrics"] if m["datatype"] != MetricDataType.DataSet],
+                                 name)
+
+    def test_decode_conformance(self):
+        """Test every codec decodes the corpus as the default codec, with all the decoding options."""
+        corpus = self._corpus(None)
+        metric_filter = MetricFilter(names=["double_metric", "bytes_metric"])
+        for name, codec in get_codecs().items():
+            for data in corpus:
+                expected = SpbPayloadParser(data).payload
+                self.assertEqual(repr(SpbPayloadParser(data, codec=codec).payload), repr(expected), name)
+                self.assertEqual(repr(SpbPayloadParser(data, lazy=True, codec=codec).as_dict()), repr(expected), name)
+
+                expected = SpbPayloadParser(data, metric_filter=metric_filter).payload
+                payload = SpbPayloadParser(data, metric_filter=metric_filter, zero_copy=True, codec=codec).payload
+                self.assertEqual([m["name"] for m in payload.get("metrics", [])],
+                                 [m["name"] for m in expected.get("metrics", [])], name)
+                self.assertEqual([bytes(m["value"]) if isinstance(m["value"], memoryview) else m["value"]
+                                  for m in payload.get("metrics", [])],
+                                 [m["value"] for m in expected.get("metrics", [])], name)
+
+            self.assertIsNone(SpbPayloadParser(b"invalid_data", codec=codec).payload, name)
+            self.assertEqual(SpbPayloadParser(b"ONLINE", codec=codec).payload, "ONLINE", name)
+
+    def test_entity_codec(self):
+        """Test the entity serialization and deserialization use the selected codec."""
+        codec = CountingCodec()
+        register_codec(codec)
+        try:
+            self.entity.codec = "counting"
+            data = self.entity.serialize_payload_data(send_all=True)
+            self.assertEqual(codec.encoded, 1)
+
+            entity = SpbEntity(spb_domain_name="Group1", spb_eon_name="EoN1", spb_eon_device_name="Device1")
+            entity.codec = "counting"
+            entity.deserialize_payload_data(data)
+            self.assertEqual(codec.decoded, 1)
+            self.assertEqual(entity.data.get_value("double_metric"), 123.456)
+
+            # Default codec selected at runtime
+            set_default_codec("counting")
+            SpbPayloadParser(data)
+            self.assertEqual(codec.decoded, 2)
+            with self.assertRaises(ValueError):
+                unregister_codec("counting")
+        finally:
+            set_default_codec("protobuf")
+            unregister_codec("counting")
+        self.assertNotIn("counting", get_codecs())
+
+    def test_add_metric(self):
+        """Test every codec encodes the metric datatypes, and the default timestamp is the current time."""
+        for name, codec in get_codecs().items():
+            payload = codec.new_payload("DDATA")
+            codec.add_metric(payload, "int8", None, MetricDataType.Int8, -1)
+            codec.add_metric(payload, "int64", None, MetricDataType.Int64, -2)
+            codec.add_metric(payload, "uint16", None, MetricDataType.UInt16, 65535)
+            codec.add_metric(payload, "text", None, MetricDataType.Text, "text")
+            codec.add_null_metric(payload, "null", None, MetricDataType.Double)
+            now = int(time.time() * 1000)
+            codec.add_metric(payload, "now", None, MetricDataType.Boolean, True)
+
+            metrics = {m["name"]: m for m in SpbPayloadParser(codec.encode(payload), codec=codec).payload["metrics"]}
+            self.assertEqual(metrics["int8"]["value"], 0xFF, name)     # Two's complement
+            self.assertEqual(metrics["int64"]["value"], 2 ** 64 - 2, name)
+            self.assertEqual(metrics["uint16"]["value"], 65535, name)
+            self.assertEqual(metrics["text"]["datatype"], MetricDataType.Text, name)
+            self.assertEqual(metrics["null"]["datatype"], MetricDataType.Double, name)
+            self.assertTrue(metrics["null"]["isNull"], name)
+            self.assertGreaterEqual(int(metrics["now"]["timestamp"]), now, name)
+
+    def test_add_dataset_metric(self):
+        """Test DataSet columns keep their types, from python lists, array.array and NumPy arrays."""
+        data = {
+            "int": [1, -2, None],
+            "big": [0, 2 ** 63, 1],
+            "double": [0.1, 2, -1e300],
+            "bool": [True, False, True],
+            "string": ["a", "é", ""],
+            "datetime": [datetime(2024, 10, 20), None, datetime(2024, 10, 21)],
+            "float32": numpy.array([0.5, 1.5, -2.5], dtype=numpy.float32),
+            "int16": numpy.array([-1, 0, 32767], dtype=numpy.int16),
+            "uint8": array("B", [0, 128, 255]),
+            "double_array": array("d", [0.1, 0.2, 0.3]),
+        }
+        expected_types = {
+            "int": MetricDataType.Int64, "big": MetricDataType.UInt64, "double": MetricDataType.Double,
+            "bool": MetricDataType.Boolean, "string": MetricDataType.String, "datetime": MetricDataType.DateTime,
+            "float32": MetricDataType.Float, "int16": MetricDataType.Int16, "uint8": MetricDataType.UInt8,
+            "double_array": MetricDataType.Double, "text": MetricDataType.Text,
+        }
+        for name, codec in get_codecs().items():
+            payload = codec.new_payload("DDATA")
+            codec.add_dataset_metric(payload, "dataset", None, dict(data, text=["x", "y", "z"]),
+                                     types={"text": MetricDataType.Text})
+            metric = SpbPayloadParser(codec.encode(payload), codec=codec).payload["metrics"][0]
+            types = dict(zip(metric["datasetValue"]["columns"], metric["datasetValue"]["types"]))
+            self.assertEqual(types, expected_types, name)
+
+            columns = metric["value"]
+            self.assertEqual(list(columns["int"][:2]), [1, -2], name)
+            self.assertEqual(list(columns["big"]), [0, 2 ** 63, 1], name)
+            self.assertEqual(list(columns["double"]), [0.1, 2.0, -1e300], name)
+            self.assertEqual(columns["bool"], [True, False, True], name)
+            self.assertEqual(columns["string"], ["a", "é", ""], name)
+            self.assertEqual(columns["datetime"][0], int(datetime(2024, 10, 20).timestamp() * 1000), name)
+            self.assertEqual(list(columns["float32"]), [0.5, 1.5, -2.5], name)
+            self.assertEqual(list(columns["int16"]), [-1, 0, 32767], name)
+            self.assertEqual(list(columns["uint8"]), [0, 128, 255], name)
+            self.assertEqual(list(columns["double_array"]), [0.1, 0.2, 0.3], name)
+
+            # Invalid columns
+            for values, types in [([1, "a"], None), ([object()], None), ([300], {"values": MetricDataType.Int8}),
+                                  ([1, 2], {"values": MetricDataType.Template})]:
+                with self.assertRaises(ValueError):
+                    codec.add_dataset_metric(codec.new_payload("DDATA"), "dataset", None, {"values": values},
+                                             types=types)
+
+    def test_base_codec_not_implemented(self):
+        """Test the codec interface methods must be implemented."""
+        with self.assertRaises(NotImplementedError):
+            PayloadCodec().new_payload("DDATA")
+        with self.assertRaises(NotImplementedError):
+            PayloadCodec().decode(b"")
+
+
+if __name__ == '__main__':
+    unittest.main()